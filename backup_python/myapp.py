@@ -3688,6 +3688,7 @@ def gerenciar_tabela_referencia(nome_banco, nome_tabela_ref):
                         (novo_valor, descricao, ordem)
                     )
                     conexao.commit()
+                    carregar_valores_referencia.clear()
                     st.success(f"✅ Valor '{novo_valor}' adicionado!")
                     st.rerun()
         
@@ -3716,6 +3717,7 @@ def gerenciar_tabela_referencia(nome_banco, nome_tabela_ref):
                                 (novo_valor, nova_desc, nova_ordem, novo_status, id_selecionado)
                             )
                             conexao.commit()
+                            carregar_valores_referencia.clear()
                             st.success("✅ Valor atualizado!")
                             st.rerun()
         
@@ -3736,6 +3738,7 @@ def gerenciar_tabela_referencia(nome_banco, nome_tabela_ref):
                     if st.checkbox("Confirmar remoção"):
                         cursor.execute(f"DELETE FROM `{nome_tabela_ref}` WHERE id = %s", (id_remover,))
                         conexao.commit()
+                        carregar_valores_referencia.clear()
                         st.success("✅ Valor removido!")
                         st.rerun()
         
@@ -3781,6 +3784,23 @@ def gerenciar_tabela_referencia(nome_banco, nome_tabela_ref):
 # ===========================================================================================          
 # ====================       FUNÇÃO INSERIR/EDITAR DADOS     ================================        
 #============================================================================================ 
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def carregar_valores_referencia(servidor, nome_banco, tabela_ref):
+    """Valores ativos (id, valor) de uma tabela de referência, partilhados entre sessões.
+    `servidor` só entra na chave da cache; as escritas da app limpam a cache."""
+    conexao = conectar_mysql(nome_banco)
+    if not conexao:
+        raise Error("Sem conexão ao MySQL")
+    
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(f"SELECT id, valor FROM `{tabela_ref}` WHERE ativo = TRUE ORDER BY ordem")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conexao.close()
+
+
 def inserir_dados_com_combobox(nome_banco, nome_tabela):
     """Insere dados com combobox de referências"""
     
@@ -3828,9 +3848,10 @@ def inserir_dados_com_combobox(nome_banco, nome_tabela):
                 if nome_col in fk_dict:
                     tabela_ref, col_ref = fk_dict[nome_col]
                     
-                    # Buscar valores da tabela de referência
-                    cursor.execute(f"SELECT id, valor FROM `{tabela_ref}` WHERE ativo = TRUE ORDER BY ordem")
-                    valores_ref = cursor.fetchall()
+                    # Buscar valores da tabela de referência (cache partilhada)
+                    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+                    servidor = f"{config.get('user')}@{config.get('host')}:{config.get('port', 3306)}"
+                    valores_ref = carregar_valores_referencia(servidor, nome_banco, tabela_ref)
                     
                     if valores_ref:
                         # Criar combobox
@@ -3889,6 +3910,7 @@ def inserir_dados_com_combobox(nome_banco, nome_tabela):
                 try:
                     cursor.execute(sql, list(dados.values()))
                     conexao.commit()
+                    carregar_valores_referencia.clear()
                     
                     # Obter ID inserido
                     id_inserido = cursor.lastrowid
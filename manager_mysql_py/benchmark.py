@@ -0,0 +1,544 @@
+"""
+BENCHMARK DOS CAMINHOS DE DADOS DO MYSQL MANAGER
+Semeia bancos de teste (10k / 1M / 10M linhas), mede as consultas e o processamento por trás
+das páginas (visualizar, exportar, excluir, visão geral, relacionamentos, editor de queries)
+e grava um relatório JSON que pode ser comparado entre commits.
+
+Uso:
+    python benchmark.py --tamanhos 10000,1000000 --saida base.json
+    python benchmark.py --tamanhos 10000,1000000 --saida novo.json --comparar base.json
+    python benchmark.py --mysqld /usr/sbin/mysqld --tamanhos 10000   (mysqld descartável)
+
+Por caso e tamanho são registados: tempo de parede (mediana das repetições), número de
+consultas enviadas ao servidor (delta de Questions) e pico de memória Python (tracemalloc,
+numa execução à parte para não distorcer os tempos).
+"""
+# ================================= IMPORTES ===================
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from time import perf_counter, sleep
+
+import mysql.connector
+from mysql.connector import Error
+import pandas as pd
+
+import myapp
+
+# ==================== CONFIGURAÇÃO ====================
+
+PREFIXO_BANCO = "bench_manager"
+
+# Esquema semeado: clientes/produtos (pais) e pedidos (filha, a tabela medida)
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS `clientes` (
+        `id` INT NOT NULL AUTO_INCREMENT,
+        `nome` VARCHAR(60) NOT NULL,
+        `email` VARCHAR(120) NULL,
+        `cidade` VARCHAR(40) NULL,
+        `criado_em` DATETIME NOT NULL,
+        PRIMARY KEY (`id`),
+        UNIQUE KEY `uq_clientes_email` (`email`),
+        KEY `ix_clientes_nome` (`nome`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+    """CREATE TABLE IF NOT EXISTS `produtos` (
+        `id` INT NOT NULL AUTO_INCREMENT,
+        `codigo` CHAR(16) NOT NULL,
+        `descricao` VARCHAR(200) NULL,
+        `preco` DECIMAL(10,2) NOT NULL,
+        `categoria` ENUM('livros','eletronica','casa','desporto') NOT NULL,
+        PRIMARY KEY (`id`),
+        UNIQUE KEY `uq_produtos_codigo` (`codigo`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+    """CREATE TABLE IF NOT EXISTS `pedidos` (
+        `id` BIGINT NOT NULL AUTO_INCREMENT,
+        `cliente_id` INT NOT NULL,
+        `produto_id` INT NULL,
+        `quantidade` SMALLINT UNSIGNED NOT NULL,
+        `valor` DECIMAL(12,2) NULL,
+        `estado` ENUM('novo','pago','enviado','cancelado') NOT NULL,
+        `criado_em` DATETIME NOT NULL,
+        `observacao` TEXT NULL,
+        PRIMARY KEY (`id`),
+        KEY `ix_pedidos_criado_em` (`criado_em`),
+        CONSTRAINT `fk_pedidos_cliente` FOREIGN KEY (`cliente_id`) REFERENCES `clientes` (`id`) ON DELETE CASCADE,
+        CONSTRAINT `fk_pedidos_produto` FOREIGN KEY (`produto_id`) REFERENCES `produtos` (`id`) ON DELETE SET NULL
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+]
+
+# Linhas de cada tabela pai em função do tamanho do dataset (linhas de `pedidos`)
+PROPORCOES_PAIS = {'clientes': 10, 'produtos': 100}
+
+# Linhas copiadas para a tabela descartável da exclusão em massa
+LINHAS_EXCLUSAO_MASSA = 10000
+
+# Diferença mínima (segundos) para um caso mais lento contar como regressão
+TOLERANCIA_ABSOLUTA = 0.005
+
+# ==================== MYSQLD DESCARTÁVEL ====================
+
+def iniciar_mysqld(executavel, porta):
+    """Inicializa um datadir temporário e arranca um mysqld só para o benchmark.
+    Retorna (processo, diretorio); o root fica sem senha e só escuta em 127.0.0.1."""
+    diretorio = tempfile.mkdtemp(prefix="bench_mysqld_")
+    datadir = os.path.join(diretorio, "dados")
+    subprocess.run([executavel, "--no-defaults", "--initialize-insecure", f"--datadir={datadir}"],
+                   check=True, capture_output=True)
+    processo = subprocess.Popen(
+        [executavel, "--no-defaults", f"--datadir={datadir}", f"--port={porta}", "--bind-address=127.0.0.1",
+         f"--socket={os.path.join(diretorio, 'mysqld.sock')}", "--mysqlx=OFF", "--skip-log-bin",
+         "--innodb-flush-log-at-trx-commit=2", "--innodb-buffer-pool-size=512M"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    # Espera até aceitar conexões
+    inicio = perf_counter()
+    while True:
+        try:
+            mysql.connector.connect(host="127.0.0.1", port=porta, user="root", password="").close()
+            return processo, diretorio
+        except Error:
+            if processo.poll() is not None or perf_counter() - inicio > 120:
+                parar_mysqld(processo, diretorio)
+                raise RuntimeError("O mysqld descartável não arrancou")
+            sleep(0.5)
+
+
+def parar_mysqld(processo, diretorio):
+    """Termina o mysqld descartável e apaga o datadir"""
+    processo.terminate()
+    try:
+        processo.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+    shutil.rmtree(diretorio, ignore_errors=True)
+
+# ==================== PREPARAÇÃO DOS DADOS ====================
+
+def configurar_app(config):
+    """Aponta a app para o servidor do benchmark. Fora do `streamlit run` o session_state não
+    guarda valores, por isso as funções da app usam sempre DEFAULT_CONFIG."""
+    myapp.DEFAULT_CONFIG.clear()
+    myapp.DEFAULT_CONFIG.update(config)
+
+
+def preparar_banco(config, tamanho, semente, recriar=False):
+    """Cria (se preciso) o banco `bench_manager_<tamanho>` e semeia-o com o gerador da app.
+    Um banco já semeado com o tamanho pedido é reutilizado. Retorna o nome do banco."""
+    nome_banco = f"{PREFIXO_BANCO}_{tamanho}"
+    conexao = mysql.connector.connect(**config)
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'pedidos'",
+                       (nome_banco,))
+        if cursor.fetchone()[0] and not recriar:
+            cursor.execute(f"SELECT COUNT(*) FROM `{nome_banco}`.`pedidos`")
+            if cursor.fetchone()[0] >= tamanho:
+                return nome_banco
+        # Banco novo (ou semeadura interrompida): recomeça do zero para os ids serem reprodutíveis
+        cursor.execute(f"DROP DATABASE IF EXISTS `{nome_banco}`")
+        cursor.execute(f"CREATE DATABASE `{nome_banco}` DEFAULT CHARSET utf8mb4")
+        cursor.execute(f"USE `{nome_banco}`")
+        for ddl in ESQUEMA:
+            cursor.execute(ddl)
+    finally:
+        cursor.close()
+        conexao.close()
+
+    # Pools e catálogo do banco antigo já não servem
+    myapp.remover_pools_banco(nome_banco)
+    myapp.invalidar_catalogo(nome_banco)
+    quantidades = {
+        'clientes': max(100, tamanho // PROPORCOES_PAIS['clientes']),
+        'produtos': max(100, tamanho // PROPORCOES_PAIS['produtos']),
+        'pedidos': tamanho
+    }
+    ordem, _ = myapp.ordem_topologica(nome_banco, list(quantidades))
+    conexao = myapp.obter_conexao_pool(config, nome_banco)
+    try:
+        for tabela in ordem:
+            inicio = perf_counter()
+            conexao.rollback()  # novo snapshot: vê as chaves dos pais já gravadas
+            estimativas = myapp.estimativas_linhas(conexao, nome_banco)
+            plano = myapp.planear_geracao(conexao, nome_banco, tabela, estimativas)
+            inseridas = sum(inseridas for _, inseridas in
+                            myapp.gerar_em_paralelo(config, nome_banco, plano, quantidades[tabela], semente))
+            print(f"  semeada {tabela}: {inseridas:,} linhas em {perf_counter() - inicio:.1f}s", file=sys.stderr)
+    finally:
+        conexao.close()
+
+    # Estatísticas atualizadas: as estimativas e os planos de execução dependem delas
+    conexao = mysql.connector.connect(database=nome_banco, **config)
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("ANALYZE TABLE `clientes`, `produtos`, `pedidos`")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+        conexao.close()
+    return nome_banco
+
+# ==================== CASOS MEDIDOS ====================
+# Cada caso recebe o contexto {'config', 'banco', 'tamanho', 'conexao'} e repete o acesso a
+# dados da página correspondente, sem a interface. `preparar` (opcional) corre fora da medição.
+
+def caso_visao_geral(ctx):
+    """mostrar_visao_geral: catálogo a frio + estimativas de linhas"""
+    myapp.invalidar_catalogo(ctx['banco'])
+    myapp.obter_catalogo(ctx['banco'])
+    myapp.estimativas_linhas(ctx['conexao'], ctx['banco'])
+
+
+def caso_relacionamentos(ctx):
+    """mostrar_relacionamentos_banco: grafo de FKs + contagens de cobertura em paralelo"""
+    myapp.invalidar_catalogo(ctx['banco'])
+    grafo = myapp.obter_grafo_fks(ctx['banco'])
+    itens = {}
+    for arestas in grafo['pais'].values():
+        for aresta in arestas:
+            coluna = aresta['colunas'][0]
+            itens[f"{aresta['constraint']}.{coluna}|com_valor"] = (aresta['filho'], f"`{coluna}` IS NOT NULL")
+            itens[f"destino|{aresta['pai']}"] = (aresta['pai'], "")
+    for _, _, erro, _ in myapp.contar_em_paralelo(ctx['config'], ctx['banco'], itens):
+        if erro:
+            raise RuntimeError(erro)
+
+
+def caso_visualizar_primeira_pagina(ctx):
+    """visualizar_dados: primeira página (keyset) + contagem limitada"""
+    cursor = ctx['conexao'].cursor()
+    try:
+        myapp.consultar_pagina_keyset(cursor, 'pedidos', ['id'], limite=100)
+        myapp.contar_limitado(cursor, 'pedidos')
+    finally:
+        cursor.close()
+
+
+def caso_visualizar_pagina_profunda(ctx):
+    """visualizar_dados: página a 90% da tabela (seek pela chave, sem OFFSET)"""
+    cursor = ctx['conexao'].cursor()
+    try:
+        myapp.consultar_pagina_keyset(cursor, 'pedidos', ['id'], inicio=(int(ctx['tamanho'] * 0.9),), limite=100)
+    finally:
+        cursor.close()
+
+
+def caso_visualizar_filtrado(ctx):
+    """visualizar_dados: filtro no servidor + contagem limitada do resultado"""
+    colunas = [col[0] for col in myapp.obter_estrutura_tabela(ctx['banco'], 'pedidos')]
+    where, params = myapp.compilar_filtros(
+        [{'coluna': 'estado', 'operador': '=', 'valor': 'pago'},
+         {'coluna': 'criado_em', 'operador': 'entre', 'valor': '2018-01-01', 'valor2': '2019-12-31'}],
+        colunas
+    )
+    cursor = ctx['conexao'].cursor()
+    try:
+        myapp.consultar_pagina_keyset(cursor, 'pedidos', ['id'], limite=100, where=where, params=params)
+        myapp.contar_limitado(cursor, 'pedidos', where, params)
+    finally:
+        cursor.close()
+
+
+def exportar_pedidos(ctx, compressao=None, nivel=None):
+    """exportar_tabela: SELECT * da tabela inteira em streaming para um ficheiro temporário CSV"""
+    descritor, caminho = tempfile.mkstemp(prefix="bench_export_", suffix=".csv")
+    os.close(descritor)
+    try:
+        myapp.exportar_consulta(ctx['conexao'], "SELECT * FROM `pedidos`", [], 'CSV', caminho,
+                                opcoes={'compressao': compressao, 'nivel': nivel}, config=ctx['config'])
+    finally:
+        os.remove(caminho)
+
+
+def caso_exportar_csv(ctx):
+    """exportar_tabela: CSV sem compressão"""
+    exportar_pedidos(ctx)
+
+
+def caso_exportar_csv_gzip(ctx):
+    """exportar_tabela: CSV comprimido em gzip (nível por omissão) à medida que é escrito"""
+    exportar_pedidos(ctx, 'gzip', 6)
+
+
+def caso_exportar_csv_paralelo(ctx):
+    """exportar_tabela: CSV ordenado lido por intervalos da chave em conexões paralelas"""
+    descritor, caminho = tempfile.mkstemp(prefix="bench_export_", suffix=".csv")
+    os.close(descritor)
+    try:
+        paralelo = myapp.EXPORTACAO_CONFIG['max_paralelo']
+        intervalos = myapp.intervalos_chave(ctx['conexao'], 'pedidos', 'id',
+                                            paralelo * myapp.EXPORTACAO_CONFIG['partes_por_worker'])
+        myapp.exportar_paralelo(ctx['config'], ctx['banco'], 'pedidos', 'CSV', caminho, intervalos, 'id', ['id'],
+                                max_paralelo=paralelo)
+    finally:
+        os.remove(caminho)
+
+
+def caso_excluir_registro(ctx):
+    """excluir_registro: verificação de dependências de um cliente + DELETE de um pedido (desfeito)"""
+    conexao = ctx['conexao']
+    myapp.verificar_dependencias_registro(conexao, ctx['banco'], 'clientes', {'id': 1})
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("DELETE FROM `pedidos` WHERE `id` = %s", (ctx['tamanho'] // 2,))
+    finally:
+        cursor.close()
+        conexao.rollback()
+
+
+def preparar_exclusao_massa(ctx):
+    """Copia um intervalo de pedidos para uma tabela descartável (sem FKs) antes de cada repetição"""
+    cursor = ctx['conexao'].cursor()
+    try:
+        cursor.execute("DROP TABLE IF EXISTS `pedidos_exclusao`")
+        cursor.execute("CREATE TABLE `pedidos_exclusao` LIKE `pedidos`")
+        cursor.execute(f"INSERT INTO `pedidos_exclusao` SELECT * FROM `pedidos` ORDER BY `id` "
+                       f"LIMIT {min(LINHAS_EXCLUSAO_MASSA, ctx['tamanho'])}")
+        ctx['conexao'].commit()
+    finally:
+        cursor.close()
+
+
+def caso_excluir_em_massa(ctx):
+    """excluir_em_massa: lotes de DELETE por intervalo de chave até esvaziar o filtro"""
+    ultima, terminou = None, False
+    while not terminou:
+        _, ultima, terminou = myapp.excluir_lote(ctx['conexao'], 'pedidos_exclusao', ['id'], "`estado` <> %s",
+                                                 ('cancelado',), ultima, myapp.EXCLUSAO_MASSA_CONFIG['tamanho_lote'])
+
+
+def caso_editor_consultas(ctx):
+    """Editor de queries (querys/Query_editor.py): agregação + SELECT com LIMIT, DataFrame e CSV"""
+    cursor = ctx['conexao'].cursor()
+    try:
+        for query in ("SELECT `estado`, COUNT(*), SUM(`valor`) FROM `pedidos` GROUP BY `estado`",
+                      "SELECT * FROM `pedidos` WHERE `cliente_id` = 1",
+                      "SELECT * FROM `pedidos` LIMIT 1000"):
+            cursor.execute(query)
+            resultados = cursor.fetchall()
+            df = pd.DataFrame(resultados, columns=[desc[0] for desc in cursor.description])
+            df.to_csv(index=False).encode('utf-8')
+    finally:
+        cursor.close()
+
+
+# nome -> (função, preparação, tamanho máximo em que o caso corre)
+CASOS = {
+    'visao_geral': (caso_visao_geral, None, None),
+    'relacionamentos': (caso_relacionamentos, None, None),
+    'visualizar_primeira_pagina': (caso_visualizar_primeira_pagina, None, None),
+    'visualizar_pagina_profunda': (caso_visualizar_pagina_profunda, None, None),
+    'visualizar_filtrado': (caso_visualizar_filtrado, None, None),
+    'exportar_csv': (caso_exportar_csv, None, None),
+    'exportar_csv_gzip': (caso_exportar_csv_gzip, None, None),
+    'exportar_csv_paralelo': (caso_exportar_csv_paralelo, None, None),
+    'excluir_registro': (caso_excluir_registro, None, None),
+    'excluir_em_massa': (caso_excluir_em_massa, preparar_exclusao_massa, None),
+    'editor_consultas': (caso_editor_consultas, None, None),
+}
+
+# ==================== MEDIÇÃO ====================
+
+def contar_questoes(cursor):
+    """Total de instruções recebidas pelo servidor (Questions global)"""
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    return int(cursor.fetchone()[1])
+
+
+def medir_caso(ctx, funcao, preparar=None, repeticoes=3):
+    """Corre o caso `repeticoes` vezes para os tempos e mais uma com tracemalloc para o pico de memória.
+    As consultas são contadas pelo delta de Questions, numa conexão de monitorização à parte
+    (o próprio SHOW STATUS conta uma instrução, descontada)."""
+    monitor = mysql.connector.connect(**ctx['config'])
+    cursor_monitor = monitor.cursor()
+    tempos = []
+    consultas = []
+    try:
+        for _ in range(repeticoes):
+            if preparar:
+                preparar(ctx)
+            antes = contar_questoes(cursor_monitor)
+            inicio = perf_counter()
+            funcao(ctx)
+            tempos.append(perf_counter() - inicio)
+            consultas.append(contar_questoes(cursor_monitor) - antes - 1)
+
+        if preparar:
+            preparar(ctx)
+        tracemalloc.start()
+        try:
+            funcao(ctx)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        cursor_monitor.close()
+        monitor.close()
+
+    return {
+        'segundos': round(statistics.median(tempos), 6),
+        'min_segundos': round(min(tempos), 6),
+        'execucoes': [round(t, 6) for t in tempos],
+        # Mínimo: o servidor é partilhado, outras sessões só podem somar instruções
+        'consultas': min(consultas),
+        'pico_memoria_mb': round(pico / (1024 * 1024), 3)
+    }
+
+
+def commit_atual():
+    """Commit do repositório onde o benchmark corre (None fora de um repositório git)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar_benchmark(config, tamanhos, casos, repeticoes, semente, recriar=False):
+    """Semeia cada tamanho e mede os casos pedidos. Retorna o relatório (dict serializável em JSON)."""
+    configurar_app(config)
+    conexao = mysql.connector.connect(**config)
+    cursor = conexao.cursor()
+    cursor.execute("SELECT VERSION()")
+    versao = cursor.fetchone()[0]
+    cursor.close()
+    conexao.close()
+
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'mysql': versao,
+        'repeticoes': repeticoes,
+        'semente': semente,
+        'resultados': {}
+    }
+
+    for tamanho in tamanhos:
+        print(f"Dataset {tamanho:,} linhas", file=sys.stderr)
+        nome_banco = preparar_banco(config, tamanho, semente, recriar)
+        conexao = myapp.obter_conexao_pool(config, nome_banco)
+        ctx = {'config': config, 'banco': nome_banco, 'tamanho': tamanho, 'conexao': conexao}
+        resultados = relatorio['resultados'].setdefault(str(tamanho), {})
+        try:
+            for nome in casos:
+                funcao, preparar, tamanho_maximo = CASOS[nome]
+                if tamanho_maximo and tamanho > tamanho_maximo:
+                    continue
+                resultados[nome] = medir_caso(ctx, funcao, preparar, repeticoes)
+                print(f"  {nome}: {resultados[nome]['segundos'] * 1000:,.1f} ms, "
+                      f"{resultados[nome]['consultas']} consultas, {resultados[nome]['pico_memoria_mb']} MB",
+                      file=sys.stderr)
+        finally:
+            conexao.rollback()
+            cursor = conexao.cursor()
+            cursor.execute("DROP TABLE IF EXISTS `pedidos_exclusao`")
+            cursor.close()
+            conexao.close()
+
+    return relatorio
+
+# ==================== COMPARAÇÃO ENTRE RELATÓRIOS ====================
+
+def comparar_relatorios(base, novo, limiar=0.2):
+    """Compara dois relatórios caso a caso. É regressão ficar mais de `limiar` (fração) mais lento
+    (e pelo menos TOLERANCIA_ABSOLUTA), enviar mais consultas ou usar mais de `limiar` de memória.
+    Retorna (linhas da tabela, regressões)."""
+    linhas = []
+    regressoes = []
+    for tamanho, casos in novo['resultados'].items():
+        for nome, atual in casos.items():
+            anterior = base.get('resultados', {}).get(tamanho, {}).get(nome)
+            if anterior is None:
+                continue
+            razao = atual['segundos'] / anterior['segundos'] if anterior['segundos'] else 1.0
+            problemas = []
+            if razao > 1 + limiar and atual['segundos'] - anterior['segundos'] > TOLERANCIA_ABSOLUTA:
+                problemas.append(f"tempo x{razao:.2f}")
+            if atual['consultas'] > anterior['consultas']:
+                problemas.append(f"consultas {anterior['consultas']} -> {atual['consultas']}")
+            if atual['pico_memoria_mb'] > anterior['pico_memoria_mb'] * (1 + limiar) + 1:
+                problemas.append(f"memória {anterior['pico_memoria_mb']} -> {atual['pico_memoria_mb']} MB")
+
+            linhas.append((tamanho, nome, anterior['segundos'], atual['segundos'], razao,
+                           anterior['consultas'], atual['consultas'], ", ".join(problemas)))
+            if problemas:
+                regressoes.append((tamanho, nome, problemas))
+    return linhas, regressoes
+
+
+def imprimir_comparacao(linhas, base, novo):
+    """Tabela de texto com base vs. atual por caso"""
+    print(f"\nBase: {base.get('commit')} ({base.get('gerado_em')})  ->  Atual: {novo.get('commit')} ({novo.get('gerado_em')})")
+    print(f"{'tamanho':>10}  {'caso':<28}{'base ms':>11}{'atual ms':>11}{'razão':>8}{'consultas':>12}  regressão")
+    for tamanho, nome, antes, depois, razao, consultas_antes, consultas_depois, problemas in linhas:
+        print(f"{int(tamanho):>10,}  {nome:<28}{antes * 1000:>11.1f}{depois * 1000:>11.1f}{razao:>8.2f}"
+              f"{f'{consultas_antes}->{consultas_depois}':>12}  {problemas}")
+
+# ==================== EXECUÇÃO ====================
+
+def main():
+    """Linha de comando do benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos de dados do MySQL Manager")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=3306)
+    parser.add_argument("--usuario", default="root")
+    parser.add_argument("--senha", default=os.environ.get("MYSQL_PWD", ""))
+    parser.add_argument("--mysqld", help="Executável do mysqld: arranca um servidor descartável em --porta")
+    parser.add_argument("--tamanhos", default="10000", help="Linhas de `pedidos` por dataset, ex.: 10000,1000000,10000000")
+    parser.add_argument("--casos", default=",".join(CASOS), help="Casos a medir (separados por vírgula)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--recriar", action="store_true", help="Apaga e volta a semear os bancos de teste")
+    parser.add_argument("--saida", help="Ficheiro JSON do relatório (por omissão, stdout)")
+    parser.add_argument("--comparar", help="Relatório JSON base; sai com código 1 se houver regressões")
+    parser.add_argument("--limiar", type=float, default=0.2, help="Fração de abrandamento tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    casos = [c.strip() for c in args.casos.split(",") if c.strip()]
+    desconhecidos = [c for c in casos if c not in CASOS]
+    if desconhecidos:
+        parser.error(f"casos desconhecidos: {', '.join(desconhecidos)}")
+    tamanhos = [int(t) for t in args.tamanhos.split(",") if t.strip()]
+
+    servidor = None
+    if args.mysqld:
+        servidor = iniciar_mysqld(args.mysqld, args.porta)
+        args.host, args.usuario, args.senha = "127.0.0.1", "root", ""
+
+    config = {'host': args.host, 'port': args.porta, 'user': args.usuario, 'password': args.senha, 'autocommit': False}
+    try:
+        relatorio = executar_benchmark(config, tamanhos, casos, args.repeticoes, args.semente, args.recriar)
+    finally:
+        if servidor:
+            parar_mysqld(*servidor)
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        linhas, regressoes = comparar_relatorios(base, relatorio, args.limiar)
+        imprimir_comparacao(linhas, base, relatorio)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressão(ões) de desempenho", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
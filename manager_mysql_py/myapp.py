@@ -8,10 +8,43 @@ Interface web profissional com Streamlit
 import streamlit as st
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError, InterfaceError
 import pandas as pd
-from datetime import datetime, date, time 
+import numpy as np
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from time import perf_counter, sleep
 import warnings
 import io
+import csv
+import json
+import gzip
+import os
+import re
+import tempfile
+import shutil
+import zipfile
+import queue
+import hashlib
+import threading
+import sys
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_EXCEPTION
+
+# Opcional: exportação colunar (Parquet / Arrow IPC)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Opcional: compressão zstd das exportações
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
 
 
 warnings.filterwarnings('ignore')
@@ -24,6 +57,84 @@ DEFAULT_CONFIG = {
     'autocommit': False
 }
 
+# Pool de conexões partilhado por todas as sessões do Streamlit
+POOL_CONFIG = {
+    'tamanho': 8,              # conexões por (servidor, banco) - máximo do conector é 32
+    'timeout_espera': 15,      # segundos à espera de uma conexão livre
+    'intervalo_espera': 0.05   # pausa entre tentativas quando o pool está esgotado
+}
+
+# Intervalo mínimo (segundos) entre verificações do fingerprint do esquema
+CATALOGO_VERIFICACAO_SEGUNDOS = 10
+
+# Contagem máxima de registros dependentes apresentada por FK antes de excluir
+DEPENDENCIAS_LIMITE = 100
+
+# Exclusão em massa: lotes pequenos, cada um com o seu COMMIT
+EXCLUSAO_MASSA_CONFIG = {
+    'tamanho_lote': 1000,     # linhas por DELETE
+    'pausa_segundos': 0.2,    # pausa entre lotes (deixa respirar a replicação e o purge do undo log)
+    'limite_contagem': 1000000  # teto da contagem prévia usada na barra de progresso
+}
+
+# Importação de ficheiros CSV/Excel em blocos
+IMPORTACAO_CONFIG = {
+    'tamanho_bloco': 10000,    # linhas lidas do ficheiro de cada vez
+    'tamanho_lote': 1000,      # linhas por INSERT multi-linha
+    'lotes_por_commit': 10,    # lotes gravados entre cada COMMIT
+    'tamanho_in_fk': 1000,     # chaves por consulta IN (...) na validação de FKs
+    'max_chaves_fk': 1000000,  # chaves válidas memorizadas por FK durante uma importação
+    'diretorio_servidor': None # pasta do servidor de onde se pode importar por caminho (None desativa)
+}
+
+# Geração de dados sintéticos para testes de carga
+GERADOR_CONFIG = {
+    'tamanho_bloco': 50000,     # linhas geradas de uma vez por um worker (e confirmadas num COMMIT)
+    'tamanho_lote': 1000,       # linhas por INSERT multi-linha
+    'max_paralelo': 4,          # workers a inserir em simultâneo (limitado ao tamanho do pool)
+    'amostra_pais': 100000,     # chaves lidas de cada tabela pai para sortear os valores das FKs
+    'proporcao_nulos': 0.05     # fração de NULL nas colunas que o permitem
+}
+
+# Exportação em streaming (cursor sem buffer -> ficheiro temporário)
+EXPORTACAO_CONFIG = {
+    'tamanho_bloco': 10000,                    # linhas por fetchmany, escritas de cada vez
+    'net_write_timeout': 600,                  # segundos que o servidor espera enquanto o ficheiro é escrito
+    'max_download_bytes': 200 * 1024 * 1024,   # acima disto o ficheiro fica no servidor (sem download_button)
+    'validade_segundos': 3600,                 # idade máxima de um ficheiro reutilizado
+    'max_trabalhos': 20,                       # ficheiros exportados guardados (os menos usados são apagados)
+    'linhas_grupo_parquet': 100000,            # linhas por row group do Parquet
+    'max_paralelo': 4,                         # conexões a ler intervalos da chave em simultâneo
+    'partes_por_worker': 4,                    # intervalos por conexão (equilibra intervalos desiguais)
+    'amostra_limites': 10000,                  # chaves sorteadas para calcular limites por amostra
+    'blocos_em_espera': 4,                     # blocos lidos à frente do escritor, por intervalo
+    'espera_bloqueio': 10                      # segundos à espera do LOCK TABLES READ que alinha os snapshots
+}
+
+# Pré-visualização de exclusão em cascata
+CASCATA_CONFIG = {
+    'limite_linhas': 10000,   # total de linhas afetadas antes de interromper a análise
+    'max_niveis': 10,         # profundidade máxima percorrida no grafo de FKs
+    'tamanho_in': 1000        # chaves por lista IN (...) em cada consulta
+}
+
+# Contagens exatas (COUNT(*)) calculadas em segundo plano
+CONTAGEM_CONFIG = {
+    'timeout_ms': 30000,         # MAX_EXECUTION_TIME de cada COUNT(*)
+    'validade_segundos': 600,    # idade a partir da qual a contagem é mostrada como antiga
+    'max_paralelo': 4,           # contagens simultâneas por banco (limitado ao tamanho do pool)
+    'intervalo_atualizacao': 1   # segundos entre atualizações da visão geral enquanto há contagens a correr
+}
+
+# Cache partilhado das listas/pesquisas de valores de FK
+CACHE_LOOKUP_CONFIG = {
+    'max_bytes': 32 * 1024 * 1024,   # orçamento de memória; as entradas menos usadas saem primeiro
+    'ttl_segundos': 300              # validade máxima (escritas feitas fora da app)
+}
+
+# Linhas por página na navegação por chave (keyset) e na grade editável
+PAGINACAO_TAMANHOS = [50, 100, 250, 500, 1000]
+
 # ==================== FUNÇÃO QUE DEFINE OS ESTILOS CSS ====================
 def aplicar_estilos():
     st.markdown("""
@@ -115,104 +226,666 @@ def aplicar_estilos():
 
 # ==================== FUNÇÕES DE CONEXÃO ====================
 
+@st.cache_resource
+def obter_registro_pools():
+    """Registro global dos pools de conexão (um por servidor + banco), partilhado entre sessões"""
+    return {'pools': {}, 'stats': {}, 'lock': threading.Lock()}
+
+
+def chave_servidor(config):
+    """Identifica servidor e credenciais de uma configuração sem guardar a senha em claro"""
+    senha = hashlib.sha256(str(config.get('password', '')).encode('utf-8')).hexdigest()[:12]
+    return f"{config.get('user', '')}@{config.get('host', '')}:{config.get('port', 3306)}#{senha}"
+
+
+def obter_pool(config, database=None):
+    """Devolve (chave, pool) para o servidor/banco, criando o pool na primeira utilização"""
+    registro = obter_registro_pools()
+    chave = (chave_servidor(config), database or '')
+    
+    with registro['lock']:
+        pool = registro['pools'].get(chave)
+        if pool is None:
+            config_pool = {k: v for k, v in config.items() if k != 'database'}
+            if database:
+                config_pool['database'] = database
+            
+            # O nome do pool só aceita caracteres simples - usar um hash da chave
+            nome_pool = "mgr_" + hashlib.md5(repr(chave).encode('utf-8')).hexdigest()[:24]
+            pool = pooling.MySQLConnectionPool(
+                pool_name=nome_pool,
+                pool_size=max(1, min(POOL_CONFIG['tamanho'], 32)),
+                pool_reset_session=True,
+                **config_pool
+            )
+            registro['pools'][chave] = pool
+            registro['stats'][chave] = {
+                'criado_em': datetime.now(),
+                'tamanho': pool.pool_size,
+                'checkouts': 0,
+                'esperas': 0,
+                'tempo_espera_total': 0.0,
+                'maior_espera': 0.0,
+                'timeouts': 0,
+                'falhas_saude': 0
+            }
+    
+    return chave, pool
+
+
+def obter_conexao_pool(config, database=None):
+    """Retira uma conexão saudável do pool, esperando (com limite) se estiver esgotado"""
+    registro = obter_registro_pools()
+    chave, pool = obter_pool(config, database)
+    stats = registro['stats'][chave]
+    
+    inicio = perf_counter()
+    esperou = False
+    falhas = 0
+    
+    while True:
+        try:
+            # O conector valida a conexão no checkout (is_connected + reconnect)
+            conexao = pool.get_connection()
+            break
+        except PoolError:
+            if perf_counter() - inicio > POOL_CONFIG['timeout_espera']:
+                with registro['lock']:
+                    stats['timeouts'] += 1
+                raise
+            esperou = True
+            sleep(POOL_CONFIG['intervalo_espera'])
+        except InterfaceError:
+            # Conexão morta que não conseguiu reconectar - tenta a próxima uma vez
+            with registro['lock']:
+                stats['falhas_saude'] += 1
+            falhas += 1
+            if falhas > 1:
+                raise
+    
+    espera = perf_counter() - inicio
+    with registro['lock']:
+        stats['checkouts'] += 1
+        if esperou:
+            stats['esperas'] += 1
+            stats['tempo_espera_total'] += espera
+            stats['maior_espera'] = max(stats['maior_espera'], espera)
+    
+    return conexao
+
+
+def estatisticas_pools():
+    """Lista as estatísticas de todos os pools ativos no processo"""
+    registro = obter_registro_pools()
+    with registro['lock']:
+        return [
+            {'servidor': chave[0].split('#')[0], 'banco': chave[1] or '(nenhum)', **stats}
+            for chave, stats in registro['stats'].items()
+        ]
+
+
+def remover_pools_banco(nome_banco):
+    """Descarta os pools de um banco (ex.: depois de DROP DATABASE)"""
+    registro = obter_registro_pools()
+    with registro['lock']:
+        for chave in [c for c in registro['pools'] if c[1] == nome_banco]:
+            del registro['pools'][chave]
+            del registro['stats'][chave]
+
+
 def conectar_mysql(database=None):
-    """Conecta ao MySQL com ou sem banco específico"""
-    config = st.session_state.get('db_config', DEFAULT_CONFIG).copy()
-    if database:
-        config['database'] = database
+    """Obtém uma conexão do pool, com ou sem banco específico (close() devolve-a ao pool)"""
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
     
     try:
-        conexao = mysql.connector.connect(**config)
-        return conexao
+        return obter_conexao_pool(config, database)
     except Error as e:
         st.error(f"❌ Erro de conexão: {e}")
         return None
-# ==================== FUNÇÃO PARA  CONEXÃO COM BANCO NO MYSQL  ====================
+# ==================== CATÁLOGO DO ESQUEMA (INFORMATION_SCHEMA EM BLOCO) ====================
 
-def obter_tabelas_banco(nome_banco):
-    """Obtém lista de tabelas do banco"""
-    conexao = conectar_mysql(nome_banco)
-    if not conexao:
-        return []
-    
+@st.cache_resource
+def obter_registro_catalogos():
+    """Registro global dos catálogos de esquema carregados, partilhado entre sessões"""
+    return {'catalogos': {}, 'lock': threading.Lock()}
+
+
+def texto_is(valor):
+    """Normaliza valores do INFORMATION_SCHEMA (algumas versões do conector devolvem bytes)"""
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode('utf-8')
+    return valor
+
+
+def carregar_catalogo(conexao, nome_banco, apenas_tabelas=None):
+    """Carrega TABLES, COLUMNS, STATISTICS e as FOREIGN KEYS do banco em 4 consultas
+    (do banco inteiro, ou só das tabelas indicadas em apenas_tabelas)"""
     cursor = conexao.cursor()
-    cursor.execute("SHOW TABLES")
-    tabelas = [t[0] for t in cursor.fetchall()]
-    cursor.close()
-    conexao.close()
+    tabelas = {}
+    
+    # Filtro opcional por tabela, aplicado às 4 consultas
+    filtro = ""
+    params = (nome_banco,)
+    if apenas_tabelas:
+        filtro = f" AND TABLE_NAME IN ({', '.join(['%s'] * len(apenas_tabelas))})"
+        params = (nome_banco, *apenas_tabelas)
+    
+    try:
+        # 1. Tabelas (inclui views, como o SHOW TABLES)
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_ROWS, DATA_LENGTH,
+                   INDEX_LENGTH, AUTO_INCREMENT, CREATE_TIME, UPDATE_TIME
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s""" + filtro + """
+            ORDER BY TABLE_NAME
+        """, params)
+        for row in cursor.fetchall():
+            tabelas[texto_is(row[0])] = {
+                'tipo': texto_is(row[1]),
+                'engine': texto_is(row[2]),
+                'linhas_estimadas': row[3] or 0,
+                'tamanho_dados': row[4] or 0,
+                'tamanho_indices': row[5] or 0,
+                'auto_increment': row[6],
+                'criado_em': row[7],
+                'atualizado_em': row[8],
+                'colunas': [],   # tuplas no formato do DESCRIBE
+                'pk': [],
+                'indices': {},
+                'fks': []        # tuplas no formato de obter_foreign_keys
+            }
+        
+        # 2. Colunas (mesmo formato do DESCRIBE: Campo, Tipo, Nulo, Chave, Default, Extra)
+        cursor.execute("""
+            SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE,
+                   COLUMN_KEY, COLUMN_DEFAULT, EXTRA
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = %s""" + filtro + """
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, params)
+        for row in cursor.fetchall():
+            info = tabelas.get(texto_is(row[0]))
+            if info is not None:
+                info['colunas'].append(tuple(texto_is(v) for v in row[1:]))
+        
+        # 3. Índices (PRIMARY define a chave primária, na ordem do índice)
+        cursor.execute("""
+            SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s""" + filtro + """
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """, params)
+        for row in cursor.fetchall():
+            info = tabelas.get(texto_is(row[0]))
+            if info is None:
+                continue
+            nome_indice = texto_is(row[1])
+            indice = info['indices'].setdefault(nome_indice, {'unico': not int(row[2]), 'colunas': []})
+            indice['colunas'].append(texto_is(row[3]))
+            if nome_indice == 'PRIMARY':
+                info['pk'].append(texto_is(row[3]))
+        
+        # 4. FOREIGN KEYS com as regras ON DELETE / ON UPDATE
+        cursor.execute("""
+            SELECT kcu.TABLE_NAME, kcu.COLUMN_NAME, kcu.REFERENCED_TABLE_NAME,
+                   kcu.REFERENCED_COLUMN_NAME, rc.DELETE_RULE, rc.UPDATE_RULE,
+                   kcu.CONSTRAINT_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+            LEFT JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+                ON kcu.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
+                AND kcu.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA
+            WHERE kcu.TABLE_SCHEMA = %s
+              AND kcu.REFERENCED_TABLE_NAME IS NOT NULL""" + filtro.replace("TABLE_NAME", "kcu.TABLE_NAME") + """
+            ORDER BY kcu.TABLE_NAME, kcu.CONSTRAINT_NAME, kcu.ORDINAL_POSITION
+        """, params)
+        for row in cursor.fetchall():
+            info = tabelas.get(texto_is(row[0]))
+            if info is not None:
+                info['fks'].append(tuple(texto_is(v) for v in row[1:]))
+    
+    finally:
+        cursor.close()
+    
     return tabelas
-# ==================== FUNÇÃO PARA OBTER ESTRUTURA DA(S) TABELA(S) ====================
 
-def obter_estrutura_tabela(nome_banco, nome_tabela):
-    """Obtém estrutura completa de uma tabela"""
-    st.subheader("🏚️ ESTRUTURA DE TABELAS")
 
-    conexao = conectar_mysql(nome_banco)
-    if not conexao:
-        return []
-    
+def calcular_fingerprint_esquema(conexao, nome_banco):
+    """Resumo barato do esquema numa única consulta agregada (detecta DDL feito fora da app).
+    Não usa UPDATE_TIME/TABLE_ROWS: mudam com DML e no MySQL 8 vêm de estatísticas em cache."""
     cursor = conexao.cursor()
-    cursor.execute(f"DESCRIBE `{nome_tabela}`")
-    estrutura = cursor.fetchall()
-    cursor.close()
-    conexao.close()
-    return estrutura
-# ==================== FUNÇÃO PARA OBTER A FK ====================
+    try:
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES
+                 WHERE TABLE_SCHEMA = %s),
+                (SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, TABLE_TYPE))), 0)
+                 FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s),
+                (SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+                 WHERE TABLE_SCHEMA = %s),
+                (SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION,
+                                                     COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY,
+                                                     COLUMN_DEFAULT, EXTRA))), 0)
+                 FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s),
+                (SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, INDEX_NAME, COLUMN_NAME, SEQ_IN_INDEX))), 0)
+                 FROM INFORMATION_SCHEMA.STATISTICS WHERE TABLE_SCHEMA = %s),
+                (SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', TABLE_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME,
+                                                     DELETE_RULE, UPDATE_RULE))), 0)
+                 FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS WHERE CONSTRAINT_SCHEMA = %s)
+        """, (nome_banco,) * 6)
+        return tuple(int(v or 0) for v in cursor.fetchone())
+    finally:
+        cursor.close()
 
-# Primeiro, atualize a função obter_foreign_keys
-def obter_foreign_keys(nome_banco, nome_tabela):
-    """Obtém foreign keys de uma tabela com informações completas"""
+
+def invalidar_catalogo(nome_banco, nome_tabela=None):
+    """Invalida o catálogo depois de DDL feito pela própria app.
+    Com nome_tabela só essa tabela (e as que a referenciam) é recarregada; sem ela, o banco inteiro."""
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    chave = (chave_servidor(config), nome_banco)
+    registro = obter_registro_catalogos()
+    
+    # DDL pode mudar as colunas de rótulo - as listas de FK em cache deixam de servir
+    invalidar_lookups(config, nome_banco, nome_tabela)
+    
+    with registro['lock']:
+        catalogo = registro['catalogos'].get(chave)
+        if catalogo is None:
+            return
+        if nome_tabela is None:
+            del registro['catalogos'][chave]
+        else:
+            catalogo['sujas'].add(nome_tabela)
+
+
+def obter_catalogo(nome_banco):
+    """Devolve o catálogo do banco a partir da memória.
+    Recarrega só o que a app alterou, e tudo apenas se o fingerprint do esquema mudar."""
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    chave = (chave_servidor(config), nome_banco)
+    registro = obter_registro_catalogos()
+    
+    with registro['lock']:
+        catalogo = registro['catalogos'].get(chave)
+        sujas = set(catalogo['sujas']) if catalogo else set()
+    
+    recente = catalogo is not None and perf_counter() - catalogo['verificado_em'] < CATALOGO_VERIFICACAO_SEGUNDOS
+    if catalogo is not None and recente and not sujas:
+        return catalogo
+    
     conexao = conectar_mysql(nome_banco)
     if not conexao:
-        return []
+        return catalogo or {'banco': nome_banco, 'tabelas': {}, 'sujas': set(),
+                            'fingerprint': None, 'verificado_em': perf_counter()}
+    
+    try:
+        if catalogo is not None and sujas:
+            # Recarga dirigida: tabelas alteradas pela app + tabelas com FK para elas
+            recarregar = set(sujas)
+            for tabela, info in catalogo['tabelas'].items():
+                if any(fk[1] in sujas for fk in info['fks']):
+                    recarregar.add(tabela)
+            
+            tabelas = {t: info for t, info in catalogo['tabelas'].items() if t not in recarregar}
+            tabelas.update(carregar_catalogo(conexao, nome_banco, sorted(recarregar)))
+            novo = {
+                'banco': nome_banco,
+                'tabelas': dict(sorted(tabelas.items())),
+                'sujas': set(),
+                'fingerprint': calcular_fingerprint_esquema(conexao, nome_banco),
+                'verificado_em': perf_counter()
+            }
+        else:
+            fingerprint = calcular_fingerprint_esquema(conexao, nome_banco)
+            
+            if catalogo is not None and fingerprint == catalogo['fingerprint']:
+                # Esquema igual: só renova o instante da verificação
+                with registro['lock']:
+                    catalogo['verificado_em'] = perf_counter()
+                return catalogo
+            
+            novo = {
+                'banco': nome_banco,
+                'tabelas': carregar_catalogo(conexao, nome_banco),
+                'sujas': set(),
+                'fingerprint': fingerprint,
+                'verificado_em': perf_counter()
+            }
+    finally:
+        conexao.close()
+    
+    with registro['lock']:
+        # Não perder invalidações que chegaram durante a recarga
+        atual = registro['catalogos'].get(chave)
+        if atual is not None and atual is not catalogo:
+            novo['sujas'] |= atual['sujas']
+        novo['sujas'] |= (catalogo['sujas'] - sujas) if catalogo else set()
+        registro['catalogos'][chave] = novo
+    return novo
+
+
+def obter_info_tabela(nome_banco, nome_tabela):
+    """Metadados de uma tabela do catálogo (None se a tabela não existir)"""
+    return obter_catalogo(nome_banco)['tabelas'].get(nome_tabela)
+
+
+def coluna_gerada(coluna):
+    """True para colunas geradas (VIRTUAL/STORED GENERATED), que recusam valores no INSERT.
+    DEFAULT_GENERATED (ex.: DEFAULT CURRENT_TIMESTAMP) é uma coluna normal com default por expressão."""
+    return re.search(r'\b(VIRTUAL|STORED) GENERATED\b', str(coluna[5] or '').upper()) is not None
+
+# ==================== ÍNDICE DO GRAFO DE FOREIGN KEYS ====================
+
+def construir_grafo_fks(tabelas):
+    """Índice bidirecional das FKs (pai -> filhos e filho -> pais), uma aresta por constraint"""
+    filhos = {}
+    pais = {}
+    
+    for tabela, info in tabelas.items():
+        arestas = {}
+        for coluna, tabela_ref, coluna_ref, on_delete, on_update, constraint in info['fks']:
+            aresta = arestas.setdefault(constraint, {
+                'constraint': constraint,
+                'filho': tabela,
+                'pai': tabela_ref,
+                'colunas': [],       # colunas na tabela filha
+                'colunas_ref': [],   # colunas referenciadas na tabela pai
+                'on_delete': on_delete or 'RESTRICT',
+                'on_update': on_update or 'RESTRICT'
+            })
+            aresta['colunas'].append(coluna)
+            aresta['colunas_ref'].append(coluna_ref)
+        
+        for aresta in arestas.values():
+            filhos.setdefault(aresta['pai'], []).append(aresta)
+            pais.setdefault(tabela, []).append(aresta)
+    
+    return {'filhos': filhos, 'pais': pais}
+
+
+def obter_grafo_fks(nome_banco):
+    """Grafo de FKs do banco, construído uma vez por versão do catálogo"""
+    catalogo = obter_catalogo(nome_banco)
+    grafo = catalogo.get('grafo')
+    if grafo is None:
+        # O catálogo é substituído (não alterado) quando recarrega, então o grafo acompanha-o
+        grafo = construir_grafo_fks(catalogo['tabelas'])
+        catalogo['grafo'] = grafo
+    return grafo
+
+
+def tabelas_que_referenciam(nome_banco, nome_tabela):
+    """Arestas das tabelas filhas que apontam para nome_tabela - O(grau)"""
+    return obter_grafo_fks(nome_banco)['filhos'].get(nome_tabela, [])
+
+
+def tabelas_referenciadas(nome_banco, nome_tabela):
+    """Arestas para as tabelas pai referenciadas por nome_tabela - O(grau)"""
+    return obter_grafo_fks(nome_banco)['pais'].get(nome_tabela, [])
+
+
+def inferir_join(nome_banco, tabela_a, tabela_b):
+    """Condições de JOIN entre duas tabelas a partir das FKs diretas (em qualquer sentido)"""
+    condicoes = []
+    for aresta in tabelas_referenciadas(nome_banco, tabela_a) + tabelas_referenciadas(nome_banco, tabela_b):
+        if {aresta['filho'], aresta['pai']} != {tabela_a, tabela_b}:
+            continue
+        pares = zip(aresta['colunas'], aresta['colunas_ref'])
+        condicoes.append(" AND ".join(
+            f"`{aresta['filho']}`.`{c}` = `{aresta['pai']}`.`{r}`" for c, r in pares
+        ))
+    return condicoes
+
+
+def verificar_dependencias_registro(conexao, nome_banco, nome_tabela, registro_dict, limite=DEPENDENCIAS_LIMITE):
+    """Verifica numa única consulta (UNION ALL de sondas com LIMIT) os registros que dependem deste.
+    Retorna (bloqueado, dependencias); a quantidade de cada FK é limitada a `limite`."""
+    partes = []
+    params = []
+    arestas = []
+    
+    for aresta in tabelas_que_referenciam(nome_banco, nome_tabela):
+        valores = [registro_dict.get(coluna) for coluna in aresta['colunas_ref']]
+        if any(valor is None for valor in valores):
+            continue  # Valor NULL nunca é referenciado
+        
+        i = len(arestas)
+        where = " AND ".join(f"`{coluna}` = %s" for coluna in aresta['colunas'])
+        partes.append(
+            f"SELECT {i} AS aresta, COUNT(*) AS qtd "
+            f"FROM (SELECT 1 FROM `{aresta['filho']}` WHERE {where} LIMIT {limite + 1}) AS dep_{i}"
+        )
+        params.extend(valores)
+        arestas.append(aresta)
+    
+    if not partes:
+        return False, []
     
     cursor = conexao.cursor()
+    try:
+        cursor.execute(" UNION ALL ".join(partes), params)
+        resultados = cursor.fetchall()
+    finally:
+        cursor.close()
     
-    # Consulta mais completa para obter foreign keys
-    query = """
-    SELECT 
-        kcu.COLUMN_NAME,
-        kcu.REFERENCED_TABLE_NAME,
-        kcu.REFERENCED_COLUMN_NAME,
-        rc.DELETE_RULE,
-        rc.UPDATE_RULE,
-        kcu.CONSTRAINT_NAME
-    FROM 
-        INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
-    LEFT JOIN 
-        INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
-        ON kcu.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
-        AND kcu.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA
-    WHERE 
-        kcu.TABLE_SCHEMA = %s
-        AND kcu.TABLE_NAME = %s
-        AND kcu.REFERENCED_TABLE_NAME IS NOT NULL
-    ORDER BY kcu.CONSTRAINT_NAME
-    """
-    
-    cursor.execute(query, (nome_banco, nome_tabela))
-    fks = cursor.fetchall()
-    cursor.close()
-    conexao.close()
+    dependencias = []
+    for i, qtd in resultados:
+        if not qtd:
+            continue
+        aresta = arestas[int(i)]
+        dependencias.append({
+            'tabela': aresta['filho'],
+            'coluna': ', '.join(aresta['colunas']),
+            'quantidade': min(qtd, limite),
+            'mais_que_limite': qtd > limite,
+            'on_delete': aresta['on_delete'],
+            # CASCADE e SET NULL não impedem a exclusão; RESTRICT / NO ACTION sim
+            'bloqueia': aresta['on_delete'] in ('RESTRICT', 'NO ACTION')
+        })
+    
+    return any(dep['bloqueia'] for dep in dependencias), dependencias
+
+
+def nivel_seguinte_tem_linhas(cursor, nome_banco, fronteira, tamanho_in):
+    """Se alguma linha referencia (CASCADE / SET NULL) os registros da fronteira: uma consulta
+    LIMIT 1 por lote, só para saber se a análise parou antes do fim da cascata"""
+    for tabela_pai, registros in fronteira.items():
+        for aresta in tabelas_que_referenciam(nome_banco, tabela_pai):
+            if aresta['on_delete'] not in ('CASCADE', 'SET NULL'):
+                continue
+            chaves_pai = list({
+                tuple(reg.get(c) for c in aresta['colunas_ref'])
+                for reg in registros
+                if all(reg.get(c) is not None for c in aresta['colunas_ref'])
+            })
+            lista_cols = ", ".join(f"`{c}`" for c in aresta['colunas'])
+            for i in range(0, len(chaves_pai), tamanho_in):
+                lote = chaves_pai[i:i + tamanho_in]
+                marcadores = ", ".join(["(" + ", ".join(["%s"] * len(aresta['colunas'])) + ")"] * len(lote))
+                cursor.execute(
+                    f"SELECT 1 FROM `{aresta['filho']}` WHERE ({lista_cols}) IN ({marcadores}) LIMIT 1",
+                    [v for chave in lote for v in chave]
+                )
+                if cursor.fetchall():
+                    return True
+    return False
+
+
+def previsualizar_cascata(conexao, nome_banco, nome_tabela, registro_dict,
+                          limite=None, max_niveis=None):
+    """Calcula, nível a nível, quantas linhas um DELETE apagaria (CASCADE) ou poria a NULL (SET NULL).
+    Cada nível usa consultas em bloco com listas IN (...) e o total é limitado a `limite`."""
+    limite = limite or CASCATA_CONFIG['limite_linhas']
+    max_niveis = max_niveis or CASCATA_CONFIG['max_niveis']
+    tamanho_in = CASCATA_CONFIG['tamanho_in']
+    
+    impacto = {}        # tabela -> {'excluidas', 'anuladas', 'nivel'}
+    visitadas = {}      # tabela -> conjunto de chaves já contabilizadas (evita ciclos)
+    total = 0
+    truncado = False
+    
+    # Fronteira: {tabela: [registros (dict) excluídos no nível anterior]}
+    fronteira = {nome_tabela: [registro_dict]}
+    cursor = conexao.cursor()
     
-    return fks  # Retorna: (coluna, tabela_ref, coluna_ref, on_delete, on_update, constraint_name)
+    try:
+        for nivel in range(1, max_niveis + 1):
+            proxima = {}
+            
+            for tabela_pai, registros in fronteira.items():
+                for aresta in tabelas_que_referenciam(nome_banco, tabela_pai):
+                    if aresta['on_delete'] not in ('CASCADE', 'SET NULL'):
+                        continue  # RESTRICT / NO ACTION já são tratados pela verificação de dependências
+                    
+                    filho = aresta['filho']
+                    chaves_pai = list({
+                        tuple(reg.get(c) for c in aresta['colunas_ref'])
+                        for reg in registros
+                        if all(reg.get(c) is not None for c in aresta['colunas_ref'])
+                    })
+                    if not chaves_pai:
+                        continue
+                    
+                    # Colunas do filho necessárias para descer mais um nível
+                    colunas_filho = list(dict.fromkeys(
+                        obter_chave_primaria_colunas(nome_banco, filho) + [
+                            c for neta in tabelas_que_referenciam(nome_banco, filho) for c in neta['colunas_ref']
+                        ]
+                    )) or [col[0] for col in obter_estrutura_tabela(nome_banco, filho)]
+                    
+                    lista_cols = ", ".join(f"`{c}`" for c in aresta['colunas'])
+                    for i in range(0, len(chaves_pai), tamanho_in):
+                        lote = chaves_pai[i:i + tamanho_in]
+                        # Com o limite já atingido (restante 0) a consulta serve de sonda: só há truncagem
+                        # se aparecer uma linha ainda não contada
+                        restante = limite - total
+                        vistas = visitadas.setdefault(filho, set())
+                        
+                        # As linhas já vistas também ocupam o LIMIT: reserva-se espaço para elas,
+                        # para que o corte seja feito só sobre as novas
+                        marcadores = ", ".join(["(" + ", ".join(["%s"] * len(aresta['colunas'])) + ")"] * len(lote))
+                        params = [v for chave in lote for v in chave]
+                        cursor.execute(
+                            f"SELECT {', '.join(f'`{c}`' for c in colunas_filho)} FROM `{filho}` "
+                            f"WHERE ({lista_cols}) IN ({marcadores}) LIMIT {restante + 1 + len(vistas)}",
+                            params
+                        )
+                        
+                        # Não contar duas vezes a mesma linha (FKs múltiplas ou ciclos)
+                        novas = {}
+                        for row in cursor.fetchall():
+                            linha = dict(zip(colunas_filho, row))
+                            chave = tuple(linha[c] for c in colunas_filho)
+                            if chave not in vistas:
+                                novas.setdefault(chave, linha)
+                        if len(novas) > restante:
+                            novas = dict(list(novas.items())[:restante])
+                            truncado = True
+                        vistas.update(novas)
+                        novas = list(novas.values())
+                        
+                        info = impacto.setdefault(filho, {'excluidas': 0, 'anuladas': 0, 'nivel': nivel})
+                        if aresta['on_delete'] == 'CASCADE':
+                            info['excluidas'] += len(novas)
+                            proxima.setdefault(filho, []).extend(novas)
+                        else:
+                            info['anuladas'] += len(novas)
+                        total += len(novas)
+                        if truncado:
+                            break
+                    
+                    if truncado:
+                        break
+                if truncado:
+                    break
+            
+            if truncado or not proxima:
+                break
+            fronteira = proxima
+        else:
+            # Limite de níveis atingido: só está truncado se o nível seguinte ainda tiver linhas
+            truncado = truncado or nivel_seguinte_tem_linhas(cursor, nome_banco, fronteira, tamanho_in)
+    
+    finally:
+        cursor.close()
+    
+    return {'tabelas': impacto, 'total': total, 'truncado': truncado}
+
+
+def obter_chave_primaria_colunas(nome_banco, nome_tabela):
+    """Todas as colunas da chave primária (na ordem do índice)"""
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    return list(info['pk']) if info else []
+
+
+def mostrar_previsualizacao_cascata(conexao, nome_banco, nome_tabela, registro_dict, key):
+    """Expander com o impacto da exclusão nas tabelas em cascata"""
+    with st.expander("🌊 Impacto em cascata (ON DELETE CASCADE / SET NULL)"):
+        limite = st.number_input(
+            "Limite de linhas analisadas:", min_value=100, max_value=1000000,
+            value=CASCATA_CONFIG['limite_linhas'], step=1000, key=f"cascata_limite_{key}"
+        )
+        if st.button("🔍 Calcular impacto", key=f"cascata_btn_{key}"):
+            inicio = perf_counter()
+            resultado = previsualizar_cascata(conexao, nome_banco, nome_tabela, registro_dict, limite=int(limite))
+            
+            if not resultado['tabelas']:
+                st.success("✅ Nenhuma linha em outras tabelas é afetada em cascata.")
+                return
+            
+            df = pd.DataFrame([
+                {'Tabela': t, 'Nível': i['nivel'], 'Excluídas': i['excluidas'], 'Postas a NULL': i['anuladas']}
+                for t, i in sorted(resultado['tabelas'].items(), key=lambda x: x[1]['nivel'])
+            ])
+            st.dataframe(df, use_container_width=True)
+            
+            total = f"{resultado['total']:,}" + ("+" if resultado['truncado'] else "")
+            st.write(f"**Total de linhas afetadas:** {total} ({perf_counter() - inicio:.2f}s)")
+            if resultado['truncado']:
+                st.warning("⚠️ Análise interrompida no limite - o impacto real é maior.")
+
+
+def mostrar_dependencias_registro(bloqueado, dependencias):
+    """Mostra o resultado de verificar_dependencias_registro"""
+    for dep in dependencias:
+        qtd = f"{dep['quantidade']}+" if dep['mais_que_limite'] else f"{dep['quantidade']}"
+        icone = "⛔" if dep['bloqueia'] else "⚠️"
+        st.write(f"- {icone} `{dep['tabela']}.{dep['coluna']}`: {qtd} registro(s) - ON DELETE {dep['on_delete']}")
+    
+    if bloqueado:
+        st.error("❌ **Não é possível excluir este registro!**")
+        st.info("💡 **Soluções:**")
+        st.write("1. Exclua primeiro os registros dependentes")
+        st.write("2. Altere os registros dependentes para outra referência")
+        st.write("3. Use ON DELETE CASCADE na criação da FOREIGN KEY")
+    elif dependencias:
+        st.warning("⚠️ Os registros dependentes acima serão excluídos (CASCADE) ou ficarão com NULL (SET NULL).")
+
+# ==================== FUNÇÃO PARA  CONEXÃO COM BANCO NO MYSQL  ====================
+
+def obter_tabelas_banco(nome_banco):
+    """Obtém lista de tabelas do banco"""
+    return list(obter_catalogo(nome_banco)['tabelas'])
+# ==================== FUNÇÃO PARA OBTER ESTRUTURA DA(S) TABELA(S) ====================
+
+def obter_estrutura_tabela(nome_banco, nome_tabela):
+    """Obtém estrutura completa de uma tabela (formato do DESCRIBE)"""
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    return list(info['colunas']) if info else []
+# ==================== FUNÇÃO PARA OBTER A FK ====================
+
+def obter_foreign_keys(nome_banco, nome_tabela):
+    """Obtém foreign keys de uma tabela com informações completas"""
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    # Retorna: (coluna, tabela_ref, coluna_ref, on_delete, on_update, constraint_name)
+    return list(info['fks']) if info else []
 
 # ==================== FUNÇÃO PARA OBTER A CHAVE PRIMARIA ====================
 
 def obter_chave_primaria(nome_banco, nome_tabela):
     """Obtém a chave primária de uma tabela"""
-    conexao = conectar_mysql(nome_banco)
-    if not conexao:
-        return None
-    
-    cursor = conexao.cursor()
-    cursor.execute(f"SHOW KEYS FROM `{nome_tabela}` WHERE Key_name = 'PRIMARY'")
-    pk_info = cursor.fetchone()
-    cursor.close()
-    conexao.close()
-    
-    if pk_info:
-        return pk_info[4]  # Nome da coluna
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    if info and info['pk']:
+        return info['pk'][0]  # Nome da coluna
     return None
 
 # ==================== FUNÇÕES DE CRUD (PARA REGISTOS) COMPLETAS ====================
@@ -231,8 +904,7 @@ def editar_registro(nome_banco, nome_tabela):
     
     try:
         # Obter estrutura da tabela
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         # Obter dados da tabela
         cursor.execute(f"SELECT * FROM `{nome_tabela}` LIMIT 100")
@@ -426,8 +1098,7 @@ def excluir_registro(nome_banco, nome_tabela):
     
     try:
         # Obter estrutura da tabela
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         # Obter dados da tabela
         cursor.execute(f"SELECT * FROM `{nome_tabela}` LIMIT 100")
@@ -487,9 +1158,8 @@ def excluir_registro(nome_banco, nome_tabela):
                 # Verificar se há FOREIGN KEYs que referenciam este registro
                 st.write("🔍 **Verificando dependências...**")
                 
-                # Obter todas as tabelas do banco
-                cursor.execute("SHOW TABLES")
-                todas_tabelas = [t[0] for t in cursor.fetchall()]
+                # Obter todas as tabelas do banco (catálogo em memória)
+                todas_tabelas = obter_tabelas_banco(nome_banco)
                 
                 dependencias = []
                 for tabela in todas_tabelas:
@@ -542,129 +1212,1961 @@ def excluir_registro(nome_banco, nome_tabela):
                             if st.button("❌ Cancelar", use_container_width=True):
                                 st.rerun()
     
-    except Error as e:
-        st.error(f"Erro: {e}")
+    except Error as e:
+        st.error(f"Erro: {e}")
+    
+    finally:
+        cursor.close()
+        conexao.close()
+        
+# ==================== IMPORTAÇÃO DE DADOS (CSV / EXCEL EM BLOCOS) ====================
+
+def ler_blocos_arquivo(fonte, tipo, tamanho_bloco, separador=",", codificacao="utf-8"):
+    """Lê um CSV/XLSX bloco a bloco (nunca o ficheiro inteiro em memória).
+    Produz DataFrames com os valores ainda como texto (CSV) ou como vêm do Excel."""
+    if tipo == "csv":
+        for bloco in pd.read_csv(fonte, sep=separador, encoding=codificacao, dtype=str,
+                                 chunksize=tamanho_bloco, skipinitialspace=True):
+            yield bloco
+        return
+    
+    # XLSX em modo read_only: o openpyxl percorre a folha linha a linha
+    from openpyxl import load_workbook
+    livro = load_workbook(fonte, read_only=True, data_only=True)
+    try:
+        linhas = livro.active.iter_rows(values_only=True)
+        cabecalho = [str(c) if c is not None else f"coluna_{i + 1}" for i, c in enumerate(next(linhas, []))]
+        bloco = []
+        inicio = 0
+        for linha in linhas:
+            bloco.append(linha[:len(cabecalho)])
+            if len(bloco) >= tamanho_bloco:
+                # Índice contínuo entre blocos, como no read_csv (serve para numerar as linhas rejeitadas)
+                yield pd.DataFrame(bloco, columns=cabecalho, index=range(inicio, inicio + len(bloco)))
+                inicio += len(bloco)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho, index=range(inicio, inicio + len(bloco)))
+    finally:
+        livro.close()
+
+
+BITS_INTEIROS = {'tinyint': 8, 'smallint': 16, 'mediumint': 24, 'int': 32, 'integer': 32, 'bigint': 64}
+LIMITES_BYTES = {'tinytext': 255, 'text': 65535, 'mediumtext': 16777215, 'longtext': 4294967295,
+                 'tinyblob': 255, 'blob': 65535, 'mediumblob': 16777215, 'longblob': 4294967295}
+VALORES_VERDADEIROS = {'1', '1.0', 'true', 't', 'sim', 's', 'yes', 'y', 'verdadeiro'}
+VALORES_FALSOS = {'0', '0.0', 'false', 'f', 'não', 'nao', 'n', 'no', 'falso'}
+
+
+def analisar_tipo_mysql(coluna):
+    """Interpreta uma linha do DESCRIBE (Campo, Tipo, Nulo, Chave, Default, Extra) para validação:
+    tipo base, tamanho/escala, UNSIGNED, membros de ENUM/SET e obrigatoriedade"""
+    tipo = str(coluna[1])
+    correspondencia = re.match(r"^\s*(\w+)\s*(?:\((.*)\))?\s*(.*)$", tipo, re.DOTALL)
+    base = correspondencia.group(1).lower()
+    argumentos = correspondencia.group(2) or ''
+    spec = {
+        'base': base,
+        'unsigned': 'unsigned' in correspondencia.group(3).lower(),
+        'nulo': coluna[2] == 'YES',
+        'auto_increment': 'auto_increment' in str(coluna[5]).lower(),
+        'tamanho': None,
+        'escala': 0,
+        'membros': None
+    }
+    if base in ('enum', 'set'):
+        spec['membros'] = [m.replace("''", "'") for m in re.findall(r"'((?:[^']|'')*)'", argumentos)]
+    elif argumentos:
+        numeros = [int(n) for n in re.findall(r"\d+", argumentos)]
+        if numeros:
+            spec['tamanho'] = numeros[0]
+            spec['escala'] = numeros[1] if len(numeros) > 1 else 0
+    return spec
+
+
+def converter_bloco(dados, tipos):
+    """Valida e converte um bloco coluna a coluna com operações vetorizadas do pandas.
+    Retorna (convertidos, motivos): valores prontos para o INSERT (texto canónico ou None) e,
+    por linha, o motivo da rejeição ('' quando a linha é válida)."""
+    motivos = pd.Series('', index=dados.index, dtype=object)
+    convertidos = {}
+    
+    def rejeitar(mascara, coluna, mensagem):
+        nonlocal motivos
+        motivos = motivos.mask(mascara, motivos + f"{coluna}: {mensagem}; ")
+    
+    for coluna in dados.columns:
+        spec = tipos[coluna]
+        base = spec['base']
+        serie = dados[coluna]
+        nulo = serie.isna()
+        presente = ~nulo
+        texto = serie.astype(str).str.strip()
+        valores = serie.astype(object)
+        
+        if (base == 'tinyint' and spec['tamanho'] == 1) or base in ('bool', 'boolean'):
+            minusculo = texto.str.lower()
+            verdadeiro = minusculo.isin(VALORES_VERDADEIROS)
+            rejeitar(presente & ~verdadeiro & ~minusculo.isin(VALORES_FALSOS), coluna, "não é booleano")
+            valores = verdadeiro.map({True: '1', False: '0'})
+        
+        elif base in BITS_INTEIROS:
+            inteiro = texto.str.match(r"^[+-]?\d+(\.0*)?$")
+            rejeitar(presente & ~inteiro, coluna, "não é inteiro")
+            valores = texto.str.replace(r"\.0*$", "", regex=True)
+            # int() exato: em float64 os limites de BIGINT arredondam e seriam rejeitados
+            numero = valores[presente & inteiro].map(int)
+            bits = BITS_INTEIROS[base]
+            minimo, maximo = (0, 2 ** bits - 1) if spec['unsigned'] else (-2 ** (bits - 1), 2 ** (bits - 1) - 1)
+            fora = ((numero < minimo) | (numero > maximo)).reindex(dados.index, fill_value=False)
+            rejeitar(fora.astype(bool), coluna, f"fora do intervalo [{minimo}, {maximo}]")
+        
+        elif base in ('decimal', 'numeric', 'dec', 'fixed'):
+            partes = texto.str.extract(r"^([+-]?)(\d*)(?:\.(\d*))?$")
+            numerico = partes[1].notna() & ((partes[1].str.len() > 0) | (partes[2].str.len() > 0))
+            rejeitar(presente & ~numerico, coluna, "não é decimal")
+            precisao = spec['tamanho'] or 10
+            digitos_inteiros = partes[1].str.lstrip('0').str.len()
+            rejeitar(presente & numerico & (digitos_inteiros > precisao - spec['escala']), coluna,
+                     f"excede DECIMAL({precisao},{spec['escala']})")
+            if spec['unsigned']:
+                rejeitar(presente & numerico & (partes[0] == '-'), coluna, "negativo em coluna UNSIGNED")
+            valores = texto
+        
+        elif base in ('float', 'double', 'real'):
+            numero = pd.to_numeric(texto.where(presente), errors='coerce')
+            rejeitar(presente & numero.isna(), coluna, "não é número")
+            if spec['unsigned']:
+                rejeitar(presente & (numero < 0), coluna, "negativo em coluna UNSIGNED")
+            valores = texto
+        
+        elif base in ('date', 'datetime', 'timestamp'):
+            pandas_2 = int(pd.__version__.split('.')[0]) >= 2
+            # ISO (aaaa-mm-dd) primeiro; só o resto (ex.: dd/mm/aaaa) é lido com o dia primeiro,
+            # senão '2021-04-05' viraria 4 de maio
+            iso = texto.str.match(r"^\d{4}-\d{1,2}-\d{1,2}(?:[ T]|$)")
+            datas = pd.to_datetime(texto.where(presente & iso), errors='coerce',
+                                   **({'format': 'ISO8601'} if pandas_2 else {}))
+            outras = pd.to_datetime(texto.where(presente & ~iso), errors='coerce', dayfirst=True,
+                                    **({'format': 'mixed'} if pandas_2 else {}))
+            datas = datas.where(iso, outras)
+            rejeitar(presente & datas.isna(), coluna, "data inválida")
+            if base == 'timestamp':
+                rejeitar(presente & ((datas < pd.Timestamp('1970-01-01 00:00:01')) |
+                                     (datas > pd.Timestamp('2038-01-19 03:14:07'))),
+                         coluna, "fora do intervalo de TIMESTAMP")
+            valores = datas.dt.strftime('%Y-%m-%d' if base == 'date' else '%Y-%m-%d %H:%M:%S')
+        
+        elif base == 'time':
+            rejeitar(presente & ~texto.str.match(r"^-?\d{1,3}:\d{2}(:\d{2}(\.\d+)?)?$"), coluna, "hora inválida")
+            valores = texto
+        
+        elif base == 'year':
+            ano = pd.to_numeric(texto.where(presente), errors='coerce')
+            rejeitar(presente & ~(((ano >= 1901) & (ano <= 2155)) | (ano == 0)), coluna, "ano inválido")
+            valores = texto.str.replace(r"\.0*$", "", regex=True)
+        
+        elif base in ('char', 'varchar', 'binary', 'varbinary'):
+            if spec['tamanho']:
+                rejeitar(presente & (serie.astype(str).str.len() > spec['tamanho']), coluna,
+                         f"mais de {spec['tamanho']} caracteres")
+        
+        elif base in LIMITES_BYTES:
+            rejeitar(presente & (serie.astype(str).str.encode('utf-8').str.len() > LIMITES_BYTES[base]), coluna,
+                     f"excede o tamanho de {base.upper()}")
+        
+        elif base == 'enum':
+            membros = {m.lower() for m in spec['membros']}
+            rejeitar(presente & ~texto.str.lower().isin(membros), coluna, f"não é um de {spec['membros']}")
+            valores = texto
+        
+        elif base == 'set':
+            membros = {m.lower() for m in spec['membros']}
+            itens = texto.where(presente & (texto != ''), None).str.lower().str.split(',').explode().str.strip()
+            invalidos = itens.notna() & ~itens.isin(membros)
+            rejeitar(invalidos.groupby(level=0).any().reindex(dados.index, fill_value=False), coluna,
+                     f"contém valores fora de {spec['membros']}")
+            valores = texto
+        
+        if not spec['nulo'] and not spec['auto_increment']:
+            rejeitar(nulo, coluna, "valor obrigatório (NOT NULL)")
+        
+        convertidos[coluna] = valores.where(presente, None)
+    
+    return pd.DataFrame(convertidos, index=dados.index), motivos.str.rstrip('; ')
+
+
+def restricoes_fk_importacao(nome_banco, nome_tabela, colunas):
+    """FKs (por constraint) que dá para validar antes do INSERT: todas as colunas mapeadas e
+    tabela pai diferente (numa auto-referência o pai pode vir no próprio ficheiro)"""
+    return [aresta for aresta in tabelas_referenciadas(nome_banco, nome_tabela)
+            if set(aresta['colunas']) <= set(colunas) and aresta['pai'] != nome_tabela]
+
+
+TIPOS_NUMERICOS_CHAVE = {'decimal', 'numeric', 'dec', 'fixed', 'float', 'double', 'real', 'year', 'bool', 'boolean'}
+
+
+def valor_comparavel(valor, spec=None):
+    """Valor do ficheiro (texto) ou do servidor na forma usada para comparar chaves, pelo tipo da coluna:
+    número exato nas numéricas ('007', '+5' e 7; '1.5' e Decimal('1.50')), Timestamp nas datas e
+    texto sem maiúsculas nem espaços finais (como nas collations _ci) no resto"""
+    if valor is None:
+        return None
+    base = spec['base'] if spec else None
+    try:
+        if base in BITS_INTEIROS or base in TIPOS_NUMERICOS_CHAVE:
+            return Decimal(str(valor).strip())
+        if base in ('date', 'datetime', 'timestamp'):
+            return pd.Timestamp(valor)
+    except (ArithmeticError, ValueError):
+        pass
+    return str(valor).rstrip().lower()
+
+
+def chaves_normalizadas(dados, colunas, specs=None):
+    """Chave comparável por linha (tuplo de valor_comparavel), para cruzar valores do ficheiro
+    com os do servidor. `specs` são os tipos das colunas, pela mesma ordem de `colunas`."""
+    specs = specs or [None] * len(colunas)
+    partes = [dados[coluna].map(lambda valor, spec=spec: valor_comparavel(valor, spec))
+              for coluna, spec in zip(colunas, specs)]
+    return pd.Series(list(zip(*partes)), index=dados.index, dtype=object)
+
+
+def verificar_fks_bloco(cursor, restricoes, dados, conhecidas, tipos=None):
+    """Marca as linhas cujas FKs não existem na tabela pai.
+    Por FK: valores distintos do bloco, menos os já conhecidos, verificados com consultas IN (...)
+    indexadas. `conhecidas` guarda as chaves válidas entre blocos; `tipos` normaliza os dois lados
+    pelo tipo das colunas. Retorna os motivos por linha."""
+    motivos = pd.Series('', index=dados.index, dtype=object)
+    tamanho_in = IMPORTACAO_CONFIG['tamanho_in_fk']
+    
+    for aresta in restricoes:
+        # FK com alguma coluna NULL não é verificada pelo MySQL
+        completas = dados[aresta['colunas']].notna().all(axis=1)
+        if not completas.any():
+            continue
+        # O MySQL exige tipos compatíveis entre FK e referência: os do filho servem aos dois lados
+        specs = [(tipos or {}).get(c) for c in aresta['colunas']]
+        chaves = chaves_normalizadas(dados.loc[completas], aresta['colunas'], specs)
+        validas = conhecidas.setdefault(aresta['constraint'], set())
+        
+        distintas = chaves.drop_duplicates()
+        faltam = distintas[~distintas.map(lambda chave: chave in validas).astype(bool)]
+        if not faltam.empty:
+            valores = list(dados.loc[faltam.index, aresta['colunas']].itertuples(index=False, name=None))
+            lista_ref = ", ".join(f"`{c}`" for c in aresta['colunas_ref'])
+            marcador = "%s" if len(aresta['colunas_ref']) == 1 else "(" + ", ".join(["%s"] * len(aresta['colunas_ref'])) + ")"
+            for inicio in range(0, len(valores), tamanho_in):
+                lote = valores[inicio:inicio + tamanho_in]
+                cursor.execute(
+                    f"SELECT DISTINCT {lista_ref} FROM `{aresta['pai']}` "
+                    f"WHERE ({lista_ref}) IN ({', '.join([marcador] * len(lote))})",
+                    [v for linha in lote for v in linha]
+                )
+                encontradas = pd.DataFrame(cursor.fetchall(), columns=aresta['colunas_ref'])
+                if encontradas.empty:
+                    continue
+                if len(validas) > IMPORTACAO_CONFIG['max_chaves_fk']:
+                    validas.clear()  # limite de memória: recomeça a memorizar
+                validas.update(chaves_normalizadas(encontradas, aresta['colunas_ref'], specs).tolist())
+        
+        orfas = chaves.index[~chaves.map(lambda chave: chave in validas).astype(bool)]
+        if len(orfas):
+            motivos.loc[orfas] = motivos.loc[orfas] + (
+                f"{', '.join(aresta['colunas'])}: não existe em {aresta['pai']}.{', '.join(aresta['colunas_ref'])}; "
+            )
+    
+    return motivos.str.rstrip('; ')
+
+
+def preparar_bloco(bloco, mapeamento, tipos=None, validar=None):
+    """Aplica o mapeamento {coluna_tabela: coluna_ficheiro} e, com `tipos`, valida/converte o bloco.
+    `validar(dados)` pode rejeitar mais linhas (ex.: FKs) e só recebe as que passaram nos tipos.
+    Devolve (colunas, linhas, rejeitados): linhas válidas em tuplos com None em vez de NaN e um
+    DataFrame com as linhas originais rejeitadas (número da linha no ficheiro e motivo) ou None."""
+    colunas_tabela = list(mapeamento)
+    dados = bloco[[mapeamento[c] for c in colunas_tabela]]
+    dados.columns = colunas_tabela
+    motivos = pd.Series('', index=bloco.index, dtype=object)
+    
+    if tipos:
+        dados, motivos = converter_bloco(dados, tipos)
+    if validar:
+        aceites = motivos == ''
+        extra = validar(dados[aceites])
+        motivos.loc[extra.index] = extra
+    
+    rejeitados = None
+    invalidas = motivos != ''
+    if invalidas.any():
+        rejeitados = bloco[invalidas].assign(_linha=bloco.index[invalidas] + 2, _motivo=motivos[invalidas])
+        dados = dados[~invalidas]
+    
+    dados = dados.astype(object)
+    dados = dados.where(dados.notna(), None)
+    return colunas_tabela, [tuple(linha) for linha in dados.itertuples(index=False, name=None)], rejeitados
+
+
+# Comportamento quando a chave (PRIMARY/UNIQUE) da linha já existe
+MODOS_INSERCAO = {
+    "❌ Dar erro (INSERT)": 'inserir',
+    "⏭️ Ignorar (INSERT IGNORE)": 'ignorar',
+    "🔄 Atualizar (ON DUPLICATE KEY UPDATE)": 'atualizar',
+}
+
+
+def sql_insercao(nome_tabela, colunas, modo='inserir', colunas_atualizar=None):
+    """INSERT parametrizado; o executemany do conector junta as linhas num INSERT multi-linha.
+    modo 'ignorar' gera INSERT IGNORE; 'atualizar' acrescenta ON DUPLICATE KEY UPDATE
+    só às `colunas_atualizar` (sem colunas a atualizar equivale a ignorar)."""
+    if modo == 'atualizar' and not colunas_atualizar:
+        modo = 'ignorar'
+    lista = ", ".join(f"`{c}`" for c in colunas)
+    sql = (f"INSERT {'IGNORE ' if modo == 'ignorar' else ''}INTO `{nome_tabela}` ({lista}) "
+           f"VALUES ({', '.join(['%s'] * len(colunas))})")
+    if modo == 'atualizar':
+        # Forma VALUES(col): é a que o executemany sabe reescrever em multi-linha
+        sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"`{c}` = VALUES(`{c}`)" for c in colunas_atualizar)
+    return sql
+
+
+def chave_unica_mapeada(nome_banco, nome_tabela, colunas):
+    """Colunas da PRIMARY KEY (ou do primeiro índice UNIQUE) se estiverem todas entre `colunas`.
+    É por esta chave que o MySQL decide se a linha já existe."""
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    if not info:
+        return None
+    if info['pk'] and set(info['pk']) <= set(colunas):
+        return list(info['pk'])
+    for nome_indice, indice in sorted(info['indices'].items()):
+        if indice['unico'] and set(indice['colunas']) <= set(colunas):
+            return list(indice['colunas'])
+    return None
+
+
+def contar_existentes(cursor, nome_tabela, colunas, lote, colunas_chave, tamanho_in=None, tipos=None):
+    """Quantas linhas do lote já têm a chave na tabela (antes do INSERT ... ON DUPLICATE KEY UPDATE).
+    Sem isto o rowcount (1 por inserida, 2 por atualizada, 0 por inalterada) não dá para separar."""
+    tamanho_in = tamanho_in or IMPORTACAO_CONFIG['tamanho_in_fk']
+    posicoes = [colunas.index(c) for c in colunas_chave]
+    specs = [(tipos or {}).get(c) for c in colunas_chave]
+    normalizar = lambda chave: tuple(valor_comparavel(v, spec) for v, spec in zip(chave, specs))
+    chaves = [tuple(linha[p] for p in posicoes) for linha in lote]
+    distintas = list({chave for chave in chaves if None not in chave})
+    
+    lista = ", ".join(f"`{c}`" for c in colunas_chave)
+    marcador = "(" + ", ".join(["%s"] * len(colunas_chave)) + ")"
+    existentes = set()
+    for inicio in range(0, len(distintas), tamanho_in):
+        parte = distintas[inicio:inicio + tamanho_in]
+        cursor.execute(
+            f"SELECT {lista} FROM `{nome_tabela}` WHERE ({lista}) IN ({', '.join([marcador] * len(parte))})",
+            [v for chave in parte for v in chave]
+        )
+        existentes.update(normalizar(linha) for linha in cursor.fetchall())
+    
+    # Chaves repetidas dentro do lote: a partir da segunda ocorrência a linha já existe
+    vistas = set()
+    total = 0
+    for chave in chaves:
+        if None in chave:
+            continue
+        normalizada = normalizar(chave)
+        if normalizada in existentes or normalizada in vistas:
+            total += 1
+        vistas.add(normalizada)
+    return total
+
+
+def importar_blocos(conexao, nome_tabela, blocos, mapeamento, tamanho_lote, lotes_por_commit, ao_progredir=None,
+                    tipos=None, ao_rejeitar=None, restricoes_fk=None, modo='inserir', colunas_atualizar=None,
+                    colunas_chave=None):
+    """Grava os blocos lidos em lotes (executemany) com COMMIT a cada `lotes_por_commit` lotes.
+    Com `tipos`/`restricoes_fk`, as linhas inválidas ou órfãs são separadas antes do envio e
+    passadas a `ao_rejeitar`. `modo` escolhe o que fazer com chaves repetidas (ver sql_insercao).
+    Se um lote falhar, desfaz só o trabalho ainda não confirmado e relança o erro.
+    Retorna as contagens {'linhas', 'inseridas', 'atualizadas', 'inalteradas', 'ignoradas'}."""
+    cursor = conexao.cursor()
+    contagens = {'linhas': 0, 'inseridas': 0, 'atualizadas': 0, 'inalteradas': 0, 'ignoradas': 0}
+    confirmadas = 0
+    pendentes = 0
+    lotes_sem_commit = 0
+    if modo == 'atualizar' and not colunas_atualizar:
+        modo = 'ignorar'
+    
+    # Chaves pai já confirmadas, partilhadas por todos os blocos desta importação
+    conhecidas = {}
+    validar = None
+    if restricoes_fk:
+        validar = lambda dados: verificar_fks_bloco(cursor, restricoes_fk, dados, conhecidas, tipos)
+    try:
+        for bloco in blocos:
+            colunas, linhas, rejeitados = preparar_bloco(bloco, mapeamento, tipos, validar)
+            if rejeitados is not None and ao_rejeitar:
+                ao_rejeitar(rejeitados)
+            sql = sql_insercao(nome_tabela, colunas, modo, [c for c in (colunas_atualizar or []) if c in colunas])
+            for inicio in range(0, len(linhas), tamanho_lote):
+                lote = linhas[inicio:inicio + tamanho_lote]
+                existentes = 0
+                if modo == 'atualizar' and colunas_chave:
+                    existentes = contar_existentes(cursor, nome_tabela, colunas, lote, colunas_chave, tipos=tipos)
+                cursor.executemany(sql, lote)
+                
+                # rowcount do MySQL: 1 por linha inserida, 2 por atualizada, 0 por inalterada/ignorada
+                afetadas = max(cursor.rowcount, 0)
+                if modo == 'inserir':
+                    contagens['inseridas'] += len(lote)
+                elif modo == 'ignorar':
+                    contagens['inseridas'] += afetadas
+                    contagens['ignoradas'] += len(lote) - afetadas
+                else:
+                    novas = len(lote) - existentes
+                    atualizadas = min(existentes, max(0, (afetadas - novas) // 2))
+                    contagens['inseridas'] += novas
+                    contagens['atualizadas'] += atualizadas
+                    contagens['inalteradas'] += existentes - atualizadas
+                
+                pendentes += len(lote)
+                lotes_sem_commit += 1
+                if lotes_sem_commit >= lotes_por_commit:
+                    conexao.commit()
+                    confirmadas += pendentes
+                    pendentes = 0
+                    lotes_sem_commit = 0
+                if ao_progredir:
+                    ao_progredir(confirmadas + pendentes)
+        conexao.commit()
+        contagens['linhas'] = confirmadas + pendentes
+        return contagens
+    except Error as e:
+        conexao.rollback()
+        e.linhas_confirmadas = confirmadas
+        raise
+    finally:
+        cursor.close()
+
+
+def mapear_colunas(colunas_tabela, colunas_arquivo, chave):
+    """Widgets para associar cada coluna da tabela a uma coluna do ficheiro (pré-preenchido pelo nome)"""
+    por_nome = {c.strip().lower(): c for c in colunas_arquivo}
+    opcoes = ["(ignorar)"] + list(colunas_arquivo)
+    mapeamento = {}
+    colunas_ui = st.columns(3)
+    for i, col in enumerate(colunas_tabela):
+        nome = col[0]
+        sugestao = por_nome.get(nome.lower())
+        with colunas_ui[i % 3]:
+            escolha = st.selectbox(
+                f"{nome} ({col[1]})" + (" *" if col[2] == 'NO' and col[4] is None and 'AUTO_INCREMENT' not in col[5].upper() else ""),
+                opcoes,
+                index=opcoes.index(sugestao) if sugestao else 0,
+                key=f"{chave}_map_{nome}"
+            )
+        if escolha != "(ignorar)":
+            mapeamento[nome] = escolha
+    return mapeamento
+
+
+def importar_dados(nome_banco, nome_tabela):
+    """Importa um ficheiro CSV/XLSX para a tabela em blocos, com lotes e COMMIT configuráveis"""
+    st.subheader("📤 Importar Dados")
+    chave = f"importar_{nome_banco}_{nome_tabela}"
+    
+    # Importar por caminho só dentro da pasta configurada: sem isso qualquer utilizador leria
+    # ficheiros arbitrários do servidor pela pré-visualização e pelo CSV de rejeitados
+    diretorio = IMPORTACAO_CONFIG['diretorio_servidor']
+    origens = ["⬆️ Enviar ficheiro"] + (["🖥️ Pasta de importação do servidor"] if diretorio else [])
+    origem = st.radio("Origem do ficheiro:", origens, horizontal=True, key=f"{chave}_origem",
+                      help="Para ficheiros muito grandes use a pasta de importação do servidor")
+    if origem == "⬆️ Enviar ficheiro":
+        arquivo = st.file_uploader("Ficheiro CSV ou Excel:", type=["csv", "txt", "xlsx"], key=f"{chave}_upload")
+        if not arquivo:
+            return
+        nome_arquivo, tamanho_arquivo = arquivo.name, arquivo.size
+        
+        def abrir():
+            # O próprio ficheiro enviado, do início e sem cópia (o with não o fecha entre leituras)
+            arquivo.seek(0)
+            return nullcontext(arquivo)
+    else:
+        nome = st.text_input(f"Ficheiro em `{diretorio}`:", key=f"{chave}_caminho", placeholder="clientes.csv")
+        if not nome:
+            return
+        raiz = os.path.realpath(diretorio)
+        caminho = os.path.realpath(os.path.join(raiz, nome))
+        if os.path.commonpath([raiz, caminho]) != raiz:
+            st.error("❌ Só é possível importar ficheiros dentro da pasta de importação.")
+            return
+        if not os.path.isfile(caminho):
+            st.error(f"❌ Ficheiro não encontrado: {nome}")
+            return
+        nome_arquivo, tamanho_arquivo = os.path.basename(caminho), os.path.getsize(caminho)
+        abrir = lambda: open(caminho, 'rb')
+    
+    tipo = "xlsx" if nome_arquivo.lower().endswith(".xlsx") else "csv"
+    
+    col1, col2, col3 = st.columns(3)
+    separador, codificacao = ",", "utf-8"
+    if tipo == "csv":
+        with col1:
+            separador = {"vírgula (,)": ",", "ponto e vírgula (;)": ";", "tabulação": "\t", "barra (|)": "|"}[
+                st.selectbox("Separador:", ["vírgula (,)", "ponto e vírgula (;)", "tabulação", "barra (|)"], key=f"{chave}_sep")]
+        with col2:
+            codificacao = st.selectbox("Codificação:", ["utf-8", "latin-1", "cp1252"], key=f"{chave}_enc")
+    
+    # Pré-visualização: só o primeiro bloco pequeno
+    try:
+        with abrir() as fonte:
+            amostra = next(ler_blocos_arquivo(fonte, tipo, 20, separador, codificacao), None)
+    except (ValueError, UnicodeDecodeError, OSError) as e:
+        st.error(f"❌ Não foi possível ler o ficheiro: {e}")
+        return
+    if amostra is None or amostra.empty:
+        st.warning("📭 O ficheiro não tem linhas de dados.")
+        return
+    
+    st.write(f"**Pré-visualização** ({tamanho_arquivo / (1024 * 1024):.2f} MB):")
+    st.dataframe(amostra, use_container_width=True, hide_index=True)
+    
+    st.write("**Mapeamento de colunas** (tabela ← ficheiro):")
+    colunas_tabela = obter_estrutura_tabela(nome_banco, nome_tabela)
+    mapeamento = mapear_colunas(colunas_tabela, list(amostra.columns), chave)
+    if not mapeamento:
+        st.warning("Associe pelo menos uma coluna.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        tamanho_bloco = st.number_input("Linhas lidas por bloco:", min_value=100, max_value=1000000,
+                                        value=IMPORTACAO_CONFIG['tamanho_bloco'], step=1000, key=f"{chave}_bloco")
+    with col2:
+        tamanho_lote = st.number_input("Linhas por INSERT:", min_value=1, max_value=50000,
+                                       value=IMPORTACAO_CONFIG['tamanho_lote'], step=100, key=f"{chave}_lote")
+    with col3:
+        lotes_por_commit = st.number_input("Lotes por COMMIT:", min_value=1, max_value=1000,
+                                           value=IMPORTACAO_CONFIG['lotes_por_commit'], step=1, key=f"{chave}_commit")
+    
+    # FKs verificadas no servidor antes de cada INSERT (órfãos vão para as linhas rejeitadas)
+    restricoes_fk = restricoes_fk_importacao(nome_banco, nome_tabela, list(mapeamento))
+    if restricoes_fk:
+        validar_fks = st.checkbox(
+            f"🔗 Validar {len(restricoes_fk)} FOREIGN KEY(s) antes de inserir "
+            f"({', '.join(a['pai'] for a in restricoes_fk)})",
+            value=True, key=f"{chave}_validar_fks"
+        )
+        if not validar_fks:
+            restricoes_fk = []
+    
+    # Linhas cuja chave (PRIMARY/UNIQUE) já existe na tabela
+    colunas_chave = chave_unica_mapeada(nome_banco, nome_tabela, list(mapeamento))
+    modo = MODOS_INSERCAO[st.radio(
+        "Se a chave já existir:", list(MODOS_INSERCAO), horizontal=True, key=f"{chave}_modo",
+        help="INSERT IGNORE também converte outros erros da linha (p.ex. FK inválida) em avisos e salta a linha."
+    )]
+    colunas_atualizar = []
+    if modo == 'atualizar':
+        if colunas_chave:
+            st.caption(f"🔑 Chave usada para detetar linhas existentes: {', '.join(colunas_chave)}")
+        else:
+            st.caption("⚠️ Nenhuma PRIMARY KEY / UNIQUE está totalmente mapeada: "
+                       "todas as linhas serão contadas como inseridas.")
+        candidatas = [c for c in mapeamento if c not in (colunas_chave or [])]
+        colunas_atualizar = st.multiselect("Colunas a atualizar:", candidatas, default=candidatas,
+                                           key=f"{chave}_atualizar")
+    
+    if not st.button("📤 Importar", type="primary", key=f"{chave}_importar"):
+        return
+    
+    conexao = conectar_mysql(nome_banco)
+    if not conexao:
+        return
+    
+    barra = st.progress(0.0)
+    area_status = st.empty()
+    inicio = perf_counter()
+    
+    # Validação vetorizada pelos tipos da tabela; linhas inválidas vão para um ficheiro à parte
+    tipos = {col[0]: analisar_tipo_mysql(col) for col in colunas_tabela if col[0] in mapeamento}
+    caminho_rejeitados = os.path.join(
+        tempfile.gettempdir(), f"rejeitados_{nome_tabela}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    rejeicoes = {'linhas': 0}
+    
+    def ao_rejeitar(rejeitados):
+        rejeitados.to_csv(caminho_rejeitados, mode='a', index=False, header=rejeicoes['linhas'] == 0)
+        rejeicoes['linhas'] += len(rejeitados)
+    
+    try:
+        with abrir() as fonte:
+            def ao_progredir(linhas):
+                # Progresso pelos bytes já lidos do ficheiro (o total de linhas não é conhecido)
+                try:
+                    lido = fonte.tell() / max(tamanho_arquivo, 1)
+                except (OSError, ValueError):
+                    lido = 0.0
+                decorrido = perf_counter() - inicio
+                barra.progress(min(1.0, lido))
+                area_status.caption(f"📥 {linhas:,} linhas - {linhas / decorrido if decorrido else 0:,.0f} linhas/s")
+            
+            blocos = ler_blocos_arquivo(fonte, tipo, int(tamanho_bloco), separador, codificacao)
+            contagens = importar_blocos(conexao, nome_tabela, blocos, mapeamento,
+                                        int(tamanho_lote), int(lotes_por_commit), ao_progredir,
+                                        tipos=tipos, ao_rejeitar=ao_rejeitar, restricoes_fk=restricoes_fk,
+                                        modo=modo, colunas_atualizar=colunas_atualizar, colunas_chave=colunas_chave)
+        
+        barra.progress(1.0)
+        decorrido = perf_counter() - inicio
+        total = contagens['linhas']
+        st.success(f"✅ {total:,} linhas processadas em {decorrido:.1f}s "
+                   f"({total / decorrido if decorrido else 0:,.0f} linhas/s)")
+        if modo != 'inserir':
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Inseridas", f"{contagens['inseridas']:,}")
+            if modo == 'atualizar':
+                col2.metric("Atualizadas", f"{contagens['atualizadas']:,}")
+                col3.metric("Inalteradas", f"{contagens['inalteradas']:,}")
+            else:
+                col2.metric("Ignoradas", f"{contagens['ignoradas']:,}")
+    except Error as e:
+        st.error(f"❌ Importação interrompida: {e}")
+        st.info(f"{getattr(e, 'linhas_confirmadas', 0):,} linhas já tinham sido confirmadas (COMMIT) antes do erro.")
+    except (ValueError, UnicodeDecodeError, OSError) as e:
+        conexao.rollback()
+        st.error(f"❌ Erro ao ler o ficheiro: {e}")
+    finally:
+        registrar_escrita(nome_banco, nome_tabela)
+        conexao.close()
+    
+    if rejeicoes['linhas']:
+        st.warning(f"⚠️ {rejeicoes['linhas']:,} linha(s) rejeitada(s) antes do envio ao servidor. "
+                   f"Motivos gravados em `{caminho_rejeitados}`")
+        if os.path.getsize(caminho_rejeitados) <= 50 * 1024 * 1024:
+            with open(caminho_rejeitados, 'rb') as arquivo_rejeitados:
+                st.download_button("📄 Descarregar linhas rejeitadas", arquivo_rejeitados.read(),
+                                   file_name=os.path.basename(caminho_rejeitados), mime="text/csv",
+                                   key=f"{chave}_rejeitados")
+
+# ==================== GERAÇÃO DE DADOS SINTÉTICOS (TESTES DE CARGA) ====================
+
+TIPOS_TEXTO = {'char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext'}
+TIPOS_BINARIOS = {'binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob'}
+ALFABETO_GERADOR = np.frombuffer(b"abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)
+
+
+def tabelas_com_ancestrais(nome_banco, tabelas):
+    """As tabelas indicadas mais todas as tabelas pai de que dependem (recursivamente)"""
+    resultado = list(tabelas)
+    vistas = set(tabelas)
+    for tabela in resultado:  # a lista cresce durante o ciclo
+        for aresta in tabelas_referenciadas(nome_banco, tabela):
+            if aresta['pai'] not in vistas:
+                vistas.add(aresta['pai'])
+                resultado.append(aresta['pai'])
+    return resultado
+
+
+def ordem_topologica(nome_banco, tabelas):
+    """Ordena as tabelas para que cada pai venha antes das filhas (Kahn sobre o grafo de FKs).
+    Auto-referências não contam; tabelas presas num ciclo vão no fim, pela ordem original.
+    Retorna (ordem, em_ciclo)."""
+    pendentes = {
+        tabela: {a['pai'] for a in tabelas_referenciadas(nome_banco, tabela)
+                 if a['pai'] in tabelas and a['pai'] != tabela}
+        for tabela in tabelas
+    }
+    ordem = []
+    prontas = [tabela for tabela in tabelas if not pendentes[tabela]]
+    while prontas:
+        tabela = prontas.pop(0)
+        ordem.append(tabela)
+        for aresta in tabelas_que_referenciam(nome_banco, tabela):
+            filho = aresta['filho']
+            if tabela in pendentes.get(filho, ()):
+                pendentes[filho].discard(tabela)
+                if not pendentes[filho]:
+                    prontas.append(filho)
+    em_ciclo = [tabela for tabela in tabelas if tabela not in ordem]
+    return ordem + em_ciclo, em_ciclo
+
+
+def textos_aleatorios(rng, n, comprimento):
+    """n textos de letras minúsculas (com espaços), de comprimento variável até `comprimento`.
+    Gerados numa matriz de bytes: os zeros no fim de cada linha são cortados pelo dtype S."""
+    comprimento = max(1, int(comprimento))
+    matriz = ALFABETO_GERADOR[rng.integers(0, len(ALFABETO_GERADOR), (n, comprimento))]
+    matriz[:, 1:][rng.random((n, comprimento - 1)) < 0.15] = ord(' ')
+    tamanhos = rng.integers(max(1, comprimento // 3), comprimento + 1, n)
+    matriz[np.arange(comprimento) >= tamanhos[:, None]] = 0
+    return np.ascontiguousarray(matriz).view(f"S{comprimento}").ravel().astype(str)
+
+
+def juntar_texto(*partes):
+    """Concatena elemento a elemento vetores/strings NumPy (np.char.add com várias partes)"""
+    resultado = partes[0]
+    for parte in partes[1:]:
+        resultado = np.char.add(resultado, parte)
+    return resultado
+
+
+def gerar_valores_coluna(spec, n, rng, proporcao_nulos=0.0, inicio_unico=None, prefixo=""):
+    """Lista de n valores válidos para o tipo da coluna (spec de analisar_tipo_mysql), gerados
+    com NumPy. Com `inicio_unico` produz uma sequência sem repetições a partir desse número
+    (PRIMARY/UNIQUE). Levanta ValueError se o tipo não couber ou não for suportado."""
+    base = spec['base']
+    tamanho = spec['tamanho']
+    
+    if base in BITS_INTEIROS:
+        bits = BITS_INTEIROS[base]
+        maximo = 2 ** bits - 1 if spec['unsigned'] else 2 ** (bits - 1) - 1
+        if inicio_unico is not None:
+            if inicio_unico + n - 1 > maximo:
+                raise ValueError(f"{base} não comporta {n:,} valores únicos a partir de {inicio_unico:,}")
+            valores = np.arange(inicio_unico, inicio_unico + n, dtype=np.int64)
+        elif base == 'tinyint' and tamanho == 1:
+            valores = rng.integers(0, 2, n)  # TINYINT(1) é o BOOLEAN do MySQL
+        else:
+            valores = rng.integers(0, min(maximo, 10 ** 6) + 1, n)
+    
+    elif base in ('decimal', 'numeric'):
+        precisao, escala = tamanho or 10, spec['escala']
+        maximo = 10 ** (precisao - escala) - 1
+        if inicio_unico is not None:
+            if inicio_unico + n - 1 > maximo:
+                raise ValueError(f"DECIMAL({precisao},{escala}) não comporta {n:,} valores únicos")
+            valores = np.arange(inicio_unico, inicio_unico + n, dtype=np.int64).astype(str)
+        else:
+            valores = np.char.mod(f"%.{escala}f", rng.random(n) * min(maximo, 10 ** 6))
+    
+    elif base in ('float', 'double', 'real'):
+        valores = np.round(rng.random(n) * 10 ** 4, 4)
+    
+    elif base in ('bit', 'bool', 'boolean'):
+        valores = rng.integers(0, 2, n)
+    
+    elif base in ('enum', 'set'):
+        membros = np.array(spec['membros'] or [''], dtype=object)
+        valores = membros[rng.integers(0, len(membros), n)]
+    
+    elif base == 'date':
+        dias = rng.integers(0, 3650, n).astype('timedelta64[D]')
+        valores = np.datetime_as_string(np.datetime64('2015-01-01') + dias)
+    
+    elif base in ('datetime', 'timestamp'):
+        # Dez anos a partir de 2015: dentro do intervalo do TIMESTAMP (até 2038)
+        segundos = rng.integers(0, 10 * 365 * 86400, n).astype('timedelta64[s]')
+        valores = np.char.replace(np.datetime_as_string(np.datetime64('2015-01-01T00:00:00') + segundos), 'T', ' ')
+    
+    elif base == 'time':
+        segundos = rng.integers(0, 86400, n)
+        valores = juntar_texto(np.char.zfill((segundos // 3600).astype(str), 2), ':',
+                               np.char.zfill((segundos // 60 % 60).astype(str), 2), ':',
+                               np.char.zfill((segundos % 60).astype(str), 2))
+    
+    elif base == 'year':
+        valores = rng.integers(1990, 2031, n)
+    
+    elif base in TIPOS_TEXTO:
+        limite = tamanho or LIMITES_BYTES.get(base, 255)
+        if inicio_unico is not None:
+            numeros = np.arange(inicio_unico, inicio_unico + n, dtype=np.int64).astype(str)
+            if len(prefixo) + len(str(inicio_unico + n - 1)) > limite:
+                prefixo = ""  # sem espaço para o prefixo da execução: só a sequência
+            if len(str(inicio_unico + n - 1)) > limite:
+                raise ValueError(f"{base}({limite}) é curto demais para {n:,} valores únicos")
+            valores = np.char.add(prefixo, numeros)
+        else:
+            valores = textos_aleatorios(rng, n, min(limite, 30 if base in ('char', 'varchar') else 200))
+    
+    elif base == 'json':
+        valores = juntar_texto('{"n": ', rng.integers(0, 10 ** 6, n).astype(str), '}')
+    
+    elif base in TIPOS_BINARIOS:
+        comprimento = min(tamanho or 16, 16)
+        valores = np.empty(n, dtype=object)
+        valores[:] = [linha.tobytes() for linha in rng.integers(0, 256, (n, comprimento), dtype=np.uint8)]
+    
+    elif spec['nulo']:
+        return [None] * n  # tipos espaciais e afins: NULL quando permitido
+    else:
+        raise ValueError(f"Tipo {base} não suportado pelo gerador (coluna NOT NULL)")
+    
+    # tolist() devolve int/float/str do Python - o conector não converte tipos NumPy
+    valores = valores.tolist()
+    if spec['nulo'] and inicio_unico is None and proporcao_nulos > 0:
+        for posicao in np.flatnonzero(rng.random(n) < proporcao_nulos).tolist():
+            valores[posicao] = None
+    return valores
+
+
+def amostrar_chaves(cursor, nome_tabela, colunas, limite, total_estimado=0):
+    """Até `limite` chaves (não nulas) da tabela pai para sortear os valores das FKs.
+    Em tabelas grandes a amostra é espalhada com RAND() em vez de ficar nas primeiras linhas."""
+    lista = ", ".join(f"`{c}`" for c in colunas)
+    where = " AND ".join(f"`{c}` IS NOT NULL" for c in colunas)
+    if total_estimado > limite:
+        where += f" AND RAND() < {min(1.0, 2.0 * limite / total_estimado):.6f}"
+    cursor.execute(f"SELECT {lista} FROM `{nome_tabela}` WHERE {where} LIMIT {int(limite)}")
+    return cursor.fetchall()
+
+
+def planear_geracao(conexao, nome_banco, nome_tabela, estimativas=None, proporcao_nulos=None, amostra=None):
+    """Decide como gerar cada coluna da tabela:
+    - AUTO_INCREMENT e colunas geradas ficam de fora do INSERT;
+    - colunas de FK recebem chaves sorteadas de uma amostra da tabela pai;
+    - em cada índice PRIMARY/UNIQUE uma coluna passa a sequência (a partir do MAX atual);
+      se nenhuma servir (ex.: só FKs ou datas), usa-se INSERT IGNORE e contam-se as repetidas;
+    - as restantes recebem valores aleatórios do tipo, com NULL onde é permitido."""
+    estimativas = estimativas or {}
+    proporcao_nulos = GERADOR_CONFIG['proporcao_nulos'] if proporcao_nulos is None else proporcao_nulos
+    amostra = amostra or GERADOR_CONFIG['amostra_pais']
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    
+    colunas = {
+        col[0]: analisar_tipo_mysql(col) for col in info['colunas']
+        if 'auto_increment' not in str(col[5]).lower() and not coluna_gerada(col)
+    }
+    fks = [aresta for aresta in tabelas_referenciadas(nome_banco, nome_tabela)
+           if set(aresta['colunas']) <= set(colunas)]
+    colunas_fk = {coluna for aresta in fks for coluna in aresta['colunas']}
+    
+    def sequenciavel(spec):
+        return spec['base'] in BITS_INTEIROS or spec['base'] in ('decimal', 'numeric') or spec['base'] in TIPOS_TEXTO
+    
+    unicas = {}
+    ignorar = False
+    cursor = conexao.cursor()
+    try:
+        for indice in info['indices'].values():
+            if not indice['unico'] or not set(indice['colunas']) <= set(colunas):
+                continue  # índice com AUTO_INCREMENT já é único por si
+            if any(coluna in unicas for coluna in indice['colunas']):
+                continue
+            candidata = next((c for c in indice['colunas']
+                              if c not in colunas_fk and sequenciavel(colunas[c])), None)
+            if candidata is None:
+                ignorar = True
+                continue
+            if colunas[candidata]['base'] in TIPOS_TEXTO:
+                unicas[candidata] = 1
+                # Texto curto demais para o prefixo da execução: pode repetir valores de uma execução anterior
+                ignorar = ignorar or (colunas[candidata]['tamanho'] or 255) < 16
+            else:
+                cursor.execute(f"SELECT MAX(`{candidata}`) FROM `{nome_tabela}`")
+                maximo = cursor.fetchone()[0]
+                unicas[candidata] = max(int(maximo or 0) + 1, 1)
+        
+        chaves_fk = []
+        for aresta in fks:
+            chaves = amostrar_chaves(cursor, aresta['pai'], aresta['colunas_ref'], amostra,
+                                     estimativas.get(aresta['pai'], 0))
+            if not chaves and not all(colunas[c]['nulo'] for c in aresta['colunas']):
+                raise ValueError(f"A tabela pai `{aresta['pai']}` está vazia: não há chaves para "
+                                 f"{', '.join(aresta['colunas'])}")
+            chaves_fk.append((aresta, np.array(chaves, dtype=object).reshape(len(chaves), len(aresta['colunas']))))
+    finally:
+        cursor.close()
+    
+    return {
+        'tabela': nome_tabela,
+        'colunas': colunas,
+        'colunas_fk': colunas_fk,
+        'fks': chaves_fk,
+        'unicas': unicas,
+        'ignorar': ignorar,
+        'proporcao_nulos': proporcao_nulos,
+        # Prefixo dos textos únicos: evita colidir com os de uma execução anterior
+        'prefixo': f"{int(datetime.now().timestamp()) & 0xFFFFFF:06x}_"
+    }
+
+
+def linhas_sinteticas(plano, n, rng, deslocamento=0):
+    """Gera um bloco de n linhas para o plano. `deslocamento` é a posição do bloco na tabela,
+    para as sequências únicas de blocos diferentes não se sobreporem. Retorna (colunas, linhas)."""
+    dados = {}
+    for nome, spec in plano['colunas'].items():
+        if nome in plano['colunas_fk']:
+            continue
+        inicio = plano['unicas'].get(nome)
+        dados[nome] = gerar_valores_coluna(spec, n, rng, plano['proporcao_nulos'],
+                                           None if inicio is None else inicio + deslocamento, plano['prefixo'])
+    
+    for aresta, chaves in plano['fks']:
+        nulas = all(plano['colunas'][c]['nulo'] for c in aresta['colunas'])
+        if len(chaves) == 0:
+            sorteio = np.full((n, len(aresta['colunas'])), None, dtype=object)
+        else:
+            sorteio = chaves[rng.integers(0, len(chaves), n)]
+            if nulas and plano['proporcao_nulos'] > 0:
+                sorteio[rng.random(n) < plano['proporcao_nulos']] = None
+        for posicao, coluna in enumerate(aresta['colunas']):
+            dados[coluna] = sorteio[:, posicao].tolist()
+    
+    colunas = [coluna for coluna in plano['colunas'] if coluna in dados]
+    return colunas, list(zip(*(dados[coluna] for coluna in colunas)))
+
+
+def inserir_bloco_sintetico(config, nome_banco, plano, indice_bloco, n, semente, tamanho_bloco, tamanho_lote, cancelar):
+    """Corpo de um worker: gera um bloco e insere-o em lotes numa conexão própria do pool,
+    com COMMIT no fim do bloco. Cada bloco tem o seu gerador (semente, índice), por isso o
+    resultado é o mesmo qualquer que seja a ordem em que os workers terminam.
+    Retorna (linhas, inseridas)."""
+    if cancelar.is_set():
+        return 0, 0
+    rng = np.random.default_rng([semente, indice_bloco])
+    colunas, linhas = linhas_sinteticas(plano, n, rng, indice_bloco * tamanho_bloco)
+    sql = sql_insercao(plano['tabela'], colunas, 'ignorar' if plano['ignorar'] else 'inserir')
+    
+    conexao = obter_conexao_pool(config, nome_banco)
+    cursor = conexao.cursor()
+    inseridas = 0
+    try:
+        for inicio in range(0, len(linhas), tamanho_lote):
+            if cancelar.is_set():
+                conexao.rollback()
+                return 0, 0
+            cursor.executemany(sql, linhas[inicio:inicio + tamanho_lote])
+            inseridas += max(cursor.rowcount, 0)
+        conexao.commit()
+        return len(linhas), inseridas
+    except Error:
+        conexao.rollback()
+        raise
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+def gerar_em_paralelo(config, nome_banco, plano, total, semente=0, max_paralelo=None,
+                      tamanho_bloco=None, tamanho_lote=None, cancelar=None):
+    """Gerador que preenche uma tabela com `total` linhas em blocos distribuídos por um pool de
+    threads, produzindo (linhas, inseridas) à medida que cada bloco é confirmado.
+    O NumPy e a espera pela rede libertam o GIL, logo os workers sobrepõem-se de verdade."""
+    tamanho_bloco = tamanho_bloco or GERADOR_CONFIG['tamanho_bloco']
+    tamanho_lote = tamanho_lote or GERADOR_CONFIG['tamanho_lote']
+    max_paralelo = max_paralelo or GERADOR_CONFIG['max_paralelo']
+    # Nunca mais workers do que conexões no pool (deixa uma livre para a interface)
+    max_paralelo = max(1, min(max_paralelo, POOL_CONFIG['tamanho'] - 1))
+    cancelar = cancelar or threading.Event()
+    
+    executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix=f"gerador_{plano['tabela']}")
+    futuros = [
+        executor.submit(inserir_bloco_sintetico, config, nome_banco, plano, indice,
+                        min(tamanho_bloco, total - inicio), semente, tamanho_bloco, tamanho_lote, cancelar)
+        for indice, inicio in enumerate(range(0, total, tamanho_bloco))
+    ]
+    concluido = False
+    try:
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+        concluido = True
+    finally:
+        if not concluido:
+            # Erro num bloco ou rerun da página: os blocos por começar já não correm
+            cancelar.set()
+            for futuro in futuros:
+                futuro.cancel()
+        executor.shutdown(wait=False)
+
+
+def gerar_dados_teste(nome_banco):
+    """Página para encher tabelas com dados sintéticos (reproduzir volume de produção em cópias locais)"""
+    st.subheader("🧪 Gerar Dados de Teste")
+    st.caption("Linhas aleatórias que respeitam tipos, tamanhos, NULL, ENUM, PRIMARY/UNIQUE e FOREIGN KEYS. "
+               "Use apenas em cópias locais do banco!")
+    
+    tabelas = obter_tabelas_banco(nome_banco)
+    selecionadas = st.multiselect("Tabelas a preencher:", tabelas, key=f"gerador_tabelas_{nome_banco}")
+    if not selecionadas:
+        st.info("Selecione pelo menos uma tabela.")
+        return
+    
+    if st.checkbox("Incluir as tabelas pai (recursivamente)", value=True, key=f"gerador_pais_{nome_banco}",
+                   help="Sem isto, as FKs são sorteadas das linhas que as tabelas pai já têm."):
+        selecionadas = tabelas_com_ancestrais(nome_banco, selecionadas)
+    ordem, em_ciclo = ordem_topologica(nome_banco, selecionadas)
+    if em_ciclo:
+        st.warning(f"⚠️ FKs em ciclo entre {', '.join(em_ciclo)}: estas tabelas vão no fim e as FKs "
+                   "do ciclo usam as chaves que já existirem (ou NULL).")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        linhas_padrao = st.number_input("Linhas por tabela:", min_value=1, max_value=100000000,
+                                        value=10000, step=10000, key=f"gerador_linhas_{nome_banco}")
+    with col2:
+        proporcao_nulos = st.slider("Proporção de NULL:", 0.0, 0.5, GERADOR_CONFIG['proporcao_nulos'], 0.01,
+                                    key=f"gerador_nulos_{nome_banco}")
+    with col3:
+        semente = st.number_input("Semente:", min_value=0, value=42, step=1, key=f"gerador_semente_{nome_banco}")
+    
+    st.write("**Ordem de inserção** (pais antes das filhas):")
+    quantidades = st.data_editor(
+        pd.DataFrame({'Tabela': ordem, 'Linhas': [int(linhas_padrao)] * len(ordem)}),
+        disabled=['Tabela'], hide_index=True, use_container_width=True,
+        key=f"gerador_quantidades_{nome_banco}_{int(linhas_padrao)}_{len(ordem)}"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        max_paralelo = st.number_input("Workers em paralelo:", min_value=1, max_value=max(1, POOL_CONFIG['tamanho'] - 1),
+                                       value=min(GERADOR_CONFIG['max_paralelo'], max(1, POOL_CONFIG['tamanho'] - 1)),
+                                       key=f"gerador_workers_{nome_banco}")
+    with col2:
+        tamanho_bloco = st.number_input("Linhas por bloco (COMMIT):", min_value=1000, max_value=1000000,
+                                        value=GERADOR_CONFIG['tamanho_bloco'], step=10000,
+                                        key=f"gerador_bloco_{nome_banco}")
+    with col3:
+        tamanho_lote = st.number_input("Linhas por INSERT:", min_value=1, max_value=50000,
+                                       value=GERADOR_CONFIG['tamanho_lote'], step=100,
+                                       key=f"gerador_lote_{nome_banco}")
+    
+    confirmar = st.checkbox(f"Confirmo que quero inserir {int(quantidades['Linhas'].sum()):,} linhas em "
+                            f"{len(ordem)} tabela(s) de `{nome_banco}`", key=f"gerador_confirmar_{nome_banco}")
+    if not st.button("🚀 Gerar dados", type="primary", disabled=not confirmar, key=f"gerador_iniciar_{nome_banco}"):
+        return
+    
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    conexao = conectar_mysql(nome_banco)
+    if not conexao:
+        return
+    
+    resumo = []
+    try:
+        estimativas = estimativas_linhas(conexao, nome_banco)
+        for tabela, total in zip(quantidades['Tabela'], quantidades['Linhas']):
+            total = int(total or 0)
+            if total <= 0:
+                continue
+            st.write(f"**{tabela}**")
+            barra = st.progress(0.0)
+            area_status = st.empty()
+            inicio = perf_counter()
+            
+            # Termina o snapshot da transação: as linhas que os workers gravaram nos pais ficam visíveis
+            conexao.rollback()
+            try:
+                plano = planear_geracao(conexao, nome_banco, tabela, estimativas, proporcao_nulos)
+            except (Error, ValueError) as e:
+                st.error(f"❌ {tabela}: {e}")
+                break
+            
+            processadas = inseridas = 0
+            try:
+                for linhas, inseridas_bloco in gerar_em_paralelo(
+                        config, nome_banco, plano, total, int(semente), int(max_paralelo),
+                        int(tamanho_bloco), int(tamanho_lote)):
+                    processadas += linhas
+                    inseridas += inseridas_bloco
+                    decorrido = perf_counter() - inicio
+                    barra.progress(min(1.0, processadas / total))
+                    area_status.caption(f"📥 {processadas:,} / {total:,} linhas - "
+                                        f"{processadas / decorrido if decorrido else 0:,.0f} linhas/s")
+            except (Error, ValueError) as e:
+                st.error(f"❌ {tabela}: {e} ({inseridas:,} linhas já confirmadas)")
+                break
+            finally:
+                registrar_escrita(nome_banco, tabela)
+                estimativas[tabela] = estimativas.get(tabela, 0) + inseridas
+                decorrido = perf_counter() - inicio
+                resumo.append({
+                    'Tabela': tabela,
+                    'Inseridas': inseridas,
+                    'Repetidas (IGNORE)': processadas - inseridas,
+                    'Tempo (s)': round(decorrido, 1),
+                    'Linhas/s': round(processadas / decorrido) if decorrido else 0
+                })
+    finally:
+        conexao.close()
+    
+    if resumo:
+        st.success(f"✅ {sum(r['Inseridas'] for r in resumo):,} linhas inseridas em {len(resumo)} tabela(s)")
+        st.dataframe(pd.DataFrame(resumo), use_container_width=True, hide_index=True)
+        descartar_contagens(config, nome_banco)
+
+# ==================== EXPORTAÇÃO EM STREAMING (FICHEIRO TEMPORÁRIO) ====================
+
+# formato -> (extensão, mime)
+FORMATOS_EXPORTACAO = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'JSON': ('json', 'application/json'),
+    'SQL': ('sql', 'application/sql'),
+}
+LIMITE_LINHAS_EXCEL = 1048575  # linhas de dados numa folha (mais a do cabeçalho)
+
+
+def abrir_consulta_streaming(conexao, sql, params=(), tamanho_bloco=None, config=None):
+    """Executa a consulta num cursor sem buffer e devolve (colunas, blocos).
+    `blocos` é um gerador de listas de linhas (fetchmany): o servidor envia o resultado à medida
+    que é pedido, logo a memória usada é a de um bloco, seja qual for o tamanho da tabela.
+    Com `config`, uma leitura interrompida é cortada com KILL QUERY noutra conexão do pool."""
+    tamanho_bloco = tamanho_bloco or EXPORTACAO_CONFIG['tamanho_bloco']
+    cursor = conexao.cursor(buffered=False)
+    try:
+        # Escrever o ficheiro pode ser mais lento do que ler: sem isto o servidor corta a conexão
+        cursor.execute(f"SET SESSION net_write_timeout = {int(EXPORTACAO_CONFIG['net_write_timeout'])}")
+        cursor.execute(sql, params)
+    except Error:
+        cursor.close()
+        raise
+    
+    def blocos():
+        completo = False
+        try:
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas:
+                    completo = True
+                    return
+                yield linhas
+        finally:
+            if not completo:
+                # Leitura interrompida (erro do escritor, cancelamento): sem KILL QUERY o resto da
+                # tabela teria de chegar pela rede antes de a conexão poder ser reutilizada
+                if config is not None:
+                    interromper_consultas(config, {'exportacao': conexao.connection_id})
+                try:
+                    conexao.consume_results()
+                except Error:
+                    pass  # "Query execution was interrupted" no fim do que já vinha a caminho
+            cursor.close()
+    
+    return list(cursor.column_names), blocos()
+
+
+def valor_json(valor):
+    """Conversão para json.dumps dos tipos que o conector devolve e o JSON não tem
+    (Decimal e TIME vão como texto para não perder precisão)"""
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.hex()
+    if isinstance(valor, set):
+        return sorted(valor)
+    return str(valor)
+
+
+def valor_planilha(valor):
+    """Valor aceite pelo openpyxl (binário em hexadecimal, SET como lista separada por vírgulas)"""
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.hex()
+    if isinstance(valor, set):
+        return ",".join(sorted(valor))
+    return valor
+
+
+# compressão -> (extensão acrescentada, mime, níveis (mínimo, máximo, omissão))
+COMPRESSOES_EXPORTACAO = {'gzip': ('gz', 'application/gzip', (1, 9, 6))}
+if zstd is not None:
+    COMPRESSOES_EXPORTACAO['zstd'] = ('zst', 'application/zstd', (1, 19, 3))
+
+
+def comprime_internamente(formato, compressao):
+    """Formatos que comprimem por dentro e mantêm a extensão: Parquet (codec por coluna), Arrow com
+    zstd (buffers IPC) e Excel (o XLSX já é um ZIP - a compressão pedida não se aplica)"""
+    return formato in ('Parquet', 'Excel') or (formato == 'Arrow' and compressao == 'zstd')
+
+
+def extensao_exportacao(formato, compressao=None):
+    """(extensão, mime) do ficheiro exportado, com .gz/.zst quando a compressão envolve o ficheiro"""
+    extensao, mime = FORMATOS_EXPORTACAO[formato]
+    if compressao and not comprime_internamente(formato, compressao):
+        sufixo, mime, _ = COMPRESSOES_EXPORTACAO[compressao]
+        extensao = f"{extensao}.{sufixo}"
+    return extensao, mime
+
+
+def abrir_saida(caminho, opcoes=None):
+    """Abre o ficheiro de destino em modo texto (UTF-8), comprimido em streaming se as opções o
+    pedirem: cada bloco é comprimido à medida que é escrito, só o resultado comprimido vai para o disco"""
+    opcoes = opcoes or {}
+    compressao, nivel = opcoes.get('compressao'), opcoes.get('nivel')
+    if compressao == 'gzip':
+        binario = gzip.open(caminho, 'wb', compresslevel=nivel or 6)
+    elif compressao == 'zstd':
+        binario = zstd.ZstdCompressor(level=nivel or 3).stream_writer(open(caminho, 'wb'))
+    else:
+        binario = open(caminho, 'wb')
+    return io.TextIOWrapper(binario, encoding='utf-8', newline='')
+
+
+def escrever_csv(caminho, colunas, blocos, opcoes=None):
+    """CSV com cabeçalho, escrito bloco a bloco"""
+    with abrir_saida(caminho, opcoes) as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(colunas)
+        for bloco in blocos:
+            escritor.writerows(bloco)
+
+
+def escrever_json(caminho, colunas, blocos, opcoes=None):
+    """Lista JSON de objetos (um registo por linha do ficheiro), escrita bloco a bloco"""
+    with abrir_saida(caminho, opcoes) as arquivo:
+        arquivo.write("[")
+        separador = "\n"
+        for bloco in blocos:
+            for linha in bloco:
+                arquivo.write(separador + json.dumps(dict(zip(colunas, linha)), default=valor_json, ensure_ascii=False))
+                separador = ",\n"
+        arquivo.write("\n]\n")
+
+
+ESCAPES_SQL = str.maketrans({'\\': '\\\\', "'": "\\'", '\0': '\\0', '\n': '\\n', '\r': '\\r', '\x1a': '\\Z'})
+
+
+def texto_intervalo(valor):
+    """timedelta (TIME do MySQL) como [-]HH:MM:SS[.ffffff] - str() daria '1 day, 2:00:00'"""
+    micros = valor // timedelta(microseconds=1)
+    sinal = "-" if micros < 0 else ""
+    segundos, micros = divmod(abs(micros), 1000000)
+    horas, resto = divmod(segundos, 3600)
+    texto = f"{sinal}{horas:02d}:{resto // 60:02d}:{resto % 60:02d}"
+    return texto + (f".{micros:06d}" if micros else "")
+
+
+def literal_sql(valor):
+    """Valor devolvido pelo conector como literal SQL do MySQL (para o dump)"""
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    if isinstance(valor, (int, float, Decimal)):
+        return str(valor)
+    if isinstance(valor, (bytes, bytearray)):
+        return f"X'{valor.hex()}'" if valor else "''"
+    if isinstance(valor, timedelta):
+        valor = texto_intervalo(valor)
+    elif isinstance(valor, set):
+        valor = ",".join(sorted(valor))
+    return "'" + str(valor).translate(ESCAPES_SQL) + "'"
+
+
+def escrever_sql(caminho, colunas, blocos, opcoes=None):
+    """Dump SQL recarregável com o cliente mysql: DROP TABLE IF EXISTS + CREATE TABLE (se conhecido)
+    e INSERTs multi-linha de IMPORTACAO_CONFIG['tamanho_lote'] linhas, escritos bloco a bloco.
+    `colunas` não deve incluir colunas geradas (o MySQL recusa INSERT nelas)."""
+    opcoes = opcoes or {}
+    tabela = opcoes.get('tabela') or 'resultado'
+    lista = ", ".join(f"`{c}`" for c in colunas)
+    tamanho_lote = IMPORTACAO_CONFIG['tamanho_lote']
+    with abrir_saida(caminho, opcoes) as arquivo:
+        arquivo.write(f"-- Dump de `{tabela}` gerado em {datetime.now():%Y-%m-%d %H:%M:%S}\n")
+        arquivo.write("SET NAMES utf8mb4;\nSET FOREIGN_KEY_CHECKS = 0;\n\n")
+        if opcoes.get('ddl'):
+            arquivo.write(f"DROP TABLE IF EXISTS `{tabela}`;\n{opcoes['ddl']};\n\n")
+        for bloco in blocos:
+            for inicio in range(0, len(bloco), tamanho_lote):
+                valores = ",\n".join("(" + ", ".join(literal_sql(v) for v in linha) + ")"
+                                     for linha in bloco[inicio:inicio + tamanho_lote])
+                arquivo.write(f"INSERT INTO `{tabela}` ({lista}) VALUES\n{valores};\n")
+        arquivo.write("\nSET FOREIGN_KEY_CHECKS = 1;\n")
+
+
+def escrever_excel(caminho, colunas, blocos, opcoes=None):
+    """XLSX em modo write_only: o openpyxl grava as linhas num ficheiro temporário em vez de as manter"""
+    from openpyxl import Workbook
+    livro = Workbook(write_only=True)
+    folha = livro.create_sheet('Dados')
+    folha.append(colunas)
+    linhas = 0
+    for bloco in blocos:
+        linhas += len(bloco)
+        if linhas > LIMITE_LINHAS_EXCEL:
+            raise ValueError(f"uma folha de Excel só comporta {LIMITE_LINHAS_EXCEL:,} linhas - use CSV ou JSON")
+        for linha in bloco:
+            folha.append([valor_planilha(v) for v in linha])
+    livro.save(caminho)
+
+
+TIPOS_ESPACIAIS = {'geometry', 'point', 'linestring', 'polygon', 'multipoint', 'multilinestring',
+                   'multipolygon', 'geometrycollection'}
+
+
+def tipo_arrow(spec):
+    """Tipo Arrow a partir da definição da coluna no MySQL (spec de analisar_tipo_mysql),
+    em vez da inferência do pandas sobre objetos"""
+    base = spec['base']
+    if base in BITS_INTEIROS:
+        bits = {8: 8, 16: 16, 24: 32, 32: 32, 64: 64}[BITS_INTEIROS[base]]
+        return getattr(pa, f"{'uint' if spec['unsigned'] else 'int'}{bits}")()
+    if base in ('decimal', 'numeric'):
+        precisao = spec['tamanho'] or 10
+        return pa.decimal128(precisao, spec['escala']) if precisao <= 38 else pa.decimal256(precisao, spec['escala'])
+    if base == 'float':
+        return pa.float32()
+    if base in ('double', 'real'):
+        return pa.float64()
+    if base == 'bit':
+        return pa.bool_() if (spec['tamanho'] or 1) == 1 else pa.uint64()
+    if base == 'year':
+        return pa.int16()
+    if base == 'date':
+        return pa.date32()
+    if base in ('datetime', 'timestamp'):
+        return pa.timestamp('us')
+    if base == 'time':
+        return pa.duration('us')  # o TIME do MySQL é um intervalo: pode ser negativo ou passar das 24h
+    if base == 'enum':
+        return pa.dictionary(pa.int16(), pa.string())
+    if base == 'set':
+        return pa.list_(pa.string())
+    if base in TIPOS_BINARIOS or base in TIPOS_ESPACIAIS:
+        return pa.binary()
+    return pa.string()  # char/varchar/text/json
+
+
+def preparar_esquema_arrow(colunas, tipos):
+    """Schema Arrow das colunas exportadas e os dicionários fixos dos ENUMs (os membros da coluna,
+    iguais em todos os lotes). Colunas sem definição conhecida vão como texto."""
+    campos = []
+    dicionarios = {}
+    for coluna in colunas:
+        spec = tipos.get(coluna)
+        tipo = tipo_arrow(spec) if spec else pa.string()
+        campos.append(pa.field(coluna, tipo, nullable=spec['nulo'] if spec else True))
+        if spec and spec['base'] == 'enum':
+            membros = spec['membros'] or []
+            dicionarios[coluna] = (pa.array(membros, type=pa.string()), {m: i for i, m in enumerate(membros)})
+    return pa.schema(campos), dicionarios
+
+
+def lote_arrow(bloco, esquema, dicionarios):
+    """RecordBatch de um bloco de linhas, convertido coluna a coluna para os tipos do schema"""
+    colunas = list(zip(*bloco)) if bloco else [()] * len(esquema)
+    arrays = []
+    for campo, valores in zip(esquema, colunas):
+        tipo = campo.type
+        if pa.types.is_dictionary(tipo):
+            membros, posicoes = dicionarios[campo.name]
+            indices = pa.array([None if v is None else posicoes.get(v) for v in valores], type=tipo.index_type)
+            arrays.append(pa.DictionaryArray.from_arrays(indices, membros))
+        elif pa.types.is_list(tipo):
+            arrays.append(pa.array([None if v is None else sorted(v) for v in valores], type=tipo))
+        elif pa.types.is_boolean(tipo):
+            arrays.append(pa.array([None if v is None else bool(v) for v in valores], type=tipo))
+        elif pa.types.is_string(tipo):
+            arrays.append(pa.array([
+                v.decode('utf-8', 'replace') if isinstance(v, (bytes, bytearray)) else (None if v is None else str(v))
+                for v in valores
+            ], type=tipo))
+        else:
+            arrays.append(pa.array(valores, type=tipo))
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema)
+
+
+def escrever_parquet(caminho, colunas, blocos, opcoes=None):
+    """Parquet com o schema das definições MySQL. Os blocos acumulam até formar um row group,
+    que é gravado de imediato: a memória usada é a de um grupo, não a da tabela.
+    A compressão pedida (gzip/zstd) é o codec das colunas; sem ela fica o snappy."""
+    opcoes = opcoes or {}
+    esquema, dicionarios = preparar_esquema_arrow(colunas, opcoes.get('tipos') or {})
+    pendentes = []
+    linhas_pendentes = 0
+    with pq.ParquetWriter(caminho, esquema, compression=opcoes.get('compressao') or 'snappy',
+                          compression_level=opcoes.get('nivel') if opcoes.get('compressao') else None) as escritor:
+        for bloco in blocos:
+            pendentes.append(lote_arrow(bloco, esquema, dicionarios))
+            linhas_pendentes += len(bloco)
+            if linhas_pendentes >= EXPORTACAO_CONFIG['linhas_grupo_parquet']:
+                escritor.write_table(pa.Table.from_batches(pendentes, schema=esquema), row_group_size=linhas_pendentes)
+                pendentes, linhas_pendentes = [], 0
+        if pendentes:
+            escritor.write_table(pa.Table.from_batches(pendentes, schema=esquema), row_group_size=linhas_pendentes)
+
+
+def escrever_arrow(caminho, colunas, blocos, opcoes=None):
+    """Arrow IPC (formato de ficheiro): um record batch por bloco lido.
+    zstd comprime os buffers dentro do ficheiro; gzip (que o IPC não suporta) envolve o ficheiro."""
+    opcoes = opcoes or {}
+    esquema, dicionarios = preparar_esquema_arrow(colunas, opcoes.get('tipos') or {})
+    opcoes_ipc = None
+    if opcoes.get('compressao') == 'zstd':
+        opcoes_ipc = pa.ipc.IpcWriteOptions(compression=pa.Codec('zstd', compression_level=opcoes.get('nivel')))
+    if opcoes.get('compressao') == 'gzip':
+        destino = pa.CompressedOutputStream(caminho, 'gzip')
+    else:
+        destino = pa.OSFile(caminho, 'wb')
+    with destino as arquivo, pa.ipc.new_file(arquivo, esquema, options=opcoes_ipc) as escritor:
+        for bloco in blocos:
+            escritor.write_batch(lote_arrow(bloco, esquema, dicionarios))
+
+
+ESCRITORES_EXPORTACAO = {'CSV': escrever_csv, 'Excel': escrever_excel, 'JSON': escrever_json, 'SQL': escrever_sql}
+if pa is not None:
+    FORMATOS_EXPORTACAO.update({
+        'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+        'Arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    })
+    ESCRITORES_EXPORTACAO.update({'Parquet': escrever_parquet, 'Arrow': escrever_arrow})
+
+
+def exportar_consulta(conexao, sql, params, formato, caminho, ao_progredir=None, tamanho_bloco=None, opcoes=None,
+                      config=None):
+    """Escreve o resultado da consulta em `caminho` no formato pedido, à medida que as linhas chegam.
+    `opcoes` vai para o escritor: 'tipos' ({coluna: spec de analisar_tipo_mysql}, schema dos formatos
+    colunares), 'compressao'/'nivel', e 'tabela'/'ddl' do dump SQL. `config` permite interromper a
+    consulta no servidor se o escritor falhar (ver abrir_consulta_streaming).
+    Retorna o número de linhas exportadas."""
+    colunas, blocos = abrir_consulta_streaming(conexao, sql, params, tamanho_bloco, config)
+    contagem = {'linhas': 0}
+    
+    def contar(blocos):
+        for bloco in blocos:
+            yield bloco
+            contagem['linhas'] += len(bloco)
+            if ao_progredir:
+                ao_progredir(contagem['linhas'])
+    
+    try:
+        ESCRITORES_EXPORTACAO[formato](caminho, colunas, contar(blocos), opcoes)
+    finally:
+        blocos.close()  # se o escritor falhar a meio, liberta o cursor
+    return contagem['linhas']
+
+
+def oferecer_download(caminho, mime, chave, nome_arquivo=None):
+    """Botão de download até ao limite configurado; acima disso o ficheiro fica no servidor
+    (o download_button carrega o conteúdo inteiro para a memória do Streamlit)"""
+    tamanho = os.path.getsize(caminho)
+    nome_arquivo = nome_arquivo or os.path.basename(caminho)
+    if tamanho <= EXPORTACAO_CONFIG['max_download_bytes']:
+        with open(caminho, 'rb') as arquivo:
+            st.download_button(f"⬇️ Descarregar {nome_arquivo} ({tamanho / (1024 * 1024):.1f} MB)", arquivo,
+                               file_name=nome_arquivo, mime=mime, key=chave, use_container_width=True)
+    else:
+        st.info(f"📁 Ficheiro com {tamanho / (1024 * 1024):,.0f} MB gravado no servidor em `{caminho}` "
+                f"(acima do limite de {EXPORTACAO_CONFIG['max_download_bytes'] // (1024 * 1024)} MB "
+                "para download pelo navegador).")
+
+
+# ==================== EXPORTAÇÃO PARALELA POR INTERVALOS DA CHAVE ====================
+
+def intervalos_chave(conexao, nome_tabela, coluna, partes, amostrar=False, estimativa=0):
+    """Divide a tabela em até `partes` intervalos (inferior, superior) da coluna `coluna`
+    (1.ª coluna da PRIMARY KEY); None é um extremo aberto.
+    - MIN/MAX repartidos em partes iguais: duas leituras do índice, só para chaves inteiras;
+    - amostra (automática para outros tipos): limites nos quantis de uma amostra aleatória das
+      chaves, que acompanha buracos e distribuições irregulares à custa de percorrer o índice uma vez."""
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(`{coluna}`), MAX(`{coluna}`) FROM `{nome_tabela}`")
+        minimo, maximo = cursor.fetchone()
+        if minimo is None or partes <= 1:
+            return [(None, None)]
+        
+        if not amostrar and isinstance(minimo, int) and not isinstance(minimo, bool):
+            passo = (maximo - minimo + 1) / partes
+            limites = [minimo + round(passo * i) for i in range(1, partes)]
+        else:
+            # A ordem vem do servidor para os limites respeitarem a collation da coluna
+            fracao = min(1.0, EXPORTACAO_CONFIG['amostra_limites'] / max(estimativa, 1))
+            cursor.execute(f"SELECT `{coluna}` FROM `{nome_tabela}` WHERE RAND() < %s ORDER BY `{coluna}`",
+                           (fracao,))
+            amostra = [linha[0] for linha in cursor.fetchall()]
+            if not amostra:
+                return [(None, None)]
+            limites = [amostra[len(amostra) * i // partes] for i in range(1, partes)]
+    finally:
+        cursor.close()
     
+    limites = [limite for i, limite in enumerate(limites) if i == 0 or limite != limites[i - 1]]
+    return list(zip([None] + limites, limites + [None]))
+
+
+def sql_intervalo(nome_tabela, coluna, intervalo, colunas_ordem, where="", params=(), colunas=None):
+    """SELECT de um intervalo da chave (com o filtro da página), na ordem da PRIMARY KEY.
+    `colunas` restringe as colunas lidas (todas por omissão)."""
+    condicoes, valores = ([f"({where})"], list(params)) if where else ([], [])
+    inferior, superior = intervalo
+    if inferior is not None:
+        condicoes.append(f"`{coluna}` >= %s")
+        valores.append(inferior)
+    if superior is not None:
+        condicoes.append(f"`{coluna}` < %s")
+        valores.append(superior)
+    selecao = ", ".join(f"`{c}`" for c in colunas) if colunas else "*"
+    sql = f"SELECT {selecao} FROM `{nome_tabela}`"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += " ORDER BY " + ", ".join(f"`{c}`" for c in colunas_ordem)
+    return sql, valores
+
+
+def abrir_snapshots(config, nome_banco, nome_tabela, quantidade):
+    """Retira `quantidade` conexões do pool, cada uma com uma transação READ ONLY
+    WITH CONSISTENT SNAPSHOT. O InnoDB não partilha um read view entre conexões; para todas verem
+    o mesmo estado da tabela, os snapshots são abertos enquanto outra conexão segura LOCK TABLES READ
+    (nenhuma escrita na tabela está por confirmar nem pode começar). O bloqueio dura só o tempo
+    de abrir as transações.
+    Retorna (conexoes, consistente) - sem privilégio LOCK TABLES os snapshots são abertos
+    seguidos, mas uma escrita pode cair entre eles."""
+    coordenadora = obter_conexao_pool(config, nome_banco)
+    cursor = coordenadora.cursor()
+    conexoes = []
+    consistente = True
+    try:
+        try:
+            cursor.execute(f"SET SESSION lock_wait_timeout = {int(EXPORTACAO_CONFIG['espera_bloqueio'])}")
+            cursor.execute(f"LOCK TABLES `{nome_tabela}` READ")
+        except Error:
+            consistente = False
+        try:
+            for _ in range(quantidade):
+                conexao = obter_conexao_pool(config, nome_banco)
+                conexoes.append(conexao)
+                cursor_snapshot = conexao.cursor()
+                cursor_snapshot.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor_snapshot.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+                cursor_snapshot.close()
+        finally:
+            if consistente:
+                cursor.execute("UNLOCK TABLES")
+    except Error:
+        for conexao in conexoes:
+            conexao.close()
+        raise
     finally:
         cursor.close()
-        conexao.close()
-        
+        coordenadora.close()
+    return conexoes, consistente
+
+
+def exportar_paralelo(config, nome_banco, nome_tabela, formato, caminho, intervalos, coluna, colunas_ordem,
+                      where="", params=(), max_paralelo=None, por_partes=False, ao_progredir=None, opcoes=None,
+                      colunas=None):
+    """Exporta os intervalos da chave em paralelo, cada worker com a sua conexão e o seu snapshot
+    (abrir_snapshots). Dois modos de saída:
+    - ordenado: os blocos de cada intervalo esperam numa fila limitada e um único escritor
+      consome os intervalos pela ordem da chave - o ficheiro é igual ao da exportação em série;
+    - por_partes: cada worker escreve o seu intervalo num ficheiro próprio (a compressão também
+      corre em paralelo) e as partes são juntas num ZIP em `caminho`.
+    ao_progredir(linhas) é sempre chamado nesta thread (o Streamlit não aceita outras);
+    `colunas` restringe as colunas lidas. Retorna (linhas, consistente)."""
+    opcoes = opcoes or {}
+    max_paralelo = max_paralelo or EXPORTACAO_CONFIG['max_paralelo']
+    # A interface e a conexão coordenadora também precisam do pool
+    max_paralelo = max(1, min(max_paralelo, POOL_CONFIG['tamanho'] - 2, len(intervalos)))
+    conexoes, consistente = abrir_snapshots(config, nome_banco, nome_tabela, max_paralelo)
+    livres = queue.Queue()
+    for conexao in conexoes:
+        livres.put(conexao)
+    cancelar = threading.Event()
+    contagem = {'linhas': 0}
+    lock = threading.Lock()
+    
+    def ler_intervalo(intervalo, consumir):
+        # Cada tarefa corre num worker com uma conexão livre (há tantas conexões como workers)
+        conexao = livres.get()
+        try:
+            sql, valores = sql_intervalo(nome_tabela, coluna, intervalo, colunas_ordem, where, params, colunas)
+            nomes_colunas, blocos = abrir_consulta_streaming(conexao, sql, valores, config=config)
+            try:
+                consumir(nomes_colunas, blocos)
+            finally:
+                blocos.close()
+        finally:
+            livres.put(conexao)
+    
+    executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix=f"exportar_{nome_tabela}")
+    diretorio_partes = tempfile.mkdtemp(prefix=f"export_{nome_tabela}_partes_") if por_partes else None
+    futuros = []
+    try:
+        if por_partes:
+            extensao = extensao_exportacao(formato, opcoes.get('compressao'))[0]
+            caminhos = [os.path.join(diretorio_partes, f"{nome_tabela}_parte{i + 1:04d}.{extensao}")
+                        for i in range(len(intervalos))]
+            
+            def escrever_parte(indice):
+                def contar(blocos):
+                    for bloco in blocos:
+                        if cancelar.is_set():
+                            return
+                        yield bloco
+                        with lock:
+                            contagem['linhas'] += len(bloco)
+                
+                # O CREATE TABLE do dump SQL só vai na primeira parte
+                opcoes_parte = opcoes if indice == 0 else {**opcoes, 'ddl': None}
+                ler_intervalo(intervalos[indice], lambda colunas, blocos: ESCRITORES_EXPORTACAO[formato](
+                    caminhos[indice], colunas, contar(blocos), opcoes_parte))
+            
+            futuros = [executor.submit(escrever_parte, i) for i in range(len(intervalos))]
+            pendentes = set(futuros)
+            while pendentes:
+                concluidos, pendentes = wait(pendentes, timeout=0.5, return_when=FIRST_EXCEPTION)
+                for futuro in concluidos:
+                    futuro.result()
+                if ao_progredir:
+                    ao_progredir(contagem['linhas'])
+            
+            # As partes já vêm comprimidas (ou não) conforme pedido: o ZIP só as arquiva
+            with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_STORED, allowZip64=True) as arquivo_zip:
+                for caminho_parte in caminhos:
+                    arquivo_zip.write(caminho_parte, os.path.basename(caminho_parte))
+            return contagem['linhas'], consistente
+        
+        # Saída ordenada: uma fila por intervalo. As tarefas são submetidas pela ordem da chave,
+        # logo o intervalo que o escritor espera já está sempre num worker.
+        filas = [queue.Queue(maxsize=EXPORTACAO_CONFIG['blocos_em_espera']) for _ in intervalos]
+        cabecalho = queue.Queue()
+        
+        def encher_fila(indice):
+            fila = filas[indice]
+            
+            def enfileirar(item):
+                while not cancelar.is_set():
+                    try:
+                        fila.put(item, timeout=0.5)
+                        return True
+                    except queue.Full:
+                        pass
+                return False
+            
+            def consumir(colunas, blocos):
+                if indice == 0:
+                    cabecalho.put(colunas)
+                for bloco in blocos:
+                    if not enfileirar(bloco):
+                        return
+            
+            try:
+                ler_intervalo(intervalos[indice], consumir)
+                enfileirar(None)
+            except Exception as e:
+                if indice == 0 and cabecalho.empty():
+                    cabecalho.put(e)
+                enfileirar(e)
+                raise
+        
+        futuros = [executor.submit(encher_fila, i) for i in range(len(intervalos))]
+        
+        def blocos_ordenados():
+            for fila in filas:
+                while True:
+                    bloco = fila.get()
+                    if bloco is None:
+                        break
+                    if isinstance(bloco, Exception):
+                        raise bloco
+                    contagem['linhas'] += len(bloco)
+                    if ao_progredir:
+                        ao_progredir(contagem['linhas'])
+                    yield bloco
+        
+        nomes_colunas = cabecalho.get()
+        if isinstance(nomes_colunas, Exception):
+            raise nomes_colunas
+        ESCRITORES_EXPORTACAO[formato](caminho, nomes_colunas, blocos_ordenados(), opcoes)
+        return contagem['linhas'], consistente
+    finally:
+        # Erro, cancelamento ou fim: os workers param, os intervalos por começar já não correm
+        cancelar.set()
+        for futuro in futuros:
+            futuro.cancel()
+        executor.shutdown(wait=True)
+        for conexao in conexoes:
+            try:
+                conexao.rollback()  # termina a transação READ ONLY antes de devolver ao pool
+            except Error:
+                pass
+            conexao.close()
+        if diretorio_partes:
+            shutil.rmtree(diretorio_partes, ignore_errors=True)
+
+
+# Trabalhos de exportação: cada ficheiro gerado fica disponível para reruns e outras sessões
+# enquanto a tabela, o filtro e o formato forem os mesmos
+
+@st.cache_resource
+def obter_registro_exportacoes():
+    """Registro global dos ficheiros exportados, por (servidor, banco, tabela, consulta, formato, impressão)"""
+    return {'trabalhos': OrderedDict(), 'em_curso': set(), 'lock': threading.Lock()}
+
+
+def geracao_tabela(config, nome_banco, nome_tabela):
+    """Contador de escritas da app na tabela (o mesmo que invalida a cache de lookups)"""
+    cache = obter_cache_lookups()
+    with cache['lock']:
+        return cache['geracoes'].get((chave_servidor(config), nome_banco, nome_tabela), 0)
+
+
+def impressao_dados(conexao, config, nome_banco, nome_tabela):
+    """Impressão barata do estado dos dados, sem ler a tabela: UPDATE_TIME e TABLE_ROWS do InnoDB
+    mais o contador de escritas da app. Escritas externas só contam quando o UPDATE_TIME muda."""
+    cursor = conexao.cursor()
+    try:
+        try:
+            # O MySQL 8 guarda estas estatísticas em cache (24h por omissão)
+            cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+        except Error:
+            pass  # MySQL 5.7 / MariaDB: valores sempre atuais
+        cursor.execute("""
+            SELECT UPDATE_TIME, TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+        """, (nome_banco, nome_tabela))
+        linha = cursor.fetchone() or (None, None)
+    finally:
+        cursor.close()
+    return str(linha[0]), linha[1], geracao_tabela(config, nome_banco, nome_tabela)
+
+
+def remover_trabalho_exportacao(registro, chave):
+    """Esquece um trabalho e apaga o seu ficheiro (chamar com o lock)"""
+    trabalho = registro['trabalhos'].pop(chave, None)
+    if trabalho and os.path.exists(trabalho['caminho']):
+        try:
+            os.remove(trabalho['caminho'])
+        except OSError:
+            pass  # ainda aberto por um download em curso
+
+
+def obter_trabalho_exportacao(chave):
+    """Ficheiro já exportado para a chave (None se não existir, tiver expirado ou sido apagado)"""
+    registro = obter_registro_exportacoes()
+    with registro['lock']:
+        trabalho = registro['trabalhos'].get(chave)
+        if trabalho is None:
+            return None
+        if (perf_counter() - trabalho['criado_em'] > EXPORTACAO_CONFIG['validade_segundos']
+                or not os.path.exists(trabalho['caminho'])):
+            remover_trabalho_exportacao(registro, chave)
+            return None
+        registro['trabalhos'].move_to_end(chave)
+        return trabalho
+
+
+def registrar_trabalho_exportacao(chave, trabalho):
+    """Guarda o ficheiro gerado. Versões antigas da mesma exportação (outra impressão dos dados)
+    e, acima do máximo, os trabalhos menos usados são apagados."""
+    registro = obter_registro_exportacoes()
+    with registro['lock']:
+        for antiga in [c for c in registro['trabalhos'] if c[:-1] == chave[:-1]]:
+            remover_trabalho_exportacao(registro, antiga)
+        registro['trabalhos'][chave] = trabalho
+        while len(registro['trabalhos']) > EXPORTACAO_CONFIG['max_trabalhos']:
+            remover_trabalho_exportacao(registro, next(iter(registro['trabalhos'])))
+
+
 # ==================== FUNÇÃO PARA EXPORTAÇÃO DE DADOS  ====================
 
 def exportar_tabela(nome_banco, nome_tabela):
-    """Exporta dados da tabela para CSV"""
+    """Exporta dados da tabela (CSV, Excel, JSON, dump SQL, Parquet ou Arrow), opcionalmente comprimidos,
+    em streaming para um ficheiro temporário"""
     st.subheader("📥 Exportar Dados")
     
     conexao = conectar_mysql(nome_banco)
     if not conexao:
         return
     
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    registro = obter_registro_exportacoes()
     cursor = conexao.cursor()
+    caminho = None
+    chave_trabalho = None
     
     try:
-        # Obter dados
-        cursor.execute(f"SELECT * FROM `{nome_tabela}`")
-        dados = cursor.fetchall()
+        # Obter nomes das colunas
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
+        nomes_colunas = [col[0] for col in colunas_info]
         
-        if not dados:
-            st.warning("📭 Nenhum dado para exportar. A tabela está vazia.")
+        # Filtros aplicados no servidor: só as linhas pedidas saem do MySQL
+        chave_export = f"export_{nome_banco}_{nome_tabela}"
+        filtros_ativos = st.session_state.get(f"filtros_{chave_export}", {}).get('filtros')
+        with st.expander("🔍 Filtrar antes de exportar", expanded=bool(filtros_ativos)):
+            estado_filtros, alterado = editor_filtros(nome_banco, nome_tabela, chave_export)
+        if alterado:
+            st.rerun()
+        
+        where, params = compilar_filtros(estado_filtros['filtros'], nomes_colunas)
+        sql = f"SELECT * FROM `{nome_tabela}`" + (f" WHERE {where}" if where else "")
+        if estado_filtros['ordem']:
+            sql += f" ORDER BY `{estado_filtros['ordem']}` {'DESC' if estado_filtros['desc'] else 'ASC'}"
+        
+        # Preview: só as primeiras linhas saem do servidor
+        cursor.execute(sql + " LIMIT 10", params)
+        preview = cursor.fetchall()
+        
+        if not preview:
+            if where:
+                st.warning("📭 Nenhum registro corresponde aos filtros.")
+            else:
+                st.warning("📭 Nenhum dado para exportar. A tabela está vazia.")
             return
         
-        # Obter nomes das colunas
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
-        nomes_colunas = [col[0] for col in colunas_info]
+        sufixo = "_filtrado" if where else ""
         
-        # Criar DataFrame
-        df = pd.DataFrame(dados, columns=nomes_colunas)
+        # Total: estimativa do InnoDB sem filtro, contagem limitada com filtro
+        if where:
+            total = contar_limitado(cursor, nome_tabela, where, params)
+            rotulo_total = f"> {total - 1:,}" if total > 10000 else f"{total:,}"
+        else:
+            total = estimativas_linhas(conexao, nome_banco).get(nome_tabela, 0)
+            rotulo_total = f"≈ {total:,}"
+        cursor.execute("""
+            SELECT DATA_LENGTH FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+        """, (nome_banco, nome_tabela))
+        tamanho_dados = (cursor.fetchone() or [0])[0] or 0
         
         # Estatísticas
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("📝 Registros", len(df))
+            st.metric("📝 Registros", rotulo_total)
         with col2:
-            st.metric("🏗️ Colunas", len(df.columns))
+            st.metric("🏗️ Colunas", len(nomes_colunas))
         with col3:
-            tamanho_mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
-            st.metric("💾 Tamanho", f"{tamanho_mb:.2f} MB")
+            st.metric("💾 Tamanho da tabela", f"{tamanho_dados / (1024 * 1024):.2f} MB")
         
         # Mostrar preview
         st.write("**Preview dos dados (primeiras 10 linhas):**")
-        st.dataframe(df.head(10), use_container_width=True)
+        st.dataframe(pd.DataFrame(preview, columns=nomes_colunas), use_container_width=True)
         
         # Opções de exportação
         st.markdown("---")
-        st.write("**Escolha o formato de exportação:**")
-        
-        col_exp1, col_exp2, col_exp3 = st.columns(3)
-        
-        with col_exp1:
-            # Exportar para CSV
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="📊 CSV",
-                data=csv,
-                file_name=f"{nome_tabela}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-        
-        with col_exp2:
-            # Exportar para Excel
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Dados')
-            
-            st.download_button(
-                label="📈 Excel",
-                data=output.getvalue(),
-                file_name=f"{nome_tabela}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+        formato = st.radio("**Escolha o formato de exportação:**", list(FORMATOS_EXPORTACAO), horizontal=True,
+                           key=f"{chave_export}_formato")
+        if pa is None:
+            st.caption("💡 Instale `pyarrow` para exportar também em Parquet e Arrow.")
+        if formato == 'Excel' and total > LIMITE_LINHAS_EXCEL:
+            # Recusar já: senão o limite só é detetado depois de ler e escrever mais de um milhão de linhas
+            st.error(f"❌ A tabela tem cerca de {total:,} linhas e uma folha de Excel só comporta "
+                     f"{LIMITE_LINHAS_EXCEL:,}. Use CSV, JSON ou Parquet, ou filtre os dados.")
+            return
         
-        with col_exp3:
-            # Exportar para JSON
-            json_str = df.to_json(orient='records', indent=2)
-            st.download_button(
-                label="📋 JSON",
-                data=json_str,
-                file_name=f"{nome_tabela}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json",
-                use_container_width=True
-            )
+        col1, col2 = st.columns(2)
+        with col1:
+            compressao = st.radio("Compressão:", ["Nenhuma"] + list(COMPRESSOES_EXPORTACAO), horizontal=True,
+                                  key=f"{chave_export}_compressao")
+            compressao = None if compressao == "Nenhuma" else compressao
+        nivel = None
+        if compressao:
+            minimo, maximo, omissao = COMPRESSOES_EXPORTACAO[compressao][2]
+            with col2:
+                nivel = st.slider("Nível:", minimo, maximo, omissao, key=f"{chave_export}_nivel_{compressao}",
+                                  help="Mais alto: ficheiro menor, exportação mais lenta")
+            if formato == 'Excel':
+                st.caption("O XLSX já é um ficheiro ZIP comprimido: a compressão escolhida não se aplica.")
+        extensao, mime = extensao_exportacao(formato, compressao)
+        
+        # Colunas geradas (VIRTUAL/STORED) recusam INSERT: ficam fora do dump e o CREATE TABLE recalcula-as
+        colunas_exportadas = None
+        if formato == 'SQL':
+            colunas_exportadas = [col[0] for col in colunas_info if not coluna_gerada(col)]
+            sql = "SELECT " + ", ".join(f"`{c}`" for c in colunas_exportadas) + sql[len("SELECT *"):]
+        
+        # Leitura paralela por intervalos da PRIMARY KEY (a saída fica na ordem da chave)
+        colunas_pk = obter_chave_primaria_colunas(nome_banco, nome_tabela)
+        paralelo = None
+        if colunas_pk and not estado_filtros['ordem']:
+            with st.expander("⚡ Exportação paralela (intervalos da chave primária)"):
+                if st.checkbox("Ler a tabela em paralelo", key=f"{chave_export}_paralelo",
+                               help="Para tabelas grandes: cada conexão lê um intervalo da chave ao mesmo tempo, "
+                                    "todas sobre o mesmo snapshot dos dados"):
+                    maximo_workers = max(1, POOL_CONFIG['tamanho'] - 2)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        workers = st.number_input("Conexões em paralelo:", min_value=1, max_value=maximo_workers,
+                                                  value=min(EXPORTACAO_CONFIG['max_paralelo'], maximo_workers),
+                                                  key=f"{chave_export}_workers")
+                    with col2:
+                        partes = st.number_input("Intervalos:", min_value=1, max_value=1000,
+                                                 value=int(workers) * EXPORTACAO_CONFIG['partes_por_worker'],
+                                                 key=f"{chave_export}_partes")
+                    amostrar = st.radio("Limites dos intervalos:", ["MIN/MAX", "Amostra das chaves"], horizontal=True,
+                                        key=f"{chave_export}_limites",
+                                        help="MIN/MAX divide chaves inteiras em partes iguais; a amostra serve "
+                                             "chaves com buracos ou não numéricas") == "Amostra das chaves"
+                    por_partes = st.radio("Saída:", ["Um ficheiro ordenado", "Um ficheiro por intervalo (ZIP)"],
+                                          horizontal=True, key=f"{chave_export}_saida") != "Um ficheiro ordenado"
+                    paralelo = (int(workers), int(partes), amostrar, por_partes)
+                    if por_partes:
+                        extensao, mime = 'zip', 'application/zip'
+        # A saída ordenada é igual à da exportação em série; as partes dependem da divisão
+        divisao = paralelo[1:3] if paralelo and paralelo[3] else None
+        
+        # Só o formato escolhido é gerado, e só quando pedido; o ficheiro fica guardado para a
+        # mesma tabela + filtro + formato enquanto os dados não mudarem
+        chave = (chave_servidor(config), nome_banco, nome_tabela, sql, tuple(params), formato, compressao, nivel,
+                 divisao, impressao_dados(conexao, config, nome_banco, nome_tabela))
+        trabalho = obter_trabalho_exportacao(chave)
+        if trabalho:
+            st.caption(f"♻️ Ficheiro gerado às {trabalho['gerado_em']:%H:%M:%S} com {trabalho['linhas']:,} linhas "
+                       "- os dados não mudaram desde então.")
+            oferecer_download(trabalho['caminho'], mime, f"{chave_export}_download", trabalho['nome_arquivo'])
+            if not st.button("🔄 Gerar de novo", key=f"{chave_export}_regerar",
+                             help="Escritas feitas fora da app podem não ser detetadas de imediato"):
+                return
+        elif not st.button("📦 Gerar ficheiro", type="primary", key=f"{chave_export}_gerar"):
+            return
         
-        # Opções de filtro para exportação
-        with st.expander("🔍 Filtrar antes de exportar", expanded=False):
-            if not df.empty:
-                col_filtro = st.selectbox("Filtrar por coluna:", nomes_colunas)
-                valor_filtro = st.text_input("Valor do filtro:")
-                
-                col_a, col_b = st.columns(2)
-                with col_a:
-                    if st.button("Aplicar Filtro", use_container_width=True):
-                        if valor_filtro:
-                            try:
-                                df_filtrado = df[df[col_filtro].astype(str).str.contains(valor_filtro, case=False, na=False)]
-                                st.write(f"**Resultado:** {len(df_filtrado)} registro(s) encontrado(s)")
-                                st.dataframe(df_filtrado.head(10), use_container_width=True)
-                                
-                                # Botão para exportar filtrado
-                                csv_filtrado = df_filtrado.to_csv(index=False)
-                                st.download_button(
-                                    label=f"📥 Exportar {len(df_filtrado)} registro(s)",
-                                    data=csv_filtrado,
-                                    file_name=f"{nome_tabela}_filtrado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                    mime="text/csv",
-                                    use_container_width=True
-                                )
-                            except:
-                                st.warning("Não foi possível aplicar o filtro")
-    
+        with registro['lock']:
+            if chave in registro['em_curso']:
+                st.info("⏳ Esta exportação já está a ser gerada noutra sessão. Tente daqui a pouco.")
+                return
+            registro['em_curso'].add(chave)
+            chave_trabalho = chave
+        
+        # As linhas vão do cursor sem buffer para o ficheiro, bloco a bloco
+        nome_arquivo = f"{nome_tabela}{sufixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+        descritor, caminho = tempfile.mkstemp(prefix=f"export_{nome_tabela}_", suffix=f".{extensao}")
+        os.close(descritor)
+        barra = st.progress(0.0)
+        area_status = st.empty()
+        inicio = perf_counter()
+        
+        def ao_progredir(linhas):
+            decorrido = perf_counter() - inicio
+            if total and not where:
+                barra.progress(min(1.0, linhas / total))
+            area_status.caption(f"📤 {linhas:,} linhas - {linhas / decorrido if decorrido else 0:,.0f} linhas/s")
+        
+        opcoes = {
+            'tipos': {col[0]: analisar_tipo_mysql(col) for col in colunas_info},
+            'compressao': compressao,
+            'nivel': nivel,
+            'tabela': nome_tabela
+        }
+        if formato == 'SQL':
+            cursor.execute(f"SHOW CREATE TABLE `{nome_tabela}`")
+            opcoes['ddl'] = cursor.fetchone()[1]
+        if paralelo:
+            workers, partes, amostrar, por_partes = paralelo
+            intervalos = intervalos_chave(conexao, nome_tabela, colunas_pk[0], partes, amostrar,
+                                          estimativas_linhas(conexao, nome_banco).get(nome_tabela, 0))
+            linhas, consistente = exportar_paralelo(config, nome_banco, nome_tabela, formato, caminho, intervalos,
+                                                    colunas_pk[0], colunas_pk, where, params, workers, por_partes,
+                                                    ao_progredir, opcoes, colunas_exportadas)
+            if not consistente:
+                st.warning("⚠️ Sem privilégio LOCK TABLES: os snapshots das conexões foram abertos em sequência "
+                           "e uma escrita feita entretanto pode aparecer só em alguns intervalos.")
+        else:
+            linhas = exportar_consulta(conexao, sql, params, formato, caminho, ao_progredir, opcoes=opcoes,
+                                       config=config)
+        barra.progress(1.0)
+        decorrido = perf_counter() - inicio
+        st.success(f"✅ {linhas:,} linhas exportadas em {decorrido:.1f}s "
+                   f"({linhas / decorrido if decorrido else 0:,.0f} linhas/s)")
+        registrar_trabalho_exportacao(chave, {
+            'caminho': caminho,
+            'nome_arquivo': nome_arquivo,
+            'linhas': linhas,
+            'gerado_em': datetime.now(),
+            'criado_em': perf_counter()
+        })
+        oferecer_download(caminho, mime, f"{chave_export}_download_novo", nome_arquivo)
+        caminho = None
+        
+    except ValueError as e:
+        st.error(f"❌ Exportação inválida: {e}")
     except Error as e:
         st.error(f"Erro ao exportar: {e}")
     
     finally:
+        if chave_trabalho:
+            with registro['lock']:
+                registro['em_curso'].discard(chave_trabalho)
+        # Ficheiro incompleto de uma exportação que falhou
+        if caminho and os.path.exists(caminho):
+            os.remove(caminho)
         cursor.close()
         conexao.close()
 
@@ -690,8 +3192,7 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
     
     try:
         # Obter estrutura atual
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        estrutura = cursor.fetchall()
+        estrutura = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         # Obter FOREIGN KEYS
         fks = obter_foreign_keys(nome_banco, nome_tabela)
@@ -817,6 +3318,7 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
                     # Executar
                     cursor.execute(sql)
                     conexao.commit()
+                    invalidar_catalogo(nome_banco, nome_tabela)
                     
                     st.success(f"✅ Coluna '{novo_nome}' adicionada com sucesso!")
                     st.balloons()
@@ -921,6 +3423,7 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
                             
                             cursor.execute(sql)
                             conexao.commit()
+                            invalidar_catalogo(nome_banco, nome_tabela)
                             
                             st.success(f"✅ Coluna '{coluna_selecionada}' atualizada para '{novo_nome}'!")
                             
@@ -972,6 +3475,7 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
                                 
                                 cursor.execute(sql)
                                 conexao.commit()
+                                invalidar_catalogo(nome_banco, nome_tabela)
                                 
                                 st.success(f"✅ Coluna '{coluna_para_remover}' removida com sucesso!")
                                 
@@ -1202,6 +3706,7 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
                                         
                                         cursor.execute(sql_alterar)
                                         conexao.commit()
+                                        invalidar_catalogo(nome_banco, nome_tabela)
                                         tipo_exato_atual = tipo_exato_ref
                                         st.success(f"✅ Coluna `{coluna_fk}` alterada para `{tipo_exato_ref}`")
                                     except Error as e:
@@ -1248,6 +3753,7 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
                             st.info("🔄 Executando criação da FOREIGN KEY...")
                             cursor.execute(sql)
                             conexao.commit()
+                            invalidar_catalogo(nome_banco, nome_tabela)
                             
                             # Verificar se foi criada
                             fks_atualizadas = obter_foreign_keys(nome_banco, nome_tabela)
@@ -1368,6 +3874,14 @@ def editar_estrutura_tabela(nome_banco, nome_tabela):
                             </p>
                         </div>
                         """, unsafe_allow_html=True)
+            
+            # Tabelas que apontam para esta (índice do grafo de FKs)
+            referenciada_por = tabelas_que_referenciam(nome_banco, nome_tabela)
+            if referenciada_por:
+                st.write(f"**⬇️ Referenciada por {len(referenciada_por)} FOREIGN KEY(s):**")
+                for aresta in referenciada_por:
+                    st.write(f"- `{aresta['filho']}.{', '.join(aresta['colunas'])}` → "
+                             f"`{', '.join(aresta['colunas_ref'])}` (ON DELETE {aresta['on_delete']})")
                 
                 
     except Error as e:  
@@ -1402,24 +3916,17 @@ def mostrar_relacionamentos_banco(nome_banco):
     cursor = conexao.cursor()
     
     try:
-        # Consulta para obter todos os relacionamentos
-        query = """
-        SELECT 
-            TABLE_NAME,
-            COLUMN_NAME,
-            REFERENCED_TABLE_NAME,
-            REFERENCED_COLUMN_NAME,
-            CONSTRAINT_NAME
-        FROM 
-            INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-        WHERE 
-            TABLE_SCHEMA = %s
-            AND REFERENCED_TABLE_NAME IS NOT NULL
-        ORDER BY TABLE_NAME, CONSTRAINT_NAME
-        """
-        
-        cursor.execute(query, (nome_banco,))
-        relacionamentos = cursor.fetchall()
+        # Todos os relacionamentos a partir do grafo de FKs em memória
+        catalogo = obter_catalogo(nome_banco)
+        grafo = obter_grafo_fks(nome_banco)
+        relacionamentos = []
+        regras_constraint = {}
+        for arestas in grafo['pais'].values():
+            for aresta in arestas:
+                for coluna, coluna_ref in zip(aresta['colunas'], aresta['colunas_ref']):
+                    # (tabela, coluna, tabela_ref, coluna_ref, constraint)
+                    relacionamentos.append((aresta['filho'], coluna, aresta['pai'], coluna_ref, aresta['constraint']))
+                regras_constraint[aresta['constraint']] = (aresta['on_delete'], aresta['on_update'])
         
         if relacionamentos:
             # Agrupar por CONSTRAINT
@@ -1442,18 +3949,42 @@ def mostrar_relacionamentos_banco(nome_banco):
                 tabelas_com_fk = len(set([r[0] for r in relacionamentos]))
                 st.metric("🏗️ Tabelas Relacionadas", tabelas_com_fk)
             
+            # Vizinhança de uma tabela (consulta direta ao índice, sem varrer o banco)
+            tabelas_grafo = sorted(set(grafo['pais']) | set(grafo['filhos']))
+            tabela_foco = st.selectbox("🎯 Ver vizinhança da tabela:", tabelas_grafo, key="rel_tabela_foco")
+            if tabela_foco:
+                col_pais, col_filhos = st.columns(2)
+                with col_pais:
+                    st.write("**⬆️ Referencia (pais):**")
+                    for aresta in tabelas_referenciadas(nome_banco, tabela_foco):
+                        st.write(f"- `{aresta['pai']}` ({', '.join(aresta['colunas'])})")
+                with col_filhos:
+                    st.write("**⬇️ Referenciada por (filhos):**")
+                    for aresta in tabelas_que_referenciam(nome_banco, tabela_foco):
+                        st.write(f"- `{aresta['filho']}` ({', '.join(aresta['colunas'])}) - ON DELETE {aresta['on_delete']}")
+                
+                vizinhos = sorted({a['pai'] for a in tabelas_referenciadas(nome_banco, tabela_foco)} |
+                                  {a['filho'] for a in tabelas_que_referenciam(nome_banco, tabela_foco)})
+                if vizinhos:
+                    with st.expander("🧩 JOINs sugeridos"):
+                        for vizinho in vizinhos:
+                            for condicao in inferir_join(nome_banco, tabela_foco, vizinho):
+                                st.code(f"SELECT *\nFROM `{tabela_foco}`\nJOIN `{vizinho}` ON {condicao}", language="sql")
+            
+            # Cobertura das FKs: contagens exatas em paralelo, preenchidas à medida que terminam
+            contar_cobertura = st.checkbox(
+                "🔢 Calcular cobertura exata (COUNT em paralelo)", key=f"cobertura_{nome_banco}",
+                help="Sem esta opção são usadas as estimativas do InnoDB para o total de cada tabela"
+            )
+            estimativas = estimativas_linhas(conexao, nome_banco)
+            itens_contagem = {}
+            areas_cobertura = {}
+            
             # Mostrar cada constraint
             for constraint, fks in fks_por_constraint.items():
                 with st.expander(f"🔗 {constraint}", expanded=True):
                     # Obter informações da constraint
-                    cursor.execute(f"""
-                    SELECT DELETE_RULE, UPDATE_RULE 
-                    FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS 
-                    WHERE CONSTRAINT_SCHEMA = %s 
-                    AND CONSTRAINT_NAME = %s
-                    """, (nome_banco, constraint))
-                    
-                    regras = cursor.fetchone()
+                    regras = regras_constraint.get(constraint)
                     on_delete = regras[0] if regras else "RESTRICT"
                     on_update = regras[1] if regras else "RESTRICT"
                     
@@ -1466,23 +3997,45 @@ def mostrar_relacionamentos_banco(nome_banco):
                         tabela_destino = fk[2]
                         coluna_destino = fk[3]
                         
-                        # Contar registros relacionados
-                        cursor.execute(f"""
-                        SELECT COUNT(*) 
-                        FROM `{tabela_origem}` 
-                        WHERE `{coluna_origem}` IS NOT NULL
-                        """)
-                        com_valor = cursor.fetchone()[0]
-                        
-                        cursor.execute(f"SELECT COUNT(*) FROM `{tabela_destino}`")
-                        total_destino = cursor.fetchone()[0]
-                        
-                        st.markdown(f"""
-                        <div style="background: #f0f8ff; padding: 10px; border-radius: 5px; margin: 5px 0;">
-                            📍 **{tabela_origem}.{coluna_origem}** → **{tabela_destino}.{coluna_destino}**  
-                            <small>Registros: {com_valor}/{total_destino} ({ (com_valor/total_destino*100 if total_destino > 0 else 0):.1f}%)</small>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        # Contar registros relacionados (agendado; a área é preenchida depois)
+                        rotulo = f"{constraint}.{coluna_origem}"
+                        areas_cobertura[rotulo] = (st.empty(), tabela_origem, coluna_origem, tabela_destino, coluna_destino)
+                        if contar_cobertura:
+                            itens_contagem[f"{rotulo}|com_valor"] = (tabela_origem, f"`{coluna_origem}` IS NOT NULL")
+                            itens_contagem[f"destino|{tabela_destino}"] = (tabela_destino, "")
+            
+            def mostrar_cobertura(rotulo, com_valor, total_destino, aproximado):
+                area, tabela_origem, coluna_origem, tabela_destino, coluna_destino = areas_cobertura[rotulo]
+                if com_valor is None:
+                    texto = f"Registros: ≈ {total_destino:,} em {tabela_destino}" + (" (a contar...)" if contar_cobertura else "")
+                else:
+                    prefixo = "≈ " if aproximado else ""
+                    texto = f"Registros: {com_valor}/{prefixo}{total_destino} ({(com_valor / total_destino * 100 if total_destino > 0 else 0):.1f}%)"
+                area.markdown(f"""
+                <div style="background: #f0f8ff; padding: 10px; border-radius: 5px; margin: 5px 0;">
+                    📍 **{tabela_origem}.{coluna_origem}** → **{tabela_destino}.{coluna_destino}**  
+                    <small>{texto}</small>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            for rotulo, (_, _, _, tabela_destino, _) in areas_cobertura.items():
+                mostrar_cobertura(rotulo, None, estimativas.get(tabela_destino, 0), True)
+            
+            if itens_contagem:
+                config = st.session_state.get('db_config', DEFAULT_CONFIG)
+                com_valores, totais = {}, {}
+                for item, valor, erro, _ in contar_em_paralelo(config, nome_banco, itens_contagem):
+                    if erro:
+                        st.warning(f"⚠️ Contagem `{item}` falhou: {erro}")
+                        continue
+                    if item.startswith("destino|"):
+                        totais[item.split("|", 1)[1]] = valor
+                    else:
+                        com_valores[item.rsplit("|", 1)[0]] = valor
+                    # Atualiza as FKs cujas duas contagens já terminaram
+                    for rotulo, (_, _, _, tabela_destino, _) in areas_cobertura.items():
+                        if rotulo in com_valores and tabela_destino in totais:
+                            mostrar_cobertura(rotulo, com_valores[rotulo], totais[tabela_destino], False)
             
             # Diagrama de relacionamentos simplificado
             st.markdown("---")
@@ -1500,10 +4053,9 @@ def mostrar_relacionamentos_banco(nome_banco):
                 diagrama += f"    {tabela} {{\n"
                 
                 # Adicionar colunas PK
-                cursor.execute(f"SHOW KEYS FROM `{tabela}` WHERE Key_name = 'PRIMARY'")
-                pks = cursor.fetchall()
-                for pk in pks:
-                    diagrama += f"        INT {pk[4]}\n"
+                info_tabela = catalogo['tabelas'].get(tabela, {})
+                for pk in info_tabela.get('pk', []):
+                    diagrama += f"        INT {pk}\n"
                 
                 diagrama += "    }\n"
             
@@ -1568,6 +4120,9 @@ def excluir_banco_simples_mas_funcional(nome_banco):
             st.error(f"❌ Banco `{nome_banco}` ainda existe após exclusão!")
             return False
         else:
+            remover_pools_banco(nome_banco)
+            invalidar_catalogo(nome_banco)
+            descartar_contagens(st.session_state.get('db_config', DEFAULT_CONFIG), nome_banco)
             st.success(f"✅ Banco `{nome_banco}` excluído com sucesso!")
             return True
             
@@ -1695,6 +4250,9 @@ def pagina_inicial():
                         try:
                             cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{novo_banco}`")
                             st.success(f"Banco '{novo_banco}' criado com sucesso!")
+                            # Devolver a conexão ao pool antes do rerun
+                            cursor.close()
+                            conexao.close()
                             st.rerun()
                         except Error as e:
                             st.error(f"Erro: {e}")
@@ -1702,6 +4260,8 @@ def pagina_inicial():
     cursor.execute("SHOW DATABASES")
     bancos = [db[0] for db in cursor.fetchall() 
             if db[0] not in ['information_schema', 'mysql', 'performance_schema', 'sys']]
+    cursor.close()
+    conexao.close()
 
     if bancos:
         st.subheader("📂 Bancos de Dados Disponíveis")
@@ -1867,6 +4427,23 @@ def diagnosticar_sistema_mysql():
         cursor.close()
         conexao.close()
         
+        # 8. Pools de conexão do gerenciador
+        pools = estatisticas_pools()
+        st.write(f"**8. Pools de conexão ativos:** {len(pools)}")
+        if pools:
+            df_pools = pd.DataFrame(pools)
+            df_pools['tempo_espera_total'] = df_pools['tempo_espera_total'].round(3)
+            df_pools['maior_espera'] = df_pools['maior_espera'].round(3)
+            st.dataframe(df_pools, use_container_width=True)
+        
+        # Cache partilhada das listas de FK
+        cache = estatisticas_cache_lookups()
+        consultas = cache['acertos'] + cache['falhas']
+        st.write(f"**9. Cache de listas de FK:** {cache['entradas']} entradas, "
+                 f"{cache['bytes'] / (1024 * 1024):.2f} de {CACHE_LOOKUP_CONFIG['max_bytes'] / (1024 * 1024):.0f} MB, "
+                 f"taxa de acerto {(cache['acertos'] / consultas * 100 if consultas else 0):.1f}% "
+                 f"({cache['despejos']} despejos, {cache['expirados']} expirados, {cache['invalidacoes']} invalidações)")
+        
         # Recomendações
         st.markdown("---")
         st.subheader("💡 Recomendações")
@@ -1946,6 +4523,22 @@ def diagnosticar_banco(nome_banco):
             
             if len(tabelas) > 5:
                 st.write(f"*... e mais {len(tabelas)-5} tabelas*")
+            
+            # Contagem exata de todas as tabelas em paralelo, mostrada à medida que termina
+            if st.button("🔢 Contar registros exatos (paralelo)", key=f"diag_contar_{nome_banco}"):
+                config_pool = st.session_state.get('db_config', DEFAULT_CONFIG)
+                area_tabela = st.empty()
+                barra = st.progress(0.0)
+                linhas = []
+                inicio = perf_counter()
+                itens = {tabela: (tabela, "") for tabela in tabelas}
+                for tabela, valor, erro, duracao in contar_em_paralelo(config_pool, nome_banco, itens):
+                    registrar_contagem(config_pool, nome_banco, tabela, valor=valor, erro=erro, duracao=duracao)
+                    linhas.append({'Tabela': tabela, 'Registros': valor, 'Tempo (s)': round(duracao, 3), 'Erro': erro or ''})
+                    area_tabela.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+                    barra.progress(len(linhas) / len(itens), text=f"{len(linhas)}/{len(itens)} tabelas")
+                st.caption(f"⏱️ Total: {perf_counter() - inicio:.2f}s "
+                           f"(soma das contagens: {sum(l['Tempo (s)'] for l in linhas):.2f}s)")
         
         # 4. Conexões ativas neste banco
         cursor.execute(f"""
@@ -2119,10 +4712,14 @@ def gerenciar_banco(nome_banco):
         st.subheader("📋 Menu")
         opcao = st.radio(
             "Selecione:",
-            ["🏠 Visão Geral", "📊 Tabelas", "➕ Nova Tabela"]
+            ["🏠 Visão Geral", "📊 Tabelas", "➕ Nova Tabela", "🧪 Dados de Teste"]
         )
         
         st.markdown("---")
+        if st.button("🔄 Recarregar Metadados", help="Relê a estrutura do banco (útil após DDL externo)"):
+            invalidar_catalogo(nome_banco)
+            st.rerun()
+        
         if st.button("🔙 Voltar ao Início"):
             st.session_state.banco_selecionado = None
             if 'pagina_atual' in st.session_state:
@@ -2141,6 +4738,9 @@ def gerenciar_banco(nome_banco):
     elif opcao == "➕ Nova Tabela":
         criar_nova_tabela(nome_banco)
     
+    elif opcao == "🧪 Dados de Teste":
+        gerar_dados_teste(nome_banco)
+    
           
         
 # ==================== FUNÇÃO DE VISÃO GERAL DO PROJETO ====================
@@ -2155,20 +4755,14 @@ def mostrar_visao_geral(nome_banco):
     cursor = conexao.cursor()
     
     try:
-        # Contar tabelas
-        cursor.execute("SHOW TABLES")
-        tabelas = cursor.fetchall()
+        # Contar tabelas (catálogo em memória)
+        catalogo = obter_catalogo(nome_banco)
+        tabelas = list(catalogo['tabelas'])
         num_tabelas = len(tabelas)
         
-        # Contar registros totais
-        total_registros = 0
-        
-        for tabela in tabelas:
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM `{tabela[0]}`")
-                total_registros += cursor.fetchone()[0]
-            except:
-                pass
+        # Registros: estimativa do INFORMATION_SCHEMA (uma consulta, sem COUNT(*) por tabela)
+        estimativas = estimativas_linhas(conexao, nome_banco)
+        total_registros = sum(estimativas.values())
         # ⭐⭐ ADICIONE ESTA PARTE NOVA AQUI ⭐⭐
         # Primeiro: Estatísticas com 4 colunas agora
         st.subheader("📊 Estatísticas do Banco")
@@ -2176,19 +4770,13 @@ def mostrar_visao_geral(nome_banco):
         with col1:
             st.metric("📋 Tabelas", num_tabelas)
         with col2:
-            st.metric("📝 Registros", f"{total_registros:,}")
+            st.metric("📝 Registros (estimado)", f"≈ {total_registros:,}")
         with col3:
             status = "✅ Online" if conexao.is_connected() else "❌ Offline"
             st.metric("🔄 Status", status)
         with col4:
             # Nova métrica para relacionamentos
-            cursor.execute("""
-                SELECT COUNT(*) 
-                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE 
-                WHERE TABLE_SCHEMA = %s 
-                AND REFERENCED_TABLE_NAME IS NOT NULL
-            """, (nome_banco,))
-            num_fks = cursor.fetchone()[0]
+            num_fks = sum(len(info['fks']) for info in catalogo['tabelas'].values())
             st.metric("🔗 Relacionamentos", num_fks)
         
         # ⭐⭐ BOTÃO PARA MAPA DE RELACIONAMENTOS ⭐⭐
@@ -2224,26 +4812,85 @@ def mostrar_visao_geral(nome_banco):
         
         st.markdown("---")
         
+        # Contagens por tabela: fragmento que se atualiza sozinho enquanto houver contagens a correr
+        mostrar_contagens_tabelas(nome_banco, tabelas, estimativas)
+    
+    except Error as e:
+        st.error(f"Erro: {e}")
+    
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+def mostrar_contagens_tabelas(nome_banco, tabelas, estimativas):
+    """Contagens exatas (só a pedido, em segundo plano e com timeout por tabela) e lista das tabelas.
+    Enquanto a tarefa corre, o fragmento volta a desenhar-se a cada intervalo e mostra cada contagem
+    assim que termina; só lê o registo em memória, por isso não segura conexões entre atualizações."""
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    atualizar = contagens_exatas(config, nome_banco)[1]
+    
+    @st.fragment(run_every=CONTAGEM_CONFIG['intervalo_atualizacao'] if atualizar else None)
+    def painel():
+        exatas, em_curso = contagens_exatas(config, nome_banco)
+        if atualizar and not em_curso:
+            st.rerun()  # a tarefa terminou: uma execução completa desliga a atualização periódica
+        
+        col_cont1, col_cont2 = st.columns([3, 1])
+        with col_cont1:
+            area_progresso = st.empty()
+            progresso = progresso_contagens(config, nome_banco) if em_curso else None
+            if progresso:
+                concluidas, total = progresso
+                area_progresso.progress(concluidas / max(total, 1),
+                                        text=f"⏳ Contagens exatas: {concluidas}/{total} tabelas")
+            elif em_curso:
+                area_progresso.info("⏳ A calcular contagens exatas...")
+            elif exatas:
+                mais_antiga = min(c['calculado_em'] for c in exatas.values())
+                area_progresso.caption(f"🔢 Contagens exatas calculadas desde {mais_antiga.strftime('%d/%m/%Y %H:%M:%S')}")
+            else:
+                area_progresso.caption("Os registros por tabela são estimativas do InnoDB (TABLE_ROWS).")
+        with col_cont2:
+            if em_curso:
+                if st.button("⏹️ Cancelar", use_container_width=True, key="contagem_cancelar"):
+                    cancelar_contagens_exatas(config, nome_banco)
+                    st.rerun()
+            elif st.button("🔢 Contagens exatas", use_container_width=True, key="contagem_iniciar",
+                           help=f"COUNT(*) em paralelo ({CONTAGEM_CONFIG['max_paralelo']} de cada vez, "
+                                f"máx. {CONTAGEM_CONFIG['timeout_ms'] // 1000}s por tabela)"):
+                iniciar_contagens_exatas(config, nome_banco, list(estimativas))
+                st.rerun()
+        
         # ⭐⭐ Listar tabelas (seu código atual) ⭐⭐
         if tabelas:
             st.subheader("📋 Tabelas do Banco")
             for tabela in tabelas:
                 col1, col2, col3, col4 = st.columns([4, 1, 1, 1])
                 with col1:
-                    st.markdown(f'<div class="tabela-row"><b>{tabela[0]}</b></div>', unsafe_allow_html=True)
+                    exata = exatas.get(tabela)
+                    if exata and exata['valor'] is not None:
+                        idade = (datetime.now() - exata['calculado_em']).total_seconds()
+                        antiga = " (antiga)" if idade > CONTAGEM_CONFIG['validade_segundos'] else ""
+                        registros = f"{exata['valor']:,} registros{antiga}"
+                    elif exata:
+                        registros = f"≈ {estimativas.get(tabela, 0):,} registros (contagem falhou)"
+                    else:
+                        registros = f"≈ {estimativas.get(tabela, 0):,} registros"
+                    st.markdown(f'<div class="tabela-row"><b>{tabela}</b> <small>{registros}</small></div>', unsafe_allow_html=True)
                 with col2:
-                    if st.button("📊 Ver", key=f"view_{tabela[0]}"):
-                        st.session_state.tabela_selecionada = tabela[0]
+                    if st.button("📊 Ver", key=f"view_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
                         st.session_state.pagina_atual = "dados_tabela"
                         st.rerun()
                 with col3:
-                    if st.button("💾 Inserir", key=f"insert_{tabela[0]}"):
-                        st.session_state.tabela_selecionada = tabela[0]
+                    if st.button("💾 Inserir", key=f"insert_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
                         st.session_state.pagina_atual = "inserir_dados"  # Corrigi para "inserir_dados"
                         st.rerun()
                 with col4:
-                    if st.button("⚙️ Configurar", key=f"config_{tabela[0]}"):
-                        st.session_state.tabela_selecionada = tabela[0]
+                    if st.button("⚙️ Configurar", key=f"config_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
                         st.session_state.pagina_atual = "editar_tabela"
                         st.rerun()                        
         else:
@@ -2257,13 +4904,8 @@ def mostrar_visao_geral(nome_banco):
                 # Ou mude a opção do radio
                 st.rerun()
     
-    except Error as e:
-        st.error(f"Erro: {e}")
-    
-    finally:
-        cursor.close()
-        conexao.close()
-        
+    painel()
+
 
 # ==================== FUNÇÃO GERENCIAR TABELAS ====================
 
@@ -2275,81 +4917,83 @@ def gerenciar_tabelas(nome_banco):
         return
     
     cursor = conexao.cursor()
-    cursor.execute("SHOW TABLES")
-    tabelas = [t[0] for t in cursor.fetchall()]
     
-    if not tabelas:
-        st.info("📭 Nenhuma tabela encontrada. Crie a primeira!")
-        return
+    try:
+        tabelas = obter_tabelas_banco(nome_banco)
     
-    st.subheader("📋 Tabelas Disponíveis")
+        if not tabelas:
+            st.info("📭 Nenhuma tabela encontrada. Crie a primeira!")
+            return
+    
+        st.subheader("📋 Tabelas Disponíveis")
     
-    for tabela in tabelas:
-        with st.expander(f"📊 {tabela}", expanded=False):
-            # Mostrar estrutura
-            cursor.execute(f"DESCRIBE `{tabela}`")
-            estrutura = cursor.fetchall()
+        for tabela in tabelas:
+            with st.expander(f"📊 {tabela}", expanded=False):
+                # Mostrar estrutura (catálogo em memória)
+                estrutura = obter_estrutura_tabela(nome_banco, tabela)
             
-            df_estrutura = pd.DataFrame(
-                estrutura,
-                columns=['Campo', 'Tipo', 'Nulo', 'Chave', 'Default', 'Extra']
-            )
+                df_estrutura = pd.DataFrame(
+                    estrutura,
+                    columns=['Campo', 'Tipo', 'Nulo', 'Chave', 'Default', 'Extra']
+                )
             
-            st.dataframe(df_estrutura, use_container_width=True)
+                st.dataframe(df_estrutura, use_container_width=True)
             
-            # Botões de ação
-            col1, col2, col3, col4, col5 = st.columns(5)
+                # Botões de ação
+                col1, col2, col3, col4, col5 = st.columns(5)
             
-            with col1:
-                if st.button("👁️ Ver Dados", key=f"view_data_{tabela}"):
-                    st.session_state.tabela_selecionada = tabela
-                    st.session_state.pagina_atual = "dados_tabela"
-                    st.rerun()
+                with col1:
+                    if st.button("👁️ Ver Dados", key=f"view_data_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
+                        st.session_state.pagina_atual = "dados_tabela"
+                        st.rerun()
             
-            with col2:
-                if st.button("➕ Inserir Registos", key=f"insert_{tabela}"):
-                    st.session_state.tabela_selecionada = tabela
-                    st.session_state.pagina_atual = "inserir_dados"
-                    st.rerun()
+                with col2:
+                    if st.button("➕ Inserir Registos", key=f"insert_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
+                        st.session_state.pagina_atual = "inserir_dados"
+                        st.rerun()
             
-            with col3:
-                if st.button("✏️ Editar Tabela", key=f"struct_{tabela}"):
-                    st.session_state.tabela_selecionada = tabela
-                    st.session_state.pagina_atual = "editar_tabela"
-                    st.rerun()
+                with col3:
+                    if st.button("✏️ Editar Tabela", key=f"struct_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
+                        st.session_state.pagina_atual = "editar_tabela"
+                        st.rerun()
             
-            with col4:
-                if st.button("📝 Nova Coluna", key=f"addcol_{tabela}"):
-                    st.session_state.tabela_selecionada = tabela
-                    st.session_state.pagina_atual = "adicionar_coluna"
-                    st.rerun()
+                with col4:
+                    if st.button("📝 Nova Coluna", key=f"addcol_{tabela}"):
+                        st.session_state.tabela_selecionada = tabela
+                        st.session_state.pagina_atual = "adicionar_coluna"
+                        st.rerun()
             
-            with col5:
-                # Usando st.checkbox diretamente (simples)
-                excluir = st.checkbox(f"Excluir {tabela}", key=f"chk_drop_{tabela}")
+                with col5:
+                    # Usando st.checkbox diretamente (simples)
+                    excluir = st.checkbox(f"Excluir {tabela}", key=f"chk_drop_{tabela}")
                 
-                if excluir:
-                    st.warning(f"Tem certeza que deseja excluir '{tabela}'?")
+                    if excluir:
+                        st.warning(f"Tem certeza que deseja excluir '{tabela}'?")
                     
-                    col_sim, col_nao = st.columns(2)
-                    with col_sim:
-                        if st.button("Sim, excluir", key=f"btn_sim_{tabela}", type="primary"):
-                            try:
-                                cursor.execute(f"DROP TABLE IF EXISTS `{tabela}`")
-                                conexao.commit()
-                                st.success(f"✅ Tabela '{tabela}' excluída!")
-                                st.rerun()
-                            except Error as e:
-                                st.error(f"❌ Erro: {e}")
+                        col_sim, col_nao = st.columns(2)
+                        with col_sim:
+                            if st.button("Sim, excluir", key=f"btn_sim_{tabela}", type="primary"):
+                                try:
+                                    cursor.execute(f"DROP TABLE IF EXISTS `{tabela}`")
+                                    conexao.commit()
+                                    invalidar_catalogo(nome_banco, tabela)
+                                    st.success(f"✅ Tabela '{tabela}' excluída!")
+                                    st.rerun()
+                                except Error as e:
+                                    st.error(f"❌ Erro: {e}")
                     
-                    with col_nao:
-                        if st.button("Cancelar", key=f"btn_nao_{tabela}"):
-                            # Desmarca o checkbox
-                            st.session_state[f"chk_drop_{tabela}"] = False
-                            st.rerun()
+                        with col_nao:
+                            if st.button("Cancelar", key=f"btn_nao_{tabela}"):
+                                # Desmarca o checkbox
+                                st.session_state[f"chk_drop_{tabela}"] = False
+                                st.rerun()
     
-    cursor.close()
-    conexao.close()
+    finally:
+        cursor.close()
+        conexao.close()
 
 # ==================== FUNÇÃO PARA CRIAR NOVA TABELA ====================
 
@@ -2620,6 +5264,7 @@ def criar_tabela_no_banco(nome_banco, nome_tabela, colunas):
         # Executar
         cursor.execute(sql)
         conexao.commit()
+        invalidar_catalogo(nome_banco, nome_tabela)
         
         # Sucesso!
         st.balloons()
@@ -2627,8 +5272,7 @@ def criar_tabela_no_banco(nome_banco, nome_tabela, colunas):
         
         # Mostrar estrutura criada
         st.markdown("### 📋 Estrutura Criada:")
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        estrutura = cursor.fetchall()
+        estrutura = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         if estrutura:
             df = pd.DataFrame(
@@ -2687,8 +5331,7 @@ def adicionar_coluna_tabela(nome_banco, nome_tabela):
     
     try:
         # Mostrar estrutura atual
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        estrutura = cursor.fetchall()
+        estrutura = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         st.subheader("🏗️ Estrutura Atual")
         df = pd.DataFrame(
@@ -2761,12 +5404,12 @@ def adicionar_coluna_tabela(nome_banco, nome_tabela):
                             sql += " FIRST"
                         elif posicao == "APÓS id":
                             # Verificar se existe coluna 'id'
-                            cursor.execute(f"SHOW COLUMNS FROM `{nome_tabela}` LIKE 'id'")
-                            if cursor.fetchone():
+                            if any(col[0] == 'id' for col in estrutura):
                                 sql += " AFTER id"
                         
                         cursor.execute(sql)
                         conexao.commit()
+                        invalidar_catalogo(nome_banco, nome_tabela)
                         
                         st.markdown(f"""
                         <div class="success-message">
@@ -2775,8 +5418,7 @@ def adicionar_coluna_tabela(nome_banco, nome_tabela):
                         """, unsafe_allow_html=True)
                         
                         # Mostrar nova estrutura
-                        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-                        nova_estrutura = cursor.fetchall()
+                        nova_estrutura = obter_estrutura_tabela(nome_banco, nome_tabela)
                         
                         df_nova = pd.DataFrame(
                             nova_estrutura,
@@ -2816,68 +5458,762 @@ def adicionar_coluna_tabela(nome_banco, nome_tabela):
                 st.session_state.pagina_atual = None
                 st.rerun()
     
-    except Error as e:
-        st.error(f"Erro: {e}")
+    except Error as e:
+        st.error(f"Erro: {e}")
+    
+    finally:
+        cursor.close()
+        conexao.close()
+        
+# ====================       INICIO DO C.R.U.D.         ======================        
+
+# =================== CONTAGEM DE REGISTROS ============================
+
+@st.cache_resource
+def obter_registro_contagens():
+    """Registro global das contagens exatas e das tarefas em curso, partilhado entre sessões"""
+    return {'contagens': {}, 'tarefas': {}, 'lock': threading.Lock()}
+
+
+def estimativas_linhas(conexao, nome_banco):
+    """TABLE_ROWS de todas as tabelas numa única consulta (estimativa do InnoDB, sem varrer dados)"""
+    cursor = conexao.cursor()
+    try:
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+        """, (nome_banco,))
+        return {texto_is(nome): int(linhas or 0) for nome, linhas in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def contar_registros_exato(config, nome_banco, nome_tabela, where="", timeout_ms=None, ativos=None, rotulo=None):
+    """COUNT(*) numa conexão própria do pool, interrompido pelo servidor após timeout_ms.
+    Se receber `ativos`, regista lá o connection_id enquanto a consulta corre (para KILL QUERY)."""
+    timeout_ms = CONTAGEM_CONFIG['timeout_ms'] if timeout_ms is None else timeout_ms
+    conexao = obter_conexao_pool(config, nome_banco)
+    cursor = conexao.cursor()
+    try:
+        if ativos is not None:
+            ativos[rotulo or nome_tabela] = conexao.connection_id
+        # pool_reset_session repõe a variável quando a conexão volta ao pool
+        cursor.execute("SET SESSION MAX_EXECUTION_TIME = %s", (int(timeout_ms),))
+        cursor.execute(f"SELECT COUNT(*) FROM `{nome_tabela}`" + (f" WHERE {where}" if where else ""))
+        return cursor.fetchone()[0]
+    finally:
+        if ativos is not None:
+            ativos.pop(rotulo or nome_tabela, None)
+        cursor.close()
+        conexao.close()
+
+
+def interromper_consultas(config, ativos):
+    """KILL QUERY nas conexões que ainda estão a contar (a conexão continua utilizável)"""
+    ids = list(ativos.values())
+    if not ids:
+        return
+    conexao = obter_conexao_pool(config)
+    cursor = conexao.cursor()
+    try:
+        for connection_id in ids:
+            try:
+                cursor.execute(f"KILL QUERY {int(connection_id)}")
+            except Error:
+                pass  # a consulta pode ter terminado entretanto
+    finally:
+        cursor.close()
+        conexao.close()
+
+
+def contar_em_paralelo(config, nome_banco, itens, max_paralelo=None, cancelar=None, ativos=None):
+    """Gerador que conta vários itens {rotulo: (tabela, where)} num pool de threads limitado,
+    produzindo (rotulo, valor, erro, duracao) à medida que cada contagem termina.
+    O tempo total é o da contagem mais lenta, não a soma de todas."""
+    max_paralelo = max_paralelo or CONTAGEM_CONFIG['max_paralelo']
+    # Nunca mais workers do que conexões no pool (deixa uma livre para a interface)
+    max_paralelo = max(1, min(max_paralelo, POOL_CONFIG['tamanho'] - 1, len(itens) or 1))
+    cancelar = cancelar or threading.Event()
+    ativos = {} if ativos is None else ativos
+    
+    def contar(rotulo, tabela, where):
+        if cancelar.is_set():
+            return None, "cancelada", 0.0
+        inicio = perf_counter()
+        try:
+            valor = contar_registros_exato(config, nome_banco, tabela, where, ativos=ativos, rotulo=rotulo)
+            return valor, None, perf_counter() - inicio
+        except Error as e:
+            return None, "cancelada" if cancelar.is_set() else str(e), perf_counter() - inicio
+    
+    executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix=f"contagem_{nome_banco}")
+    futuros = {executor.submit(contar, rotulo, tabela, where): rotulo
+               for rotulo, (tabela, where) in itens.items()}
+    concluido = False
+    try:
+        for futuro in as_completed(futuros):
+            valor, erro, duracao = futuro.result()
+            yield futuros[futuro], valor, erro, duracao
+        concluido = True
+    finally:
+        if not concluido:
+            # Gerador abandonado (cancelamento ou rerun da página): não deixa consultas a correr
+            cancelar.set()
+            for futuro in futuros:
+                futuro.cancel()
+            interromper_consultas(config, ativos)
+        executor.shutdown(wait=False)
+
+
+def registrar_contagem(config, nome_banco, nome_tabela, valor=None, erro=None, duracao=0.0):
+    """Guarda o resultado de uma contagem exata com o momento em que foi calculada"""
+    registro = obter_registro_contagens()
+    chave = (chave_servidor(config), nome_banco)
+    with registro['lock']:
+        registro['contagens'].setdefault(chave, {})[nome_tabela] = {
+            'valor': valor,
+            'erro': erro,
+            'duracao': duracao,
+            'calculado_em': datetime.now()
+        }
+
+
+def executar_contagens(config, nome_banco, tarefa):
+    """Corpo da thread em segundo plano: regista cada contagem assim que termina"""
+    registro = obter_registro_contagens()
+    chave = (chave_servidor(config), nome_banco)
+    try:
+        itens = {tabela: (tabela, "") for tabela in tarefa['tabelas']}
+        for tabela, valor, erro, duracao in contar_em_paralelo(
+                config, nome_banco, itens, cancelar=tarefa['cancelar'], ativos=tarefa['ativos']):
+            if erro != "cancelada":
+                registrar_contagem(config, nome_banco, tabela, valor=valor, erro=erro, duracao=duracao)
+            tarefa['concluidas'] += 1
+    finally:
+        with registro['lock']:
+            registro['tarefas'].pop(chave, None)
+
+
+def iniciar_contagens_exatas(config, nome_banco, tabelas):
+    """Dispara as contagens exatas numa thread em segundo plano (uma tarefa por banco).
+    Retorna False se já houver uma tarefa em curso para este banco."""
+    registro = obter_registro_contagens()
+    chave = (chave_servidor(config), nome_banco)
+    with registro['lock']:
+        if chave in registro['tarefas']:
+            return False
+        tarefa = {
+            'tabelas': list(tabelas),
+            'concluidas': 0,
+            'cancelar': threading.Event(),
+            'ativos': {},
+            'iniciado_em': datetime.now()
+        }
+        tarefa['thread'] = threading.Thread(
+            target=executar_contagens, args=(dict(config), nome_banco, tarefa),
+            name=f"contagem_{nome_banco}", daemon=True
+        )
+        registro['tarefas'][chave] = tarefa
+    tarefa['thread'].start()
+    return True
+
+
+def cancelar_contagens_exatas(config, nome_banco):
+    """Cancela a tarefa em curso: não inicia mais contagens e interrompe as que estão a correr"""
+    registro = obter_registro_contagens()
+    with registro['lock']:
+        tarefa = registro['tarefas'].get((chave_servidor(config), nome_banco))
+    if tarefa:
+        tarefa['cancelar'].set()
+        interromper_consultas(config, tarefa['ativos'])
+
+
+def progresso_contagens(config, nome_banco):
+    """(concluídas, total) da tarefa em curso, ou None se não houver nenhuma"""
+    registro = obter_registro_contagens()
+    with registro['lock']:
+        tarefa = registro['tarefas'].get((chave_servidor(config), nome_banco))
+        return (tarefa['concluidas'], len(tarefa['tabelas'])) if tarefa else None
+
+
+def contagens_exatas(config, nome_banco):
+    """Cópia das contagens exatas conhecidas e se ainda há uma tarefa a correr"""
+    registro = obter_registro_contagens()
+    chave = (chave_servidor(config), nome_banco)
+    with registro['lock']:
+        return dict(registro['contagens'].get(chave, {})), chave in registro['tarefas']
+
+
+def descartar_contagens(config, nome_banco):
+    """Esquece as contagens exatas de um banco (ex.: depois de DROP DATABASE)"""
+    registro = obter_registro_contagens()
+    with registro['lock']:
+        registro['contagens'].pop((chave_servidor(config), nome_banco), None)
+
+# =================== CACHE DE LOOKUPS (LRU POR BYTES + TTL) ============================
+
+@st.cache_resource
+def obter_cache_lookups():
+    """Cache LRU partilhado entre sessões das listas e pesquisas de valores de FK"""
+    return {
+        'entradas': OrderedDict(),
+        'bytes': 0,
+        'geracoes': {},     # (servidor, banco, tabela) -> contador incrementado a cada escrita
+        'lock': threading.Lock(),
+        'stats': {'acertos': 0, 'falhas': 0, 'despejos': 0, 'expirados': 0, 'invalidacoes': 0}
+    }
+
+
+def tamanho_aproximado(valor):
+    """Bytes ocupados por listas/tuplos de valores simples (estimativa para o orçamento da cache)"""
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def remover_entrada_lookup(cache, chave):
+    """Retira uma entrada da cache e desconta os seus bytes (chamar com o lock)"""
+    entrada = cache['entradas'].pop(chave, None)
+    if entrada:
+        cache['bytes'] -= entrada['bytes']
+
+
+def cache_lookup(config, nome_banco, nome_tabela, coluna, consulta, carregar):
+    """Devolve o resultado em cache para (servidor, banco, tabela, coluna, consulta) ou chama carregar().
+    Entradas expiram após o TTL e ficam inválidas quando a app escreve na tabela."""
+    cache = obter_cache_lookups()
+    chave_tabela = (chave_servidor(config), nome_banco, nome_tabela)
+    chave = chave_tabela + (coluna, consulta)
+    agora = perf_counter()
+    
+    with cache['lock']:
+        geracao = cache['geracoes'].get(chave_tabela, 0)
+        entrada = cache['entradas'].get(chave)
+        if entrada:
+            if entrada['geracao'] == geracao and agora - entrada['criado_em'] < CACHE_LOOKUP_CONFIG['ttl_segundos']:
+                cache['entradas'].move_to_end(chave)
+                cache['stats']['acertos'] += 1
+                return entrada['valor']
+            remover_entrada_lookup(cache, chave)
+            cache['stats']['expirados'] += 1
+        cache['stats']['falhas'] += 1
+    
+    # Consulta fora do lock; a geração lida antes evita guardar dados de antes de uma escrita
+    valor = carregar()
+    tamanho = tamanho_aproximado(valor)
+    
+    with cache['lock']:
+        if cache['geracoes'].get(chave_tabela, 0) != geracao or tamanho > CACHE_LOOKUP_CONFIG['max_bytes']:
+            return valor
+        remover_entrada_lookup(cache, chave)
+        cache['entradas'][chave] = {'valor': valor, 'bytes': tamanho, 'geracao': geracao, 'criado_em': agora}
+        cache['bytes'] += tamanho
+        while cache['bytes'] > CACHE_LOOKUP_CONFIG['max_bytes']:
+            remover_entrada_lookup(cache, next(iter(cache['entradas'])))
+            cache['stats']['despejos'] += 1
+    
+    return valor
+
+
+def invalidar_lookups(config, nome_banco, nome_tabela=None):
+    """Invalida as listas em cache de uma tabela (ou do banco inteiro) depois de uma escrita da app"""
+    cache = obter_cache_lookups()
+    servidor = chave_servidor(config)
+    with cache['lock']:
+        afetadas = [c for c in cache['entradas']
+                    if c[0] == servidor and c[1] == nome_banco and (nome_tabela is None or c[2] == nome_tabela)]
+        for chave in afetadas:
+            remover_entrada_lookup(cache, chave)
+        if nome_tabela is None:
+            for chave_tabela in [c for c in cache['geracoes'] if c[0] == servidor and c[1] == nome_banco]:
+                cache['geracoes'][chave_tabela] += 1
+        else:
+            chave_tabela = (servidor, nome_banco, nome_tabela)
+            cache['geracoes'][chave_tabela] = cache['geracoes'].get(chave_tabela, 0) + 1
+        cache['stats']['invalidacoes'] += 1
+
+
+def registrar_escrita(nome_banco, nome_tabela):
+    """Chamar depois de INSERT/UPDATE/DELETE confirmado: invalida os lookups da tabela e das
+    tabelas alteradas por ON DELETE/UPDATE CASCADE ou SET NULL a partir dela"""
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    grafo = obter_grafo_fks(nome_banco)
+    afetadas = {nome_tabela}
+    pendentes = [nome_tabela]
+    while pendentes:
+        for aresta in grafo['filhos'].get(pendentes.pop(), []):
+            propaga = {aresta['on_delete'], aresta['on_update']} & {'CASCADE', 'SET NULL'}
+            if propaga and aresta['filho'] not in afetadas:
+                afetadas.add(aresta['filho'])
+                pendentes.append(aresta['filho'])
+    for tabela in afetadas:
+        invalidar_lookups(config, nome_banco, tabela)
+
+
+def estatisticas_cache_lookups():
+    """Resumo da cache de lookups para o diagnóstico"""
+    cache = obter_cache_lookups()
+    with cache['lock']:
+        return {'entradas': len(cache['entradas']), 'bytes': cache['bytes'], **cache['stats']}
+
+# =================== SELETOR DE FOREIGN KEY (PESQUISA NO SERVIDOR) ============================
+
+FK_BUSCA_LIMITE = 20
+COLUNAS_ROTULO_PREFERIDAS = ('nome', 'name', 'titulo', 'title', 'descricao', 'description', 'email', 'codigo', 'code')
+TIPOS_NUMERICOS = ('INT', 'DECIMAL', 'FLOAT', 'DOUBLE', 'NUMERIC')
+
+
+def escolher_coluna_rotulo(nome_banco, tabela_ref, coluna_ref):
+    """Escolhe no catálogo uma coluna legível (nome, título...) para mostrar ao lado da chave"""
+    textuais = [col[0] for col in obter_estrutura_tabela(nome_banco, tabela_ref)
+                if col[0] != coluna_ref and 'CHAR' in col[1].upper()]
+    for preferida in COLUNAS_ROTULO_PREFERIDAS:
+        for coluna in textuais:
+            if coluna.lower().startswith(preferida):
+                return coluna
+    return textuais[0] if textuais else None
+
+
+def buscar_opcoes_fk(cursor, nome_banco, tabela_ref, coluna_ref, termo="", limite=FK_BUSCA_LIMITE):
+    """Procura valores válidos da chave referenciada com consultas indexadas e LIMIT pequeno.
+    O termo é procurado como início da chave (seek por range/prefixo no índice da FK) e
+    como prefixo da coluna de rótulo. Retorna [(chave, rótulo)]."""
+    coluna_rotulo = escolher_coluna_rotulo(nome_banco, tabela_ref, coluna_ref)
+    tipo_chave = next((col[1].upper() for col in obter_estrutura_tabela(nome_banco, tabela_ref)
+                       if col[0] == coluna_ref), '')
+    chave_numerica = any(t in tipo_chave for t in TIPOS_NUMERICOS)
+    selecao = f"`{coluna_ref}`, " + (f"`{coluna_rotulo}`" if coluna_rotulo else "NULL")
+    termo = termo.strip()
+    limite = int(limite)
+    
+    partes = []
+    params = []
+    if not termo:
+        partes.append(f"SELECT {selecao} FROM `{tabela_ref}` ORDER BY `{coluna_ref}` LIMIT {limite}")
+    else:
+        if not chave_numerica:
+            partes.append(f"SELECT {selecao} FROM `{tabela_ref}` WHERE `{coluna_ref}` LIKE %s "
+                          f"ORDER BY `{coluna_ref}` LIMIT {limite}")
+            params.append(escapar_like(termo) + '%')
+        elif termo.lstrip('-').replace('.', '', 1).isdigit():
+            # Chave numérica: seek a partir do valor digitado
+            partes.append(f"SELECT {selecao} FROM `{tabela_ref}` WHERE `{coluna_ref}` >= %s "
+                          f"ORDER BY `{coluna_ref}` LIMIT {limite}")
+            params.append(termo)
+        if coluna_rotulo:
+            partes.append(f"SELECT {selecao} FROM `{tabela_ref}` WHERE `{coluna_rotulo}` LIKE %s "
+                          f"ORDER BY `{coluna_rotulo}` LIMIT {limite}")
+            params.append(escapar_like(termo) + '%')
+    
+    if not partes:
+        return []
+    sql = partes[0] if len(partes) == 1 else " UNION ".join(f"({p})" for p in partes) + f" LIMIT {limite}"
+    cursor.execute(sql, params)
+    return [(chave, rotulo) for chave, rotulo in cursor.fetchall()]
+
+
+def seletor_fk(conexao, nome_banco, tabela_ref, coluna_ref, label, valor_atual=None, key=""):
+    """Campo de pesquisa + selectbox para uma FK: só transfere as poucas opções que correspondem ao termo.
+    Retorna o valor escolhido (ou o texto digitado se a tabela referenciada estiver vazia)."""
+    termo = st.text_input(
+        f"🔎 Procurar em {tabela_ref}",
+        key=f"fk_busca_{key}",
+        placeholder=f"início de {coluna_ref} ou do nome"
+    )
     
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    cursor = conexao.cursor()
+    try:
+        # Mesma pesquisa de outra sessão/rerun sai da cache partilhada
+        opcoes = list(cache_lookup(
+            config, nome_banco, tabela_ref, coluna_ref, ('busca', termo.strip(), FK_BUSCA_LIMITE),
+            lambda: buscar_opcoes_fk(cursor, nome_banco, tabela_ref, coluna_ref, termo)
+        ))
+        # Garantir que o valor atual continua selecionável mesmo fora dos resultados
+        if valor_atual not in (None, '') and str(valor_atual) not in {str(c) for c, _ in opcoes}:
+            coluna_rotulo = escolher_coluna_rotulo(nome_banco, tabela_ref, coluna_ref)
+            cursor.execute(
+                f"SELECT `{coluna_ref}`, " + (f"`{coluna_rotulo}`" if coluna_rotulo else "NULL") +
+                f" FROM `{tabela_ref}` WHERE `{coluna_ref}` = %s LIMIT 1", (valor_atual,)
+            )
+            atual = cursor.fetchone()
+            if atual:
+                opcoes.insert(0, tuple(atual))
     finally:
         cursor.close()
-        conexao.close()
-        
-# ====================       INICIO DO C.R.U.D.         ======================        
+    
+    if not opcoes:
+        if termo:
+            st.warning(f"Nenhum valor de `{tabela_ref}` começa por '{termo}'")
+        else:
+            st.warning(f"Tabela `{tabela_ref}` está vazia")
+        return st.text_input(label, value=str(valor_atual) if valor_atual not in (None, '') else "", key=f"fk_txt_{key}")
+    
+    rotulos = {chave: rotulo for chave, rotulo in opcoes}
+    chaves = list(rotulos)
+    indice = next((i for i, c in enumerate(chaves) if str(c) == str(valor_atual)), 0)
+    return st.selectbox(
+        label, chaves, index=indice, key=f"fk_sel_{key}",
+        format_func=lambda chave: f"{chave} — {rotulos[chave]}" if rotulos.get(chave) not in (None, '') else str(chave)
+    )
+
+# =================== FILTROS E ORDENAÇÃO NO SERVIDOR ============================
+
+OPERADORES_FILTRO = ['=', 'começa com', 'entre', 'em (lista)', 'é nulo', 'não é nulo', 'contém']
+
+
+def escapar_like(valor):
+    """Escapa os curingas do LIKE para procurar o texto literal"""
+    return str(valor).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def compilar_filtros(filtros, colunas_validas):
+    """Converte filtros [{'coluna', 'operador', 'valor', 'valor2'}] num WHERE parametrizado.
+    Retorna (sql, params); sql vazio quando não há filtros."""
+    partes = []
+    params = []
+    
+    for filtro in filtros:
+        coluna = filtro['coluna']
+        if coluna not in colunas_validas:
+            raise ValueError(f"Coluna inválida: {coluna}")
+        
+        col = f"`{coluna}`"
+        operador = filtro['operador']
+        valor = filtro.get('valor', '')
+        valor2 = filtro.get('valor2', '')
+        
+        if operador == '=':
+            partes.append(f"{col} = %s")
+            params.append(valor)
+        elif operador == 'começa com':
+            # Prefixo sem curinga inicial: pode usar índice (range scan)
+            partes.append(f"{col} LIKE %s")
+            params.append(escapar_like(valor) + '%')
+        elif operador == 'entre':
+            if valor != '':
+                partes.append(f"{col} >= %s")
+                params.append(valor)
+            if valor2 != '':
+                partes.append(f"{col} <= %s")
+                params.append(valor2)
+        elif operador == 'em (lista)':
+            valores = [v.strip() for v in str(valor).split(',') if v.strip()]
+            if valores:
+                partes.append(f"{col} IN ({', '.join(['%s'] * len(valores))})")
+                params.extend(valores)
+        elif operador == 'é nulo':
+            partes.append(f"{col} IS NULL")
+        elif operador == 'não é nulo':
+            partes.append(f"{col} IS NOT NULL")
+        elif operador == 'contém':
+            partes.append(f"{col} LIKE %s")
+            params.append('%' + escapar_like(valor) + '%')
+        else:
+            raise ValueError(f"Operador inválido: {operador}")
+    
+    return " AND ".join(partes), params
+
+
+def coluna_lidera_indice(info_tabela, coluna):
+    """True se a coluna é a primeira de algum índice (ou da PK) da tabela"""
+    if not info_tabela:
+        return False
+    return any(indice['colunas'] and indice['colunas'][0] == coluna
+               for indice in info_tabela['indices'].values())
+
+
+def dicas_indice(info_tabela, filtros, ordem=None):
+    """Indica, a partir do catálogo, que filtros/ordenação podem usar um índice"""
+    dicas = []
+    for filtro in filtros:
+        indexada = coluna_lidera_indice(info_tabela, filtro['coluna'])
+        if filtro['operador'] == 'contém':
+            dicas.append(f"🐢 `{filtro['coluna']}` contém: LIKE '%...%' não usa índice (varre a tabela)")
+        elif indexada:
+            dicas.append(f"⚡ `{filtro['coluna']}` {filtro['operador']}: coluna indexada")
+        else:
+            dicas.append(f"🐢 `{filtro['coluna']}` {filtro['operador']}: coluna sem índice (varre a tabela)")
+    if ordem:
+        if coluna_lidera_indice(info_tabela, ordem):
+            dicas.append(f"⚡ Ordenação por `{ordem}`: coluna indexada")
+        else:
+            dicas.append(f"🐢 Ordenação por `{ordem}`: sem índice (filesort)")
+    return dicas
+
+
+def editor_filtros(nome_banco, nome_tabela, chave, permitir_ordem=True):
+    """Widgets para montar filtros/ordenação guardados em sessão.
+    Retorna o estado {'filtros': [...], 'ordem': coluna ou None, 'desc': bool}."""
+    chave_estado = f"filtros_{chave}"
+    if chave_estado not in st.session_state:
+        st.session_state[chave_estado] = {'filtros': [], 'ordem': None, 'desc': False}
+    estado = st.session_state[chave_estado]
+    
+    info = obter_info_tabela(nome_banco, nome_tabela)
+    colunas = [col[0] for col in obter_estrutura_tabela(nome_banco, nome_tabela)]
+    
+    with st.form(key=f"form_{chave_estado}"):
+        c1, c2, c3, c4 = st.columns([2, 2, 2, 2])
+        with c1:
+            coluna = st.selectbox("Coluna:", colunas)
+        with c2:
+            operador = st.selectbox("Operador:", OPERADORES_FILTRO)
+        with c3:
+            valor = st.text_input("Valor (lista: a, b, c):")
+        with c4:
+            valor2 = st.text_input("Até (só para 'entre'):")
+        adicionar = st.form_submit_button("➕ Adicionar filtro")
+    
+    if adicionar:
+        estado['filtros'].append({'coluna': coluna, 'operador': operador, 'valor': valor, 'valor2': valor2})
+        return estado, True
+    
+    alterado = False
+    for i, filtro in enumerate(estado['filtros']):
+        c1, c2 = st.columns([5, 1])
+        with c1:
+            texto = f"`{filtro['coluna']}` {filtro['operador']}"
+            if filtro['operador'] not in ('é nulo', 'não é nulo'):
+                texto += f" `{filtro['valor']}`" + (f" e `{filtro['valor2']}`" if filtro['operador'] == 'entre' else "")
+            st.write(texto)
+        with c2:
+            if st.button("✖️", key=f"rm_{chave_estado}_{i}"):
+                estado['filtros'].pop(i)
+                alterado = True
+                break
+    
+    if permitir_ordem:
+        o1, o2 = st.columns([3, 1])
+        with o1:
+            opcoes = ["(chave primária)"] + colunas
+            atual = opcoes.index(estado['ordem']) if estado['ordem'] in opcoes else 0
+            ordem = st.selectbox("Ordenar por:", opcoes, index=atual, key=f"ordem_{chave_estado}")
+        with o2:
+            desc = st.checkbox("Decrescente", value=estado['desc'], key=f"desc_{chave_estado}")
+        ordem = None if ordem == "(chave primária)" else ordem
+        if ordem != estado['ordem'] or desc != estado['desc']:
+            estado['ordem'], estado['desc'] = ordem, desc
+            alterado = True
+    
+    for dica in dicas_indice(info, estado['filtros'], estado['ordem']):
+        st.caption(dica)
+    
+    return estado, alterado
+
+# =================== PAGINAÇÃO POR CHAVE (KEYSET) ============================
+
+def condicao_keyset(colunas, operador):
+    """WHERE de seek sobre uma ou mais colunas: `pk` > %s ou (`a`, `b`) > (%s, %s)"""
+    if len(colunas) == 1:
+        return f"`{colunas[0]}` {operador} %s"
+    return f"({', '.join(f'`{c}`' for c in colunas)}) {operador} ({', '.join(['%s'] * len(colunas))})"
+
+
+def consultar_pagina_keyset(cursor, nome_tabela, colunas_chave, inicio=None, inclusivo=False, limite=100,
+                            where="", params=(), descendente=False):
+    """Lê uma página ordenada pelas colunas-chave com seek (WHERE chave > último visto), sem OFFSET.
+    Aceita um WHERE extra (filtros) e ordem decrescente. Busca limite + 1 linhas
+    para saber se há próxima página."""
+    direcao = "DESC" if descendente else "ASC"
+    ordem = ", ".join(f"`{c}` {direcao}" for c in colunas_chave)
+    condicoes = [where] if where else []
+    valores = list(params)
+    
+    if inicio is not None:
+        operador = ("<" if descendente else ">") + ("=" if inclusivo else "")
+        condicoes.append(condicao_keyset(colunas_chave, operador))
+        valores.extend(inicio)
+    
+    sql = f"SELECT * FROM `{nome_tabela}`"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in condicoes)
+    sql += f" ORDER BY {ordem} LIMIT {int(limite) + 1}"
+    cursor.execute(sql, valores)
+    linhas = cursor.fetchall()
+    colunas = list(cursor.column_names)
+    
+    return colunas, linhas[:limite], len(linhas) > limite
+
+
+def inicio_pagina_anterior(cursor, nome_tabela, colunas_chave, primeira_chave, limite,
+                           where="", params=(), descendente=False):
+    """Chave inicial da página anterior: seek no sentido inverso lendo só as colunas-chave"""
+    direcao = "ASC" if descendente else "DESC"
+    ordem = ", ".join(f"`{c}` {direcao}" for c in colunas_chave)
+    condicoes = [where] if where else []
+    condicoes.append(condicao_keyset(colunas_chave, ">" if descendente else "<"))
+    cursor.execute(
+        f"SELECT {', '.join(f'`{c}`' for c in colunas_chave)} FROM `{nome_tabela}` "
+        f"WHERE {' AND '.join(f'({c})' for c in condicoes)} ORDER BY {ordem} LIMIT {int(limite)}",
+        list(params) + list(primeira_chave)
+    )
+    chaves = cursor.fetchall()
+    return tuple(chaves[-1]) if chaves else None
+
+
+def contar_limitado(cursor, nome_tabela, where="", params=(), limite=10000):
+    """COUNT(*) que para de contar em `limite` (retorna limite + 1 se houver mais)"""
+    sql = f"SELECT 1 FROM `{nome_tabela}`" + (f" WHERE {where}" if where else "") + f" LIMIT {int(limite) + 1}"
+    cursor.execute(f"SELECT COUNT(*) FROM ({sql}) AS limitado", list(params))
+    return cursor.fetchone()[0]
 
 # =================== FUNÇÃO DE VISUALIZAR DADOS  ============================
 
 def visualizar_dados(nome_banco, nome_tabela):
-    """Visualiza todos os dados da tabela"""
+    """Visualiza os dados da tabela página a página (paginação por chave primária),
+    com filtros e ordenação executados no servidor"""
     conexao = conectar_mysql(nome_banco)
     if not conexao:
         return
     
     cursor = conexao.cursor()
+    
+    # Estado da paginação: a página começa depois (ou a partir) de 'inicio'
+    chave_estado = f"pag_{nome_banco}_{nome_tabela}"
+    if chave_estado not in st.session_state:
+        st.session_state[chave_estado] = {'inicio': None, 'inclusivo': False, 'pagina': 1}
+    estado = st.session_state[chave_estado]
+    
+    info = obter_info_tabela(nome_banco, nome_tabela) or {}
+    colunas_pk = list(info.get('pk', []))
+    total_estimado = info.get('linhas_estimadas', 0)
+    nulaveis = {col[0] for col in info.get('colunas', []) if col[2] == 'YES'}
 # Obter dados    
     try:
-        cursor.execute(f"SELECT * FROM `{nome_tabela}` LIMIT 1000")
-        dados = cursor.fetchall()
+        # Filtros e ordenação viram WHERE/ORDER BY - nada é filtrado em pandas
+        filtros_ativos = st.session_state.get(f"filtros_{chave_estado}", {}).get('filtros')
+        with st.expander("🔍 Filtrar e Ordenar", expanded=bool(filtros_ativos)):
+            estado_filtros, alterado = editor_filtros(nome_banco, nome_tabela, chave_estado)
+        if alterado:
+            st.session_state[chave_estado] = {'inicio': None, 'inclusivo': False, 'pagina': 1}
+            st.rerun()
         
-        if dados:
-            # Obter nomes das colunas
-            cursor.execute(f"DESCRIBE `{nome_tabela}`")
-            colunas_info = cursor.fetchall()
-            nomes_colunas = [col[0] for col in colunas_info]
+        colunas_validas = [col[0] for col in info.get('colunas', [])]
+        where, params = compilar_filtros(estado_filtros['filtros'], colunas_validas)
+        ordem = estado_filtros['ordem']
+        descendente = estado_filtros['desc']
+        
+        # Chave do seek: (coluna de ordenação, PK) para desempatar; coluna anulável
+        # ou tabela sem PK não permitem seek e recorrem a OFFSET
+        colunas_chave = []
+        if colunas_pk and (ordem is None or ordem not in nulaveis):
+            colunas_chave = ([ordem] if ordem else []) + [c for c in colunas_pk if c != ordem]
+        
+        col_tam, col_salto = st.columns([1, 3])
+        with col_tam:
+            tamanho = st.selectbox("Linhas por página:", PAGINACAO_TAMANHOS, index=1, key=f"tam_{chave_estado}")
+        
+        if colunas_chave:
+            if ordem is None:
+                with col_salto:
+                    # Ir diretamente para uma chave (seek por índice)
+                    rotulo_pk = ", ".join(colunas_pk)
+                    valor_salto = st.text_input(
+                        f"Ir para {rotulo_pk} (separe por vírgula se composta):",
+                        key=f"salto_{chave_estado}"
+                    )
+                    if st.button("➡️ Ir", key=f"btn_salto_{chave_estado}") and valor_salto.strip():
+                        partes = [v.strip() for v in valor_salto.split(",")]
+                        if len(partes) != len(colunas_pk):
+                            st.warning(f"Informe {len(colunas_pk)} valor(es) para {rotulo_pk}")
+                        else:
+                            st.session_state[chave_estado] = {'inicio': tuple(partes), 'inclusivo': True, 'pagina': None}
+                            st.rerun()
             
+            nomes_colunas, dados, tem_proxima = consultar_pagina_keyset(
+                cursor, nome_tabela, colunas_chave,
+                inicio=estado['inicio'], inclusivo=estado['inclusivo'], limite=tamanho,
+                where=where, params=params, descendente=descendente
+            )
+        else:
+            # Sem seek possível - recorre a OFFSET
+            if not colunas_pk:
+                st.warning("⚠️ Tabela sem PRIMARY KEY: paginação por OFFSET (mais lenta em páginas distantes).")
+            else:
+                st.caption(f"ℹ️ `{ordem}` aceita NULL: paginação por OFFSET nesta ordenação.")
+            pagina = estado['pagina'] or 1
+            sql = f"SELECT * FROM `{nome_tabela}`" + (f" WHERE {where}" if where else "")
+            if ordem:
+                sql += f" ORDER BY `{ordem}` {'DESC' if descendente else 'ASC'}"
+                sql += "".join(f", `{c}`" for c in colunas_pk if c != ordem)
+            sql += f" LIMIT {int(tamanho) + 1} OFFSET {(pagina - 1) * int(tamanho)}"
+            cursor.execute(sql, params)
+            linhas = cursor.fetchall()
+            nomes_colunas = list(cursor.column_names)
+            dados, tem_proxima = linhas[:tamanho], len(linhas) > tamanho
+        
+        # Com filtros a estimativa do catálogo não serve: conta até um teto
+        if where:
+            total = contar_limitado(cursor, nome_tabela, where, params)
+            rotulo_total = f"> {total - 1:,}" if total > 10000 else f"{total:,}"
+        else:
+            total = total_estimado
+            rotulo_total = f"≈ {total_estimado:,}"
+        
+        if dados:
             df = pd.DataFrame(dados, columns=nomes_colunas)
             
-            st.subheader(f"📝 Registros ({len(df)} encontrados)")
+            st.subheader(f"📝 Registros ({len(df)} nesta página)")
             
 # Mostrar estatísticas
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total", len(df))
+                st.metric("Correspondências" if where else "Total (estimado)", rotulo_total)
             with col2:
                 st.metric("Colunas", len(df.columns))
             with col3:
-                st.metric("Página", "1/1")
+                paginas = max(1, -(-total // tamanho))
+                pagina_atual = estado['pagina']
+                st.metric("Página", f"{pagina_atual}/≈{paginas}" if pagina_atual else f"—/≈{paginas}")
             
 # Mostrar dados
             st.dataframe(df, use_container_width=True, height=400)
             
-# Opções de filtro simples
-            with st.expander("🔍 Filtrar Dados"):
-                if not df.empty:
-                    col_filtro = st.selectbox("Coluna para filtrar:", df.columns)
-                    valor_filtro = st.text_input("Valor:")
-                    if st.button("Aplicar Filtro"):
-                        if valor_filtro and col_filtro:
-                            try:
-                                # Converter para string para busca
-                                df_filtrado = df[df[col_filtro].astype(str).str.contains(valor_filtro, case=False, na=False)]
-                                st.dataframe(df_filtrado, use_container_width=True)
-                                st.info(f"Encontrados {len(df_filtrado)} registros")
-                            except:
-                                st.warning("Não foi possível aplicar o filtro")
+# Navegação
+            nav1, nav2, nav3 = st.columns(3)
+            with nav1:
+                if st.button("⏮️ Primeira", use_container_width=True, key=f"prim_{chave_estado}"):
+                    st.session_state[chave_estado] = {'inicio': None, 'inclusivo': False, 'pagina': 1}
+                    st.rerun()
+            with nav2:
+                if st.button("◀️ Anterior", use_container_width=True, key=f"ant_{chave_estado}",
+                             disabled=estado['inicio'] is None and (estado['pagina'] or 1) <= 1):
+                    pagina = estado['pagina'] - 1 if estado['pagina'] else None
+                    if colunas_chave:
+                        # Valores crus do conector (o DataFrame converteria para tipos NumPy)
+                        primeira = tuple(dados[0][nomes_colunas.index(c)] for c in colunas_chave)
+                        inicio = inicio_pagina_anterior(cursor, nome_tabela, colunas_chave, primeira, tamanho,
+                                                        where=where, params=params, descendente=descendente)
+                        novo = {'inicio': inicio, 'inclusivo': inicio is not None,
+                                'pagina': pagina if inicio is not None else 1}
+                    else:
+                        novo = {'inicio': None, 'inclusivo': False, 'pagina': max(1, pagina or 1)}
+                    st.session_state[chave_estado] = novo
+                    st.rerun()
+            with nav3:
+                if st.button("Próxima ▶️", use_container_width=True, key=f"prox_{chave_estado}", disabled=not tem_proxima):
+                    pagina = estado['pagina'] + 1 if estado['pagina'] else None
+                    if colunas_chave:
+                        ultima = tuple(dados[-1][nomes_colunas.index(c)] for c in colunas_chave)
+                        novo = {'inicio': ultima, 'inclusivo': False, 'pagina': pagina}
+                    else:
+                        novo = {'inicio': None, 'inclusivo': False, 'pagina': pagina}
+                    st.session_state[chave_estado] = novo
+                    st.rerun()
+        elif estado['inicio'] is not None or (estado['pagina'] or 1) > 1:
+            st.info("📭 Nenhum registro a partir desta posição.")
+            if st.button("⏮️ Voltar à primeira página", key=f"vazio_{chave_estado}"):
+                st.session_state[chave_estado] = {'inicio': None, 'inclusivo': False, 'pagina': 1}
+                st.rerun()
+        elif where:
+            st.info("📭 Nenhum registro corresponde aos filtros.")
         else:
             st.info("📭 A tabela está vazia. Adicione o primeiro registro!")
     
+    except ValueError as e:
+        st.error(f"Filtro inválido: {e}")
     except Error as e:
         st.error(f"Erro ao carregar dados: {e}")
     
@@ -2920,8 +6256,7 @@ def inserir_registro(nome_banco, nome_tabela):
                 registros = cursor_view.fetchall()
                 
                 if registros:
-                    cursor_view.execute(f"DESCRIBE `{nome_tabela}`")
-                    colunas = [col[0] for col in cursor_view.fetchall()]
+                    colunas = [col[0] for col in obter_estrutura_tabela(nome_banco, nome_tabela)]
                     
                     import pandas as pd
                     df = pd.DataFrame(registros, columns=colunas)
@@ -2950,8 +6285,7 @@ def inserir_registro(nome_banco, nome_tabela):
     
     try:
         # Obter estrutura da tabela
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         # Criar formulário
         valores = {}
@@ -3098,6 +6432,7 @@ def inserir_registro(nome_banco, nome_tabela):
                     # Executar
                     cursor_insert.execute(sql, valores_list)
                     conexao_insert.commit()
+                    registrar_escrita(nome_banco, nome_tabela)
                     
                     # Sucesso!
                     st.balloons()
@@ -3176,8 +6511,7 @@ def editar_registro(nome_banco, nome_tabela):
     
     try:
         # Obter estrutura da tabela
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
         nomes_colunas = [col[0] for col in colunas_info]
         
         # Encontrar chave primária
@@ -3240,6 +6574,7 @@ def editar_registro(nome_banco, nome_tabela):
             
             # Formulário de edição
             novos_valores = {}
+            fk_dict = {fk[0]: (fk[1], fk[2]) for fk in obter_foreign_keys(nome_banco, nome_tabela)}
             
             for col in colunas_info:
                 col_name = col[0]
@@ -3256,7 +6591,14 @@ def editar_registro(nome_banco, nome_tabela):
                 label = f"{col_name}"
                 
                 # Determinar tipo de input
-                if 'INT' in col_type:
+                if col_name in fk_dict:
+                    # FOREIGN KEY: pesquisa no servidor em vez de carregar a tabela referenciada
+                    tabela_ref, coluna_ref = fk_dict[col_name]
+                    novos_valores[col_name] = seletor_fk(
+                        conexao, nome_banco, tabela_ref, coluna_ref, f"{label} 🔗→ {tabela_ref}.{coluna_ref}",
+                        valor_atual=valor_atual, key=f"edit_{col_name}_{registro_id}"
+                    )
+                elif 'INT' in col_type:
                     novos_valores[col_name] = st.number_input(
                         label,
                         value=int(valor_atual) if valor_atual not in [None, ''] else 0,
@@ -3348,6 +6690,7 @@ def editar_registro(nome_banco, nome_tabela):
                         
                         cursor.execute(sql, valores_update)
                         conexao.commit()
+                        registrar_escrita(nome_banco, nome_tabela)
                         
                         st.success("✅ Registro atualizado com sucesso!")
                         st.balloons()
@@ -3391,12 +6734,447 @@ def editar_registro(nome_banco, nome_tabela):
     finally:
         cursor.close()
         conexao.close()
+# ==================== EDIÇÃO EM GRADE (VÁRIOS REGISTOS) ====================
+
+GRADE_LOTE_CONFLITOS = 500   # chaves por SELECT ... FOR UPDATE na verificação de conflitos
+
+
+def valor_python(valor):
+    """Converte valores do DataFrame/data_editor (NumPy, NaN, Timestamp) em tipos aceites pelo conector"""
+    if valor is None:
+        return None
+    try:
+        if pd.isna(valor):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+
+def valores_iguais(a, b):
+    """Compara um valor do MySQL com um valor editado (ex.: Decimal('1.50') e 1.5 são iguais).
+    A comparação numérica só vale para colunas numéricas: num VARCHAR '007' e '7' são diferentes."""
+    if a is None or b is None:
+        return a is None and b is None
+    if a == b:
+        return True
+    if isinstance(a, (int, float, Decimal)):
+        try:
+            return float(a) == float(b)
+        except (TypeError, ValueError):
+            return False
+    return str(a) == str(b)
+
+
+def diferencas_grade(linhas, editado, colunas, colunas_pk):
+    """Diferença mínima por linha entre as linhas originais e o DataFrame editado.
+    Retorna [{'pk': tuplo, 'novos': {coluna: valor}, 'antigos': {coluna: valor}}] só com colunas alteradas."""
+    alteracoes = []
+    for i, original in enumerate(linhas):
+        editada = editado.iloc[i]
+        novos, antigos = {}, {}
+        for j, coluna in enumerate(colunas):
+            if coluna in colunas_pk:
+                continue
+            novo = valor_python(editada[coluna])
+            if not valores_iguais(original[j], novo):
+                novos[coluna] = novo
+                antigos[coluna] = original[j]
+        if novos:
+            pk = tuple(original[colunas.index(c)] for c in colunas_pk)
+            alteracoes.append({'pk': pk, 'novos': novos, 'antigos': antigos})
+    return alteracoes
+
+
+def aplicar_alteracoes_grade(conexao, nome_tabela, colunas_pk, alteracoes):
+    """Aplica as alterações numa única transação.
+    As linhas são bloqueadas com SELECT ... FOR UPDATE; as que foram excluídas ou alteradas por
+    outra sessão desde a leitura ficam de fora (conflitos). As restantes são gravadas com um
+    executemany por conjunto de colunas alteradas. Retorna (atualizadas, conflitos)."""
+    cursor = conexao.cursor()
+    lista_pk = ", ".join(f"`{c}`" for c in colunas_pk)
+    try:
+        conexao.start_transaction()
+        
+        # Valores atuais das linhas a alterar, já bloqueadas até ao COMMIT
+        atuais = {}
+        for inicio in range(0, len(alteracoes), GRADE_LOTE_CONFLITOS):
+            lote = alteracoes[inicio:inicio + GRADE_LOTE_CONFLITOS]
+            marcadores = ", ".join(["(" + ", ".join(["%s"] * len(colunas_pk)) + ")"] * len(lote))
+            cursor.execute(
+                f"SELECT * FROM `{nome_tabela}` WHERE ({lista_pk}) IN ({marcadores}) FOR UPDATE",
+                [v for alt in lote for v in alt['pk']]
+            )
+            nomes = list(cursor.column_names)
+            for linha in cursor.fetchall():
+                registro = dict(zip(nomes, linha))
+                atuais[tuple(registro[c] for c in colunas_pk)] = registro
+        
+        conflitos = []
+        grupos = {}
+        for alt in alteracoes:
+            atual = atuais.get(alt['pk'])
+            if atual is None:
+                conflitos.append({'chave': alt['pk'], 'colunas': '', 'motivo': 'registro excluído entretanto'})
+                continue
+            mudadas = [c for c, v in alt['antigos'].items() if not valores_iguais(atual[c], v)]
+            if mudadas:
+                conflitos.append({'chave': alt['pk'], 'colunas': ', '.join(mudadas),
+                                  'motivo': 'alterado por outra sessão'})
+                continue
+            grupos.setdefault(tuple(sorted(alt['novos'])), []).append(alt)
+        
+        # Um UPDATE preparado por conjunto de colunas, executado em lote
+        condicao_pk = " AND ".join(f"`{c}` = %s" for c in colunas_pk)
+        for colunas, lote in grupos.items():
+            cursor.executemany(
+                f"UPDATE `{nome_tabela}` SET {', '.join(f'`{c}` = %s' for c in colunas)} WHERE {condicao_pk}",
+                [[alt['novos'][c] for c in colunas] + list(alt['pk']) for alt in lote]
+            )
+        
+        conexao.commit()
+        return sum(len(lote) for lote in grupos.values()), conflitos
+    except Error:
+        conexao.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def editar_em_grade(nome_banco, nome_tabela):
+    """Edita vários registros de uma vez numa grade e grava tudo numa transação"""
+    st.subheader("🧮 Editar em Grade")
+    
+    colunas_pk = list((obter_info_tabela(nome_banco, nome_tabela) or {}).get('pk', []))
+    if not colunas_pk:
+        st.error("❌ Esta tabela não tem chave primária definida.")
+        st.info("Para editar registros, adicione uma PRIMARY KEY à tabela.")
+        return
+    
+    chave = f"grade_{nome_banco}_{nome_tabela}"
+    
+    # Resultado da última gravação (sobrevive ao rerun que recarrega a grade)
+    resultado = st.session_state.pop(f"{chave}_resultado", None)
+    if resultado:
+        atualizadas, conflitos = resultado
+        st.success(f"✅ {atualizadas} registro(s) atualizado(s) numa transação")
+        if conflitos:
+            st.warning(f"⚠️ {len(conflitos)} registro(s) não gravado(s) por conflito:")
+            st.dataframe(pd.DataFrame([{**c, 'chave': ", ".join(map(str, c['chave']))} for c in conflitos]),
+                         use_container_width=True, hide_index=True)
+    
+    with st.expander("🔍 Filtrar registros a editar", expanded=False):
+        estado_filtros, alterado = editor_filtros(nome_banco, nome_tabela, chave, permitir_ordem=False)
+    
+    col_lim, col_rec = st.columns([3, 1])
+    with col_lim:
+        limite = st.selectbox("Registros na grade:", PAGINACAO_TAMANHOS, index=2, key=f"{chave}_limite")
+    with col_rec:
+        recarregar = st.button("🔄 Recarregar", use_container_width=True, key=f"{chave}_recarregar")
+    
+    try:
+        colunas_validas = [col[0] for col in obter_estrutura_tabela(nome_banco, nome_tabela)]
+        where, params = compilar_filtros(estado_filtros['filtros'], colunas_validas)
+    except ValueError as e:
+        st.error(f"Filtro inválido: {e}")
+        return
+    
+    # As linhas lidas ficam guardadas: são a base da diferença e da deteção de conflitos
+    assinatura = (where, tuple(params), limite)
+    snapshot = st.session_state.get(f"{chave}_snapshot")
+    if alterado or recarregar or not snapshot or snapshot['assinatura'] != assinatura:
+        conexao = conectar_mysql(nome_banco)
+        if not conexao:
+            return
+        cursor = conexao.cursor()
+        try:
+            colunas, linhas, tem_mais = consultar_pagina_keyset(
+                cursor, nome_tabela, colunas_pk, limite=limite, where=where, params=params
+            )
+        except Error as e:
+            st.error(f"Erro ao carregar dados: {e}")
+            return
+        finally:
+            cursor.close()
+            conexao.close()
+        versao = snapshot['versao'] + 1 if snapshot else 0
+        snapshot = {'assinatura': assinatura, 'colunas': colunas, 'linhas': linhas,
+                    'tem_mais': tem_mais, 'versao': versao}
+        st.session_state[f"{chave}_snapshot"] = snapshot
+    
+    if not snapshot['linhas']:
+        st.info("📭 Nenhum registro para editar.")
+        return
+    
+    if snapshot['tem_mais']:
+        st.caption(f"ℹ️ Mostrando os primeiros {limite} registros (use os filtros para chegar a outros).")
+    
+    colunas = snapshot['colunas']
+    editado = st.data_editor(
+        pd.DataFrame(snapshot['linhas'], columns=colunas),
+        disabled=colunas_pk,
+        num_rows="fixed",
+        hide_index=True,
+        use_container_width=True,
+        key=f"{chave}_editor_{snapshot['versao']}"
+    )
+    
+    alteracoes = diferencas_grade(snapshot['linhas'], editado, colunas, colunas_pk)
+    if not alteracoes:
+        st.caption("Edite as células da grade; as colunas da chave primária não são editáveis.")
+        return
+    
+    celulas = sum(len(alt['novos']) for alt in alteracoes)
+    with st.expander(f"📝 {len(alteracoes)} registro(s) alterado(s), {celulas} célula(s)"):
+        st.dataframe(pd.DataFrame([
+            {'chave': ", ".join(map(str, alt['pk'])), 'coluna': coluna,
+             'antes': str(alt['antigos'][coluna]), 'depois': str(novo)}
+            for alt in alteracoes for coluna, novo in alt['novos'].items()
+        ]), use_container_width=True, hide_index=True)
+    
+    col_gravar, col_descartar = st.columns(2)
+    with col_gravar:
+        gravar = st.button(f"💾 Gravar {len(alteracoes)} alteração(ões)", type="primary",
+                           use_container_width=True, key=f"{chave}_gravar")
+    with col_descartar:
+        if st.button("↩️ Descartar alterações", use_container_width=True, key=f"{chave}_descartar"):
+            snapshot['versao'] += 1
+            st.rerun()
+    
+    if gravar:
+        conexao = conectar_mysql(nome_banco)
+        if not conexao:
+            return
+        try:
+            resultado = aplicar_alteracoes_grade(conexao, nome_tabela, colunas_pk, alteracoes)
+            registrar_escrita(nome_banco, nome_tabela)
+        except Error as e:
+            st.error(f"❌ Nenhuma alteração gravada (transação desfeita): {e}")
+            return
+        finally:
+            conexao.close()
+        
+        # Recarregar a grade com os valores gravados
+        st.session_state[f"{chave}_resultado"] = resultado
+        snapshot['assinatura'] = None
+        st.rerun()
+
+# ==================== EXCLUSÃO EM MASSA (EM LOTES) ====================
+
+@st.cache_resource
+def obter_registro_exclusoes():
+    """Pontos de retoma das exclusões em massa, partilhados entre sessões"""
+    return {'checkpoints': {}, 'lock': threading.Lock()}
+
+
+def chave_exclusao(nome_banco, nome_tabela, where, params):
+    """Identifica uma exclusão em massa pelo servidor, tabela e filtro"""
+    config = st.session_state.get('db_config', DEFAULT_CONFIG)
+    return (chave_servidor(config), nome_banco, nome_tabela, where, tuple(str(p) for p in params))
+
+
+def excluir_lote(conexao, nome_tabela, colunas_pk, where="", params=(), apos=None, tamanho=1000):
+    """Exclui o próximo lote de linhas que correspondem ao filtro e faz COMMIT.
+    Com chave primária: lê as próximas `tamanho` chaves depois de `apos` e apaga esse intervalo
+    (range scan no índice). Sem chave primária: DELETE ... LIMIT.
+    Retorna (linhas_excluidas, ultima_chave, terminou)."""
+    cursor = conexao.cursor()
+    try:
+        condicoes = [where] if where else []
+        valores = list(params)
+        
+        if not colunas_pk:
+            sql = f"DELETE FROM `{nome_tabela}`"
+            if condicoes:
+                sql += " WHERE " + " AND ".join(f"({c})" for c in condicoes)
+            cursor.execute(sql + f" LIMIT {int(tamanho)}", valores)
+            excluidas = cursor.rowcount
+            conexao.commit()
+            return excluidas, None, excluidas < tamanho
+        
+        if apos is not None:
+            condicoes.append(condicao_keyset(colunas_pk, ">"))
+            valores.extend(apos)
+        lista_pk = ", ".join(f"`{c}`" for c in colunas_pk)
+        filtro = (" WHERE " + " AND ".join(f"({c})" for c in condicoes)) if condicoes else ""
+        cursor.execute(
+            f"SELECT {lista_pk} FROM `{nome_tabela}`{filtro} ORDER BY {lista_pk} LIMIT {int(tamanho)}",
+            valores
+        )
+        chaves = cursor.fetchall()
+        if not chaves:
+            conexao.commit()
+            return 0, apos, True
+        
+        primeira, ultima = tuple(chaves[0]), tuple(chaves[-1])
+        condicoes_lote = ([where] if where else []) + [condicao_keyset(colunas_pk, ">="), condicao_keyset(colunas_pk, "<=")]
+        cursor.execute(
+            f"DELETE FROM `{nome_tabela}` WHERE " + " AND ".join(f"({c})" for c in condicoes_lote),
+            list(params) + list(primeira) + list(ultima)
+        )
+        excluidas = cursor.rowcount
+        conexao.commit()
+        return excluidas, ultima, len(chaves) < tamanho
+    except Error:
+        conexao.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def excluir_em_massa(nome_banco, nome_tabela):
+    """Exclui várias linhas (seleção de chaves ou filtro) em lotes, com pausa, progresso e retoma"""
+    st.subheader("🧹 Exclusão em Massa")
+    
+    info = obter_info_tabela(nome_banco, nome_tabela) or {}
+    colunas_pk = list(info.get('pk', []))
+    colunas_validas = [col[0] for col in info.get('colunas', [])]
+    chave = f"massa_{nome_banco}_{nome_tabela}"
+    
+    # Seleção explícita de chaves (PK simples) ou filtro
+    opcoes_origem = ["🔍 Filtro"] + (["☑️ Lista de chaves"] if len(colunas_pk) == 1 else [])
+    origem = st.radio("Excluir por:", opcoes_origem, horizontal=True, key=f"{chave}_origem")
+    if origem == "☑️ Lista de chaves":
+        texto = st.text_area(f"Valores de `{colunas_pk[0]}` (separados por vírgula ou linha):", key=f"{chave}_lista")
+        chaves_lista = ", ".join(v.strip() for v in texto.replace("\n", ",").split(",") if v.strip())
+        filtros = [{'coluna': colunas_pk[0], 'operador': 'em (lista)', 'valor': chaves_lista}] if chaves_lista else []
+    else:
+        estado_filtros, alterado = editor_filtros(nome_banco, nome_tabela, chave, permitir_ordem=False)
+        if alterado:
+            st.rerun()
+        filtros = estado_filtros['filtros']
+    
+    if not filtros:
+        st.info("Defina um filtro ou uma lista de chaves. Sem filtro nada é excluído.")
+        return
+    
+    try:
+        where, params = compilar_filtros(filtros, colunas_validas)
+    except ValueError as e:
+        st.error(f"Filtro inválido: {e}")
+        return
+    
+    col_lote, col_pausa = st.columns(2)
+    with col_lote:
+        tamanho = st.number_input("Linhas por lote:", min_value=10, max_value=50000,
+                                  value=EXCLUSAO_MASSA_CONFIG['tamanho_lote'], step=100, key=f"{chave}_lote")
+    with col_pausa:
+        pausa = st.number_input("Pausa entre lotes (s):", min_value=0.0, max_value=10.0,
+                                value=EXCLUSAO_MASSA_CONFIG['pausa_segundos'], step=0.1, key=f"{chave}_pausa")
+    
+    if not colunas_pk:
+        st.warning("⚠️ Tabela sem PRIMARY KEY: lotes com DELETE ... LIMIT (sem ponto de retoma por chave).")
+    
+    # Filhos afetados pela exclusão
+    for aresta in tabelas_que_referenciam(nome_banco, nome_tabela):
+        if aresta['on_delete'] in ('CASCADE', 'SET NULL'):
+            st.caption(f"↳ `{aresta['filho']}` será afetada (ON DELETE {aresta['on_delete']})")
+        else:
+            st.caption(f"⛔ `{aresta['filho']}` pode bloquear lotes (ON DELETE {aresta['on_delete']})")
+    
+    conexao = conectar_mysql(nome_banco)
+    if not conexao:
+        return
+    
+    excluidos_sessao = 0
+    try:
+        registro = obter_registro_exclusoes()
+        id_exclusao = chave_exclusao(nome_banco, nome_tabela, where, params)
+        with registro['lock']:
+            checkpoint = registro['checkpoints'].get(id_exclusao)
+        
+        cursor = conexao.cursor()
+        try:
+            limite_contagem = EXCLUSAO_MASSA_CONFIG['limite_contagem']
+            total = contar_limitado(cursor, nome_tabela, where, params, limite=limite_contagem)
+        finally:
+            cursor.close()
+        conexao.commit()
+        
+        rotulo_total = f"mais de {limite_contagem:,}" if total > limite_contagem else f"{total:,}"
+        st.metric("Registros a excluir", rotulo_total)
+        
+        if checkpoint:
+            st.info(f"⏸️ Exclusão interrompida em {checkpoint['atualizado_em'].strftime('%d/%m/%Y %H:%M:%S')}: "
+                    f"{checkpoint['excluidos']:,} já excluído(s). Pode retomar a partir do último lote.")
+        
+        if total == 0:
+            if checkpoint:
+                with registro['lock']:
+                    registro['checkpoints'].pop(id_exclusao, None)
+            st.success("✅ Nenhum registro corresponde ao filtro.")
+            return
+        
+        confirmar = st.checkbox(f"Confirmo a exclusão de {rotulo_total} registro(s) de `{nome_tabela}`",
+                                key=f"{chave}_confirmar")
+        col_exec, col_desc = st.columns(2)
+        with col_exec:
+            iniciar = st.button("▶️ Retomar" if checkpoint else "🗑️ Excluir em lotes", type="primary",
+                                use_container_width=True, disabled=not confirmar, key=f"{chave}_iniciar")
+        with col_desc:
+            if checkpoint and st.button("✖️ Esquecer ponto de retoma", use_container_width=True, key=f"{chave}_esquecer"):
+                with registro['lock']:
+                    registro['checkpoints'].pop(id_exclusao, None)
+                st.rerun()
+        
+        if not iniciar:
+            return
+        
+        # Cada lote é uma transação curta; o ponto de retoma é gravado depois de cada COMMIT.
+        # Interromper a página (ex.: clicar noutro botão) para entre lotes sem perder o progresso.
+        estado = checkpoint or {'ultima_chave': None, 'excluidos': 0}
+        barra = st.progress(0.0)
+        area_status = st.empty()
+        inicio = perf_counter()
+        
+        while True:
+            excluidas, ultima, terminou = excluir_lote(
+                conexao, nome_tabela, colunas_pk, where, params, apos=estado['ultima_chave'], tamanho=int(tamanho)
+            )
+            excluidos_sessao += excluidas
+            estado = {'ultima_chave': ultima, 'excluidos': estado['excluidos'] + excluidas,
+                      'atualizado_em': datetime.now()}
+            with registro['lock']:
+                registro['checkpoints'][id_exclusao] = estado
+            
+            decorrido = perf_counter() - inicio
+            barra.progress(min(1.0, excluidos_sessao / max(total, 1)))
+            area_status.caption(f"🗑️ {estado['excluidos']:,} excluído(s) - "
+                                f"{excluidos_sessao / decorrido if decorrido else 0:,.0f} linhas/s")
+            if terminou:
+                break
+            sleep(float(pausa))
+        
+        with registro['lock']:
+            registro['checkpoints'].pop(id_exclusao, None)
+        barra.progress(1.0)
+        st.success(f"✅ {estado['excluidos']:,} registro(s) excluído(s) em {perf_counter() - inicio:.1f}s")
+    
+    except Error as e:
+        st.error(f"❌ Exclusão interrompida: {e}. Os lotes anteriores foram confirmados; pode retomar.")
+    
+    finally:
+        # Também quando a página é interrompida a meio (rerun): os lotes confirmados já saíram da tabela
+        if excluidos_sessao:
+            registrar_escrita(nome_banco, nome_tabela)
+        conexao.close()
+
 # ==================== FUNÇÃO PARA EXCLUIR REGISTOS  ====================
 
 def excluir_registro(nome_banco, nome_tabela):
     """Exclui um registro específico - Versão Simplificada"""
     st.title("🗑️ Excluir Registro")
     
+    modo = st.radio("Modo:", ["Um registro", "Em massa (filtro ou seleção)"], horizontal=True,
+                    key=f"modo_excluir_{nome_tabela}")
+    if modo != "Um registro":
+        excluir_em_massa(nome_banco, nome_tabela)
+        return
+    
     conexao = conectar_mysql(nome_banco)
     if not conexao:
         return
@@ -3413,8 +7191,7 @@ def excluir_registro(nome_banco, nome_tabela):
             return
         
         # Obter nomes das colunas
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
         nomes_colunas = [col[0] for col in colunas_info]
         
         df = pd.DataFrame(dados, columns=nomes_colunas)
@@ -3463,6 +7240,19 @@ def excluir_registro(nome_banco, nome_tabela):
                 
                 st.markdown("---")
                 
+                # Verificar dependências (uma única consulta em bloco)
+                st.write("🔍 **Verificando dependências...**")
+                bloqueado, dependencias = verificar_dependencias_registro(
+                    conexao, nome_banco, nome_tabela, registro_dict
+                )
+                mostrar_dependencias_registro(bloqueado, dependencias)
+                if bloqueado:
+                    return
+                if not dependencias:
+                    st.success("✅ Nenhum registro depende deste.")
+                else:
+                    mostrar_previsualizacao_cascata(conexao, nome_banco, nome_tabela, registro_dict, key=nome_tabela)
+                
                 # Confirmação
                 confirm = st.checkbox("Confirmar exclusão permanente deste registro?")
                 
@@ -3471,6 +7261,7 @@ def excluir_registro(nome_banco, nome_tabela):
                         try:
                             cursor.execute(f"DELETE FROM `{nome_tabela}` WHERE `{pk_column}` = %s", (selected_pk,))
                             conexao.commit()
+                            registrar_escrita(nome_banco, nome_tabela)
                             st.success(f"✅ Registro {selected_pk} excluído com sucesso!")
                             st.rerun()
                         except Error as e:
@@ -3495,15 +7286,18 @@ def gerenciar_dados_tabela(nome_banco, nome_tabela):
     st.subheader(f"📊 Nome da Tabela: {nome_tabela}")
     # Mostrar foreign keys da tabela
     fks = obter_foreign_keys(nome_banco, nome_tabela)
-    if fks:
+    referenciada_por = tabelas_que_referenciam(nome_banco, nome_tabela)
+    if fks or referenciada_por:
         with st.expander("🔗 Relacionamentos desta tabela", expanded=False):
             for fk in fks:
                 st.write(f"• `{fk[0]}` → `{fk[1]}.{fk[2]}`")
+            for aresta in referenciada_por:
+                st.write(f"• `{aresta['filho']}.{', '.join(aresta['colunas'])}` → esta tabela (ON DELETE {aresta['on_delete']})")
     
     # Menu de operações - AGORA COM TODAS AS FUNÇÕES DEFINIDAS
     opcao = st.radio(
         "Operação:",
-        ["📋 Ver Dados", "➕ Inserir Registro", "✏️ Editar Registro", "🗑️ Excluir Registro", "📥 Exportar Dados"],
+        ["📋 Ver Dados", "➕ Inserir Registro", "✏️ Editar Registro", "🧮 Editar em Grade", "🗑️ Excluir Registro", "📤 Importar Dados", "📥 Exportar Dados"],
         horizontal=True
     )
     
@@ -3516,9 +7310,15 @@ def gerenciar_dados_tabela(nome_banco, nome_tabela):
     elif opcao == "✏️ Editar Registro":
         editar_registro(nome_banco, nome_tabela)  # ✅ AGORA DEFINIDA
     
+    elif opcao == "🧮 Editar em Grade":
+        editar_em_grade(nome_banco, nome_tabela)
+    
     elif opcao == "🗑️ Excluir Registro":
         excluir_registro(nome_banco, nome_tabela)  # ✅ AGORA DEFINIDA
     
+    elif opcao == "📤 Importar Dados":
+        importar_dados(nome_banco, nome_tabela)
+    
     elif opcao == "📥 Exportar Dados":
         exportar_tabela(nome_banco, nome_tabela)  # ✅ AGORA DEFINIDA
     
@@ -3553,8 +7353,7 @@ def inserir_registro_com_fks(nome_banco, nome_tabela):
     
     try:
         # Obter estrutura da tabela
-        cursor.execute(f"DESCRIBE `{nome_tabela}`")
-        colunas_info = cursor.fetchall()
+        colunas_info = obter_estrutura_tabela(nome_banco, nome_tabela)
         
         # Obter foreign keys
         fks = obter_foreign_keys(nome_banco, nome_tabela)
@@ -3599,18 +7398,12 @@ def inserir_registro_com_fks(nome_banco, nome_tabela):
                 input_label += f" 🔗→ {tabela_ref}.{coluna_ref}"
             
             if is_foreign_key:
-                # Para FOREIGN KEY, mostrar dropdown com valores válidos
+                # Para FOREIGN KEY, pesquisar valores válidos no servidor (qualquer linha do pai, não só as 100 primeiras)
                 tabela_ref, coluna_ref = fk_dict[col_name]
-                cursor_ref = conexao.cursor()
-                cursor_ref.execute(f"SELECT `{coluna_ref}` FROM `{tabela_ref}` ORDER BY `{coluna_ref}` LIMIT 100")
-                valores_validos = [str(v[0]) for v in cursor_ref.fetchall()]
-                cursor_ref.close()
-                
-                if valores_validos:
-                    valores[col_name] = st.selectbox(input_label, valores_validos)
-                else:
-                    st.warning(f"Tabela `{tabela_ref}` está vazia. Insira dados lá primeiro.")
-                    valores[col_name] = st.text_input(input_label)
+                valores[col_name] = seletor_fk(
+                    conexao, nome_banco, tabela_ref, coluna_ref, input_label,
+                    key=f"inserir_{nome_tabela}_{col_name}"
+                )
             
             elif 'INT' in col_type.upper():
                 valores[col_name] = st.number_input(input_label, step=1, value=0)
@@ -3634,6 +7427,15 @@ def inserir_registro_com_fks(nome_banco, nome_tabela):
             else:
                 valores[col_name] = st.text_input(input_label)
         
+        # O que fazer se a PRIMARY KEY / UNIQUE já existir
+        modo = MODOS_INSERCAO[st.radio("Se a chave já existir:", list(MODOS_INSERCAO), horizontal=True,
+                                       key=f"modo_insercao_{nome_tabela}")]
+        colunas_atualizar = []
+        if modo == 'atualizar':
+            candidatas = [col[0] for col in colunas_para_mostrar if col[3] != 'PRI']
+            colunas_atualizar = st.multiselect("Colunas a atualizar:", candidatas, default=candidatas,
+                                               key=f"atualizar_insercao_{nome_tabela}")
+        
         # Botão para inserir
         col1, col2 = st.columns([1, 3])
         with col1:
@@ -3642,25 +7444,30 @@ def inserir_registro_com_fks(nome_banco, nome_tabela):
                     # Construir SQL dinâmico
                     campos = []
                     valores_list = []
-                    placeholders = []
                     
                     for campo, valor in valores.items():
                         if valor is not None and str(valor).strip() != "":
-                            campos.append(f"`{campo}`")
+                            campos.append(campo)
                             valores_list.append(valor)
-                            placeholders.append("%s")
                     
                     if not campos:
                         st.error("Nenhum valor para inserir!")
                         return
                     
-                    sql = f"INSERT INTO `{nome_tabela}` ({', '.join(campos)}) VALUES ({', '.join(placeholders)})"
+                    sql = sql_insercao(nome_tabela, campos, modo, [c for c in colunas_atualizar if c in campos])
                     
                     cursor.execute(sql, valores_list)
                     conexao.commit()
+                    registrar_escrita(nome_banco, nome_tabela)
                     
-                    st.success("✅ Registro inserido com sucesso!")
-                    st.balloons()
+                    # rowcount: 1 inserido, 2 atualizado, 0 já existia (inalterado ou ignorado)
+                    if cursor.rowcount == 1:
+                        st.success("✅ Registro inserido com sucesso!")
+                        st.balloons()
+                    elif cursor.rowcount == 2:
+                        st.success("🔄 A chave já existia: registro atualizado.")
+                    else:
+                        st.info("ℹ️ A chave já existia: nada foi alterado.")
                     
                 except Error as e:
                     if "foreign key constraint fails" in str(e).lower():
@@ -2,7 +2,27 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, FieldType, FieldFlag
+import io
+import gzip
+
+# Opcional: download em Parquet / Arrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Opcional: compressão zstd dos downloads
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# compressão -> (extensão acrescentada, mime, níveis (mínimo, máximo, omissão))
+COMPRESSOES = {'gzip': ('gz', 'application/gzip', (1, 9, 6))}
+if zstandard is not None:
+    COMPRESSOES['zstd'] = ('zst', 'application/zstd', (1, 19, 3))
 
 st.set_page_config(
     page_title="Editor de Queries",
@@ -37,6 +57,84 @@ def conectar_mysql(database=None):
         st.error(f"❌ Erro de conexão: {e}")
         return None
 
+# ============ RESULTADOS EM FORMATO COLUNAR ============
+def tabela_arrow(resultados, descricao):
+    """Tabela Arrow com os tipos tirados dos metadados das colunas (cursor.description),
+    não da inferência do pandas. DECIMAL fica com a precisão inferida dos valores."""
+    inteiros = {FieldType.TINY: 8, FieldType.SHORT: 16, FieldType.INT24: 32,
+                FieldType.LONG: 32, FieldType.LONGLONG: 64}
+    colunas = list(zip(*resultados)) if resultados else [()] * len(descricao)
+    arrays = []
+    for coluna, valores in zip(descricao, colunas):
+        tipo_mysql = coluna[1]
+        flags = coluna[7] if len(coluna) > 7 else 0
+        if tipo_mysql in inteiros:
+            sinal = 'uint' if flags & FieldFlag.UNSIGNED else 'int'
+            tipo = getattr(pa, f"{sinal}{inteiros[tipo_mysql]}")()
+        elif tipo_mysql == FieldType.YEAR:
+            tipo = pa.int16()
+        elif tipo_mysql == FieldType.FLOAT:
+            tipo = pa.float32()
+        elif tipo_mysql == FieldType.DOUBLE:
+            tipo = pa.float64()
+        elif tipo_mysql in (FieldType.DATE, FieldType.NEWDATE):
+            tipo = pa.date32()
+        elif tipo_mysql in (FieldType.DATETIME, FieldType.TIMESTAMP):
+            tipo = pa.timestamp('us')
+        elif tipo_mysql == FieldType.TIME:
+            tipo = pa.duration('us')
+        else:
+            tipo = None
+        
+        if flags & FieldFlag.SET or tipo_mysql == FieldType.SET:
+            arrays.append(pa.array([None if v is None else sorted(v) for v in valores], type=pa.list_(pa.string())))
+        elif flags & FieldFlag.ENUM or tipo_mysql == FieldType.ENUM:
+            arrays.append(pa.array(valores, type=pa.string()).dictionary_encode())
+        elif tipo is not None:
+            arrays.append(pa.array(valores, type=tipo))
+        elif any(isinstance(v, (bytes, bytearray)) for v in valores):
+            arrays.append(pa.array(valores, type=pa.binary()))
+        else:
+            # DECIMAL (precisão inferida), texto, JSON
+            arrays.append(pa.array(valores))
+    return pa.table(arrays, names=[coluna[0] for coluna in descricao])
+
+
+def bytes_csv(df, compressao=None, nivel=None):
+    """DataFrame em CSV; com compressão, o pandas comprime à medida que escreve"""
+    saida = io.BytesIO()
+    if compressao == 'gzip':
+        df.to_csv(saida, index=False, encoding='utf-8', compression={'method': 'gzip', 'compresslevel': nivel})
+    elif compressao == 'zstd':
+        df.to_csv(saida, index=False, encoding='utf-8', compression={'method': 'zstd', 'level': nivel})
+    else:
+        df.to_csv(saida, index=False, encoding='utf-8')
+    return saida.getvalue()
+
+
+def bytes_parquet(tabela, compressao=None, nivel=None):
+    """Tabela Arrow serializada em Parquet (gzip/zstd como codec das colunas; snappy por omissão)"""
+    saida = io.BytesIO()
+    pq.write_table(tabela, saida, compression=compressao or 'snappy', compression_level=nivel if compressao else None)
+    return saida.getvalue()
+
+
+def bytes_arrow(tabela, compressao=None, nivel=None):
+    """Tabela Arrow serializada em Arrow IPC (formato de ficheiro).
+    zstd comprime os buffers dentro do ficheiro; gzip (que o IPC não suporta) envolve o ficheiro."""
+    saida = io.BytesIO()
+    if compressao == 'gzip':
+        with gzip.GzipFile(fileobj=saida, mode='wb', compresslevel=nivel) as comprimido:
+            with pa.ipc.new_file(comprimido, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        return saida.getvalue()
+    opcoes = None
+    if compressao == 'zstd':
+        opcoes = pa.ipc.IpcWriteOptions(compression=pa.Codec('zstd', compression_level=nivel))
+    with pa.ipc.new_file(saida, tabela.schema, options=opcoes) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue()
+
 # ============ SELEÇÃO DO BANCO ============
 st.subheader("1. 📁 Selecione um Banco")
 
@@ -70,6 +168,16 @@ query = st.text_area(
     key="query_input"
 )
 
+with st.expander("🗜️ Compressão dos downloads"):
+    compressao = st.radio("Compressão:", ["Nenhuma"] + list(COMPRESSOES), horizontal=True, key="compressao_download")
+    compressao = None if compressao == "Nenhuma" else compressao
+    nivel = None
+    if compressao:
+        minimo, maximo, omissao = COMPRESSOES[compressao][2]
+        nivel = st.slider("Nível:", minimo, maximo, omissao, key=f"nivel_download_{compressao}",
+                          help="Mais alto: ficheiro menor, download mais lento a preparar")
+        st.caption("O Parquet usa a compressão como codec interno e mantém a extensão .parquet.")
+
 col1, col2 = st.columns(2)
 with col1:
     executar = st.button("▶️ Executar Query", type="primary", use_container_width=True)
@@ -115,14 +223,40 @@ if executar and query.strip():
                         st.success(f"✅ {len(df)} linha(s) retornada(s)")
                         st.dataframe(df, use_container_width=True)
                         
-                        # Download
-                        csv = df.to_csv(index=False).encode('utf-8')
+                        # Download (comprimido se pedido nas opções)
+                        sufixo, mime_comprimido = "", None
+                        if compressao:
+                            sufixo, mime_comprimido = f".{COMPRESSOES[compressao][0]}", COMPRESSOES[compressao][1]
                         st.download_button(
                             "⬇️ Baixar CSV",
-                            csv,
-                            f"resultados_{banco_selecionado}.csv",
-                            "text/csv"
+                            bytes_csv(df, compressao, nivel),
+                            f"resultados_{banco_selecionado}.csv{sufixo}",
+                            mime_comprimido or "text/csv"
                         )
+                        
+                        # Formatos colunares com os tipos do MySQL
+                        if pa is not None:
+                            try:
+                                tabela = tabela_arrow(resultados, cursor.description)
+                                col_pq, col_arrow = st.columns(2)
+                                with col_pq:
+                                    st.download_button(
+                                        "⬇️ Baixar Parquet",
+                                        bytes_parquet(tabela, compressao, nivel),
+                                        f"resultados_{banco_selecionado}.parquet",
+                                        "application/vnd.apache.parquet"
+                                    )
+                                with col_arrow:
+                                    st.download_button(
+                                        "⬇️ Baixar Arrow",
+                                        bytes_arrow(tabela, compressao, nivel),
+                                        f"resultados_{banco_selecionado}.arrow" + (".gz" if compressao == 'gzip' else ""),
+                                        "application/gzip" if compressao == 'gzip' else "application/vnd.apache.arrow.file"
+                                    )
+                            except (pa.ArrowException, TypeError, ValueError) as e:
+                                st.caption(f"Parquet/Arrow indisponível para este resultado: {e}")
+                        else:
+                            st.caption("💡 Instale `pyarrow` para baixar em Parquet e Arrow.")
                     else:
                         st.info("✅ Query executada, mas sem resultados.")
                 else: